@@ -1,35 +1,721 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import psycopg2
 import psycopg2.extras
+import atexit
+import hmac
 import json
+import threading
+import time
 from datetime import datetime
-import pandas as pd
-def prepare(df):
-    df['total'] = df['price'] * df['quantity']
-    return df
+import config
+from db_pool import ConnectionPool, PoolError
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import is_resource_modified
+from listing import TABLES, build_list_query, build_get_query, build_label_query, encode_cursor, dependencies, ListQueryError
+from streaming import iter_rows, export_stream, EXPORT_FORMATS
+from bulk import BulkLoader, BulkError, parse_payload
+from cache import create_cache, json_entry
+from scheduler import NOTIFY_CHANNEL
+from prep_executor import PrepExecutor, PrepError, registered_function
+from connectors import ConnectorManager, ConnectorError
+from query_cache import QueryResultCache
+from schema_cache import SchemaCache, render as render_schema
+from statements import StatementRegistry, StatementConnection
+from auth import PasswordHasher, LoginCache, is_hashed
+from tokens import TokenService, RevocationList, TokenError
+from permissions import PermissionEngine
+from last_login import LastLoginBuffer, FLUSH_SQL as LAST_LOGIN_FLUSH_SQL
+import metrics
+from json_provider import FastJSONProvider, raw_jsonb
+from compression import ResponseCompressor
+from table_versions import TableVersions, VERSIONS_SQL
+from changes import ChangeFeed, ResumeError, history as change_history
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=['X-Next-Cursor', 'ETag', 'Content-Encoding'])
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Sık okunup seyrek değişen referans tablolar önbellekten okunur
+CACHED_TABLES = {'roles', 'assistants'}
+cache = create_cache(config.CACHE_BACKEND, config.CACHE_TTL, config.CACHE_MAX_ENTRIES, config.CACHE_REDIS_URL)
+
+# Route'ların sabit sorguları; her havuz bağlantısında bir kez PREPARE edilir
+STATEMENTS = StatementRegistry(enabled=config.DB_PREPARED_STATEMENTS)
+DATE_FIELDS = ['create_date', 'change_date']
+USER_FIELDS = ['role_id', 'name', 'surname', 'password', 'e_mail', 'institution_working']
+DATABASE_INFO_FIELDS = ['database_ip', 'database_port', 'database_user', 'database_password', 'database_type', 'database_name', 'user_id']
+MODULE_FIELDS = ['module_name', 'description', 'user_id']
+ASSISTANT_FIELDS = ['title', 'explanation', 'parameters', 'user_id', 'working_place', 'default_instructions', 'data_instructions', 'file_path', 'trigger_time']
+
+for _name in TABLES:
+    STATEMENTS.add(f'{_name}.get', build_get_query(_name))
+STATEMENTS.add('roles.insert', 'INSERT INTO llm_platform.roles (role_id, role_name, permissions, admin_or_not) VALUES (%s, %s, %s, %s)')
+STATEMENTS.add('roles.update', 'UPDATE llm_platform.roles SET role_name=%s, permissions=%s, admin_or_not=%s WHERE role_id=%s')
+STATEMENTS.add('roles.delete', 'DELETE FROM llm_platform.roles WHERE role_id = %s')
+STATEMENTS.insert('users.insert', 'llm_platform.users', USER_FIELDS, optional=DATE_FIELDS)
+# old: güncellemeden önceki satır; token'lar sadece rol, şifre veya durum değiştiyse iptal edilir.
+# password gönderilmezse (veya boşsa) kayıtlı özet korunur
+STATEMENTS.add('users.update', 'UPDATE llm_platform.users u SET role_id=%s, name=%s, surname=%s, password=coalesce(%s, old.password), e_mail=%s, institution_working=%s, status=%s, change_date=%s, last_login=%s '
+                               'FROM llm_platform.users old WHERE u.id = %s AND old.id = u.id '
+                               'RETURNING (u.role_id, u.password, u.status) IS DISTINCT FROM (old.role_id, old.password, old.status)')
+STATEMENTS.add('users.delete', 'DELETE FROM llm_platform.users WHERE id = %s')
+STATEMENTS.add('users.credentials', 'SELECT id, password FROM llm_platform.users WHERE e_mail = %s')
+# Şifre, doğrulanan özet hâlâ kayıttaysa güncellenir (gerekirse yeni maliyetle özetlenmiş hali yazılır)
+STATEMENTS.add('users.login', 'UPDATE llm_platform.users SET last_login = CURRENT_TIMESTAMP, password = %s WHERE id = %s AND password = %s '
+                              'RETURNING *, (SELECT to_jsonb(r) FROM llm_platform.roles r WHERE r.role_id = users.role_id) AS role')
+# last_login tamponu açıkken giriş satırı yazmadan okunur; şifre sadece yeniden özetlenecekse güncellenir
+STATEMENTS.add('users.login_row', 'SELECT *, (SELECT to_jsonb(r) FROM llm_platform.roles r WHERE r.role_id = users.role_id) AS role '
+                                  'FROM llm_platform.users WHERE id = %s AND password = %s')
+STATEMENTS.add('users.rehash', 'UPDATE llm_platform.users SET password = %s WHERE id = %s AND password = %s '
+                               'RETURNING *, (SELECT to_jsonb(r) FROM llm_platform.roles r WHERE r.role_id = users.role_id) AS role')
+STATEMENTS.add('users.last_login_flush', LAST_LOGIN_FLUSH_SQL)
+STATEMENTS.add('users.token_subject', 'SELECT u.id, u.role_id, to_jsonb(r) AS role FROM llm_platform.users u '
+                                      'LEFT JOIN llm_platform.roles r ON r.role_id = u.role_id WHERE u.id = %s')
+STATEMENTS.add('revoked_tokens.insert', 'INSERT INTO llm_platform.revoked_tokens (jti, user_id, not_before, expires_at) VALUES (%s, %s, %s, %s)')
+STATEMENTS.add('revoked_tokens.purge', 'DELETE FROM llm_platform.revoked_tokens WHERE expires_at <= extract(epoch FROM now())')
+STATEMENTS.add('revoked_tokens.active', 'SELECT jti, user_id, not_before, expires_at FROM llm_platform.revoked_tokens')
+STATEMENTS.insert('database_info.insert', 'llm_platform.database_info', DATABASE_INFO_FIELDS, optional=DATE_FIELDS)
+STATEMENTS.add('database_info.update', 'UPDATE llm_platform.database_info SET database_ip=%s, database_port=%s, database_user=%s, database_password=%s, database_type=%s, database_name=%s, user_id=%s WHERE database_id=%s')
+STATEMENTS.add('database_info.row', 'SELECT * FROM llm_platform.database_info WHERE database_id = %s')
+STATEMENTS.add('database_info.delete', 'DELETE FROM llm_platform.database_info WHERE database_id = %s')
+STATEMENTS.insert('data_prepare_modules.insert', 'llm_platform.data_prepare_modules', MODULE_FIELDS, optional=['query_cache_ttl'] + DATE_FIELDS)
+STATEMENTS.update('data_prepare_modules.update', 'llm_platform.data_prepare_modules', MODULE_FIELDS + DATE_FIELDS, 'module_id', optional=['query_cache_ttl'])
+STATEMENTS.add('data_prepare_modules.row', 'SELECT * FROM llm_platform.data_prepare_modules WHERE module_id = %s')
+STATEMENTS.add('data_prepare_modules.delete', 'DELETE FROM llm_platform.data_prepare_modules WHERE module_id = %s')
+STATEMENTS.insert('assistants.insert', 'llm_platform.assistants', ASSISTANT_FIELDS, optional=DATE_FIELDS)
+STATEMENTS.add('assistants.update', 'UPDATE llm_platform.assistants SET title=%s, explanation=%s, parameters=%s, user_id=%s, create_date=%s, change_date=%s, working_place=%s, default_instructions=%s, data_instructions=%s, file_path=%s, trigger_time=%s WHERE asistan_id=%s')
+STATEMENTS.add('assistants.delete', 'DELETE FROM llm_platform.assistants WHERE asistan_id = %s')
+STATEMENTS.add('assistants.id_by_title', 'SELECT asistan_id FROM llm_platform.assistants WHERE title = %s')
+STATEMENTS.add('auto_prompt.insert', 'INSERT INTO llm_platform.auto_prompt (asistan_id, question, trigger_time, option_code, mcrisactive, receiver_emails) VALUES (%s, %s, %s, %s, %s, %s) RETURNING prompt_id')
+STATEMENTS.add('auto_prompt.update', 'UPDATE llm_platform.auto_prompt SET prompt_text=%s, assistants_id=%s, trigger_time=%s, mcrisactive=%s WHERE prompt_id=%s')
+STATEMENTS.add('auto_prompt.delete', 'DELETE FROM llm_platform.auto_prompt WHERE prompt_id = %s')
+STATEMENTS.add('auto_prompt.notify', 'SELECT pg_notify(%s, %s)')
+STATEMENTS.add('table_versions.get', VERSIONS_SQL)
+
+passwords = PasswordHasher(cost=config.PASSWORD_HASH_COST, workers=config.PASSWORD_HASH_WORKERS)
+login_cache = LoginCache(
+    negative_ttl=config.LOGIN_NEGATIVE_TTL,
+    credential_ttl=config.LOGIN_CREDENTIAL_TTL,
+    max_entries=config.LOGIN_CACHE_MAX_ENTRIES
+)
+tokens = TokenService(
+    config.TOKEN_SECRET,
+    access_ttl=config.ACCESS_TOKEN_TTL,
+    refresh_ttl=config.REFRESH_TOKEN_TTL,
+    revocations=RevocationList(config.TOKEN_REVOCATION_REFRESH)
+)
+role_permissions = PermissionEngine(TABLES, ttl=config.PERMISSION_CACHE_TTL)
+
+def flush_last_logins(ids, times):
+    with get_pool().connection() as conn:
+        cur = conn.cursor()
+        STATEMENTS.execute(cur, 'users.last_login_flush', (ids, times))
+        conn.commit()
+        cur.close()
+
+# LAST_LOGIN_FLUSH_MS = 0 ise None (last_login giriş UPDATE'inde yazılır)
+last_logins = None
+if config.LAST_LOGIN_FLUSH_MS > 0:
+    last_logins = LastLoginBuffer(flush_last_logins, config.LAST_LOGIN_FLUSH_MS / 1000, config.LAST_LOGIN_FLUSH_MAX)
+    atexit.register(last_logins.close)
+# Token'sız da erişilebilen route'lar (endpoint adları)
+PUBLIC_ENDPOINTS = {'login', 'refresh_token', 'test', 'static', 'prometheus_metrics'}
+# Sunucuda iş çalıştıran / data_prep_code yazan route'lar AUTH_REQUIRED=0 iken de token ister
+TOKEN_REQUIRED_ENDPOINTS = {'run_data_prepare_module', 'bulk_data_prepare_modules'}
+
+def checked_prep_code(value):
+    # data_prep_code sadece kayıtlı bir hazırlık fonksiyonunun adı olabilir (prep_executor.py)
+    if value in (None, ''):
+        return value
+    try:
+        registered_function(value)
+    except PrepError as e:
+        raise BulkError(str(e))
+    return value.strip()
+
+def bulk_passwords(values):
+    # Her düz şifre scrypt ile ~60 ms sürer; büyük yüklemeler isteği dakikalarca tutmasın diye
+    # BULK_PLAINTEXT_PASSWORD_LIMIT üstünde önceden özetlenmiş şifre istenir
+    plaintext = sum(1 for value in values if value and not is_hashed(value))
+    if plaintext > config.BULK_PLAINTEXT_PASSWORD_LIMIT:
+        raise BulkError(f'{plaintext} düz şifre var; toplu yüklemede en fazla '
+                        f'{config.BULK_PLAINTEXT_PASSWORD_LIMIT} düz şifre özetlenir. Şifreleri '
+                        f'scrypt$n$r$p$tuz$özet biçiminde önceden özetleyip gönderin')
+    return passwords.for_storage_many(values)
+
+# Toplu yüklemede değer yazılmadan önce uygulanan dönüşümler
+BULK_TRANSFORMS = {'data_prepare_modules': {'data_prep_code': checked_prep_code}}
+# Tüm kolona tek seferde uygulananlar: şifreler PASSWORD_HASH_WORKERS iş parçacığında paralel özetlenir
+BULK_COLUMN_TRANSFORMS = {'users': {'password': bulk_passwords}}
+
+# İstek aşama süreleri (metrics.py); METRICS_ENABLED=0 ise None
+request_metrics = None
+profiles = metrics.ProfileStore(config.PROFILE_KEEP)
+if config.METRICS_ENABLED:
+    request_metrics = metrics.Metrics(config.SLOW_QUERY_MS, config.SLOW_REQUEST_MS)
+    metrics.install(request_metrics)
+
+JSONProvider = FastJSONProvider if config.JSON_PROVIDER == 'fast' else DefaultJSONProvider
+
+class TimedJSONProvider(JSONProvider):
+    def response(self, *args, **kwargs):
+        with metrics.timed('serialize'):
+            return super().response(*args, **kwargs)
+
+app.json = TimedJSONProvider(app) if request_metrics is not None else JSONProvider(app)
+app.json.datetime_format = config.JSON_DATETIME_FORMAT
+
+# Cevap sıkıştırma (compression.py); COMPRESSION boşsa kapalı
+compressor = None
+if config.COMPRESSION:
+    compressor = ResponseCompressor(config.COMPRESSION, config.COMPRESS_MIN_BYTES, config.COMPRESS_LEVELS)
+    app.after_request(compressor)
+
+# Tablo değişiklik sayaçlarından ETag/Last-Modified (table_versions.py)
+table_versions = TableVersions(config.TABLE_VERSIONS)
+# Aynı istek farklı JSON ayarlarıyla farklı gövde üretir; ETag'e katılır
+RESPONSE_FORMAT = f'{config.JSON_PROVIDER}:{config.JSON_DATETIME_FORMAT}:{config.LIST_JSON_SOURCE}'
+
+# Değişiklik akışı (changes.py); CHANGE_FEED=0 ise None
+change_feed = None
+if config.CHANGE_FEED:
+    change_feed = ChangeFeed(lambda: psycopg2.connect(**config.DB_CONFIG), config.CHANGE_FEED_BUFFER,
+                             gap_timeout=config.CHANGE_FEED_GAP_TIMEOUT, retention=config.CHANGE_LOG_RETENTION)
+
+def apply_changes(events):
+    # Diğer worker'ların (ve uygulama dışının) yazmaları süreç içi önbelleği ve derlenmiş rol
+    # izinlerini de günceller; paylaşımlı (redis) önbellek yazan worker tarafından zaten silinir
+    for event in events:
+        table, record_id = event['table'], event['id']
+        if table in CACHED_TABLES and config.CACHE_BACKEND == 'memory':
+            cache.invalidate(table, record_id, bulk=record_id is None)
+        if table == 'roles':
+            role_permissions.invalidate(record_id)
+
+if change_feed is not None:
+    change_feed.subscribe(apply_changes)
+
+def record_cursor(conn):
+    # Cevaba doğrudan yazılacak satırlar: hızlı sağlayıcıda JSONB kolonları çözülmeden geçer
+    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    return raw_jsonb(cur) if config.JSON_PROVIDER == 'fast' else cur
+
+def profiling_requested():
+    token = request.headers.get('X-Profile')
+    return bool(config.PROFILE_TOKEN and token and hmac.compare_digest(token, config.PROFILE_TOKEN))
+
+@app.before_request
+def start_request_timer():
+    # authorize'dan önce kaydedilir; yetki kontrolü de ölçüme girer
+    if request_metrics is None:
+        return None
+    timer = metrics.begin(request.url_rule.rule if request.url_rule else 'unmatched', request.method)
+    if profiling_requested() and request.endpoint not in ('list_profiles', 'get_profile'):
+        timer.profiler = metrics.SamplingProfiler(interval=config.PROFILE_INTERVAL_MS / 1000).start()
+    return None
+
+@app.after_request
+def record_response_status(response):
+    timer = metrics.current()
+    if timer is not None:
+        timer.status = response.status_code
+        if timer.profiler is not None:
+            profiler, timer.profiler = timer.profiler.stop(), None
+            response.headers['X-Profile-Id'] = profiles.add(timer.route, timer.method, profiler)
+    return response
+
+@app.before_request
+def start_change_feed():
+    # Dinleyici iş parçacığı ilk istekte başlar (fork'tan sonra, her worker'da bir bağlantı)
+    if change_feed is not None:
+        change_feed.start()
+
+@app.teardown_request
+def finish_request_timer(exc):
+    timer = metrics.current()
+    if timer is None:
+        return
+    if timer.profiler is not None:
+        timer.profiler.stop()
+    request_metrics.finish(timer, timer.status or 500)
+    metrics.end()
+
+def given_dates(data):
+    # create_date / change_date sadece doluysa yazılır (boşsa kolon varsayılanı kullanılır)
+    return {f: data.get(f) for f in DATE_FIELDS if data.get(f)}
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    config.DB_POOL_MIN,
+                    config.DB_POOL_MAX,
+                    timeout=config.DB_POOL_TIMEOUT,
+                    max_waiters=config.DB_POOL_MAX_WAITERS,
+                    check_after=config.DB_POOL_CHECK_AFTER,
+                    connection_factory=metrics.InstrumentedConnection if request_metrics else StatementConnection,
+                    **config.DB_CONFIG
+                )
+    return _pool
 
 def get_db_connection():
-    return psycopg2.connect(
-        host="localhost",
-        database="tablo_db",
-        user="postgres",
-        password="Betul1103"
+    # Havuzdan bağlantı al; conn.close() bağlantıyı havuza geri verir
+    with metrics.timed('connect'):
+        conn = get_pool().get()
+    g.setdefault('pooled_conns', []).append(conn)
+    return conn
+
+@app.teardown_request
+def release_db_connections(exc):
+    # Hata yüzünden kapatılmamış bağlantıları havuza geri ver
+    for conn in g.pop('pooled_conns', []):
+        if not conn.released:
+            conn.close()
+
+def load_revocations():
+    # Süresi geçen kayıtlar silinir, kalanlar bellekteki iptal listesine yüklenir
+    try:
+        with get_pool().connection() as conn:
+            cur = conn.cursor()
+            STATEMENTS.execute(cur, 'revoked_tokens.purge')
+            STATEMENTS.execute(cur, 'revoked_tokens.active')
+            rows = cur.fetchall()
+            conn.commit()
+            cur.close()
+    except Exception:
+        app.logger.exception('Token iptal listesi okunamadı')
+        return
+    tokens.revocations.replace(
+        {jti: expires for jti, _, _, expires in rows if jti},
+        {user_id: not_before for jti, user_id, not_before, _ in rows if not jti and user_id is not None}
     )
 
-# 1. Roles CRUD
-@app.route('/roles', methods=['GET'])
-def get_roles():
+def revoke_token(cur, claims):
+    tokens.revocations.revoke(claims['jti'], claims['exp'])
+    STATEMENTS.execute(cur, 'revoked_tokens.insert', (claims['jti'], claims['sub'], None, claims['exp']))
+
+def revoke_user_tokens(cur, user_id):
+    # Kullanıcının şimdiye kadar aldığı tüm token'lar (rol, şifre, durum değişince)
+    not_before = tokens.revocations.revoke_user(user_id)
+    STATEMENTS.execute(cur, 'revoked_tokens.insert', (None, user_id, not_before, not_before + config.REFRESH_TOKEN_TTL))
+
+def role_mask(role_id):
+    # Rolün derlenmiş izinleri; önbellekte yoksa rol okunup derlenir
+    mask = role_permissions.lookup(role_id)
+    if mask is not None:
+        return mask
+    role = None
+    if role_id is not None:
+        with get_pool().connection() as conn:
+            cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            STATEMENTS.execute(cur, 'roles.get', (role_id,))
+            role = cur.fetchone()
+            conn.commit()
+            cur.close()
+    return role_permissions.store(role_id, role)
+
+def request_tables():
+    if request.endpoint in ('lookup', 'change_stream'):
+        tables = [n.strip() for n in request.args.get('tables', '').split(',') if n.strip()]
+        # Tablo verilmeyen değişiklik akışı tüm tabloları okur
+        return tables or (list(TABLES) if request.endpoint == 'change_stream' else [])
+    segment = request.url_rule.rule.split('/')[1] if request.url_rule else ''
+    return [segment] if segment in TABLES else []
+
+@app.before_request
+def authorize():
+    # Bearer token süreç içinde doğrulanır; izinler rolün derlenmiş bit kümesinden okunur
+    if request.method == 'OPTIONS' or request.endpoint in PUBLIC_ENDPOINTS:
+        return None
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        g.claims = None
+        if config.AUTH_REQUIRED or request.endpoint in TOKEN_REQUIRED_ENDPOINTS:
+            return jsonify({'error': 'Yetkilendirme gerekli'}), 401
+        return None
+    if tokens.revocations.needs_refresh():
+        if tokens.revocations.loaded:
+            threading.Thread(target=load_revocations, daemon=True).start()
+        else:
+            load_revocations()
+    try:
+        claims = tokens.verify(header[7:])
+    except TokenError as e:
+        return jsonify({'error': str(e)}), 401
+    g.claims = claims
+    action = 'read' if request.method in ('GET', 'HEAD') else 'write'
+    tables = request_tables()
+    mask = role_mask(claims['role']) if tables else 0
+    for table in tables:
+        if not role_permissions.check(mask, table, action):
+            return jsonify({'error': f'{table} için {action} izni yok'}), 403
+    return None
+
+@app.errorhandler(PoolError)
+def handle_pool_error(e):
+    return jsonify({'error': f'Veritabanı meşgul: {e}'}), 503
+
+@app.route('/pool_stats', methods=['GET'])
+def pool_stats():
+    return jsonify(get_pool().stats())
+
+@app.route('/statement_stats', methods=['GET'])
+def statement_stats():
+    return jsonify(STATEMENTS.stats())
+
+def list_table(name):
+    # ?limit=&cursor=&fields=a,b&kolon=deger&kolon__gte=deger
+    # ?export=json|ndjson tüm sonucu sunucu tarafı cursor ile parça parça akıtır
+    export = request.args.get('export')
+    if export and export not in EXPORT_FORMATS:
+        return jsonify({'error': f'Geçersiz export formatı: {export}'}), 400
+    try:
+        query = build_list_query(name, request.args, paginate=not export)
+    except ListQueryError as e:
+        return jsonify({'error': str(e)}), 400
+    source = request.args.get('json', config.LIST_JSON_SOURCE)
+    if source not in ('python', 'db'):
+        return jsonify({'error': f'Geçersiz json kaynağı: {source}'}), 400
+    validator = table_validator(dependencies(name, request.args.get('expand')))
+    unchanged = not_modified(validator)
+    if unchanged is not None:
+        return unchanged
+    if export:
+        rows = iter_rows(get_pool(), query.query, query.params)
+        response = Response(
+            stream_with_context(export_stream(export, rows, app.json.dumps)),
+            mimetype=EXPORT_FORMATS[export]
+        )
+        if validator is not None:
+            apply_validator(response, validator)
+        return response
+
+    def load():
+        conn = get_db_connection()
+        if source == 'db':
+            # JSON Postgres'te üretilir; Python'da çözülmeden/kodlanmadan gönderilir
+            cur = conn.cursor()
+            cur.execute(*query.json_query())
+            body, last = cur.fetchone()
+            next_cursor = encode_cursor(last) if last is not None else None
+            cur.close()
+            conn.close()
+            return json_entry(body + '\n', next_cursor=next_cursor)
+        cur = record_cursor(conn)
+        cur.execute(query.query, query.params)
+        records, next_cursor = query.page(cur.fetchall())
+        cur.close()
+        conn.close()
+        return json_entry(jsonify(records).get_data(), next_cursor=next_cursor)
+
+    # expand başka tabloların verisini içerir; o tabloların değişikliği bu önbelleği silmez
+    if name in CACHED_TABLES and not request.args.get('expand'):
+        entry = cache.get_or_load(versioned_key(cache.list_key(name, request.query_string.decode()), validator), load)
+    else:
+        entry = load()
+    return cached_json_response(entry, validator)
+
+def get_record(name, record_id):
+    # ?expand=role gibi ilişkili kaydı iç içe ekler
+    expand = request.args.get('expand')
+    try:
+        query = build_get_query(name, expand=expand) if expand else None
+    except ListQueryError as e:
+        return jsonify({'error': str(e)}), 400
+    validator = table_validator(dependencies(name, expand))
+    unchanged = not_modified(validator)
+    if unchanged is not None:
+        return unchanged
+
+    def load():
+        conn = get_db_connection()
+        cur = record_cursor(conn)
+        if expand:
+            cur.execute(query, (record_id,))
+        else:
+            STATEMENTS.execute(cur, f'{name}.get', (record_id,))
+        record = cur.fetchone()
+        cur.close()
+        conn.close()
+        return json_entry(jsonify(record).get_data()) if record else None
+
+    if name in CACHED_TABLES and not expand:
+        entry = cache.get_or_load(versioned_key(cache.record_key(name, record_id), validator), load)
+    else:
+        entry = load()
+    if entry is None:
+        return jsonify({'error': 'Kayıt bulunamadı'}), 404
+    return cached_json_response(entry, validator)
+
+def read_table_versions(cur, params):
+    STATEMENTS.execute(cur, 'table_versions.get', params)
+
+def table_validator(tables):
+    # Tabloların değişiklik sayaçlarından ETag/Last-Modified; sayaçlar kapalıysa None.
+    # Veri sorgusundan önce çağrılmalı (bkz. table_versions.py)
+    if not table_versions.enabled:
+        return None
+    conn = get_db_connection()
+    try:
+        return table_versions.validator(conn, tables, f'{request.full_path}|{RESPONSE_FORMAT}', read_table_versions)
+    finally:
+        conn.close()
+
+def apply_validator(response, validator):
+    # Gövde kodlamaya (gzip/br/zstd) göre değişir; ETag zayıftır
+    response.set_etag(validator.etag, weak=True)
+    if validator.last_modified is not None:
+        response.last_modified = validator.last_modified
+
+def not_modified(validator):
+    # İstemcideki kopya tabloların şimdiki sürümüne aitse veri okunmadan gövdesiz 304 döner
+    if validator is None or is_resource_modified(request.environ, etag=f'W/"{validator.etag}"',
+                                                 last_modified=validator.last_modified):
+        return None
+    table_versions.record_not_modified()
+    response = Response(status=304, mimetype='application/json')
+    apply_validator(response, validator)
+    return response
+
+def versioned_key(key, validator):
+    # Sayaçlar başka worker'ların yazmalarını da gösterir; anahtarda taşınınca bu worker'ın eski girdisi okunmaz
+    return f'{key}:{validator.etag}' if validator is not None else key
+
+def cached_json_response(entry, validator=None):
+    # If-None-Match aynı ETag'i taşıyorsa gövde gönderilmeden 304 döner. Sayaç doğrulayıcısı
+    # yoksa ETag içerikten hesaplanır
+    response = Response(entry['body'], mimetype='application/json')
+    if validator is not None:
+        apply_validator(response, validator)
+    else:
+        response.set_etag(entry['etag'])
+    if entry.get('next_cursor'):
+        response.headers['X-Next-Cursor'] = entry['next_cursor']
+    # Sıkıştırılmış gövdeler girdide saklanır; önbellekteki girdi tekrar sıkıştırılmaz
+    response.compressed = entry.setdefault('compressed', {})
+    return response.make_conditional(request)
+
+@app.route('/lookup', methods=['GET'])
+def lookup():
+    # Birden fazla tabloyu tek istekte, tek bağlantı ve tek transaction içinde döner.
+    # ?tables=users,roles,assistants&mode=rows|labels
+    # rows modunda tablo başına alan/filtre: ?users.fields=id,name&users.status=aktif
+    names = list(dict.fromkeys(n.strip() for n in request.args.get('tables', '').split(',') if n.strip()))
+    mode = request.args.get('mode', 'rows')
+    if not names:
+        return jsonify({'error': 'tables parametresi gerekli'}), 400
+    if mode not in ('rows', 'labels'):
+        return jsonify({'error': f'Geçersiz mode: {mode}'}), 400
+    unknown = [n for n in names if n not in TABLES]
+    if unknown:
+        return jsonify({'error': f"Bilinmeyen tablo: {', '.join(unknown)}"}), 400
+    queries = {}
+    try:
+        for name in names:
+            if mode == 'labels':
+                queries[name] = (build_label_query(name), [])
+            else:
+                prefix = name + '.'
+                args = MultiDict([(k[len(prefix):], v) for k, v in request.args.items(multi=True) if k.startswith(prefix)])
+                query = build_list_query(name, args, paginate=False)
+                queries[name] = (query.query, query.params)
+    except ListQueryError as e:
+        return jsonify({'error': str(e)}), 400
+    tables = names if mode == 'labels' else [t for n in names for t in dependencies(n, request.args.get(f'{n}.expand'))]
+    validator = table_validator(tables)
+    unchanged = not_modified(validator)
+    if unchanged is not None:
+        return unchanged
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cur.execute('SELECT * FROM llm_platform.roles')
-    roles = cur.fetchall()
+    # Tüm listeler aynı anlık görüntüden okunur
+    cur.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY')
+    result = {}
+    for name, (query, params) in queries.items():
+        cur.execute(query, params)
+        rows = cur.fetchall()
+        result[name] = {str(r['id']): r['label'] for r in rows} if mode == 'labels' else rows
+    conn.commit()
+    cur.close()
+    conn.close()
+    return cached_json_response(json_entry(jsonify(result).get_data()), validator)
+
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    return jsonify(cache.stats())
+
+# Tampondan eski konumdan devam edenler için change_log'dan tek seferde okunan olay sayısı
+CHANGE_HISTORY_LIMIT = 1000
+
+def read_changes(after, tables):
+    # (olaylar, yeni konum); bellekteki tampon yetmezse change_log'dan okunur (ResumeError yukarı çıkar)
+    result = change_feed.since(after, tables)
+    if result is not None:
+        return result
+    upto = change_feed.last_seq
+    with get_pool().connection() as conn:
+        cur = conn.cursor()
+        rows = change_history(cur, after, upto, CHANGE_HISTORY_LIMIT)
+        cur.close()
+    # Parti dolduysa kalanı sonraki turda okunur
+    position = rows[-1]['seq'] if len(rows) == CHANGE_HISTORY_LIMIT else upto
+    return [e for e in rows if tables is None or e['table'] in tables], position
+
+def sse_changes(after, tables):
+    # id: satırı istemcinin Last-Event-ID'sini günceller; yeniden bağlanınca buradan devam edilir.
+    # Filtrelenen olaylar yüzünden konum son gönderilen olayın ötesindeyse tek başına id: gönderilir
+    deadline = time.monotonic() + config.CHANGE_STREAM_MAX_SECONDS
+    position = after
+    yield 'retry: 3000\n\n'
+    while True:
+        try:
+            events, new_position = read_changes(position, tables)
+        except ResumeError:
+            position = change_feed.last_seq
+            yield f'id: {position}\nevent: reset\ndata: {json.dumps({"seq": position})}\n\n'
+            continue
+        if events:
+            yield ''.join(f'id: {e["seq"]}\nevent: change\ndata: {json.dumps(e)}\n\n' for e in events)
+        if new_position != position and (not events or events[-1]['seq'] != new_position):
+            yield f'id: {new_position}\n\n'
+        position = new_position
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        if not change_feed.wait(position, min(config.CHANGE_STREAM_PING, remaining)):
+            yield ': ping\n\n'
+
+@app.route('/changes', methods=['GET'])
+def change_stream():
+    # Tablo değişiklik olayları (changes.py). ?after=<seq> (SSE'de Last-Event-ID başlığı) kaldığı
+    # yerden devam eder; verilmezse akış şimdiden başlar. ?tables=users,roles sadece bu tablolar.
+    # Varsayılan Server-Sent Events; ?stream=0 tek seferlik JSON döner ({'events', 'seq', 'reset'}),
+    # ?wait=<sn> ile yeni olay yoksa o kadar beklenir (long-poll).
+    # reset: istenen seq artık tutulmuyor; istemci tabloları baştan okumalı ve seq'ten devam etmeli
+    if change_feed is None or not change_feed.enabled:
+        return jsonify({'error': 'Değişiklik akışı kapalı'}), 503
+    tables = [n.strip() for n in request.args.get('tables', '').split(',') if n.strip()] or None
+    unknown = [n for n in tables or () if n not in TABLES]
+    if unknown:
+        return jsonify({'error': f"Bilinmeyen tablo: {', '.join(unknown)}"}), 400
+    try:
+        after = request.args.get('after', request.headers.get('Last-Event-ID'))
+        after = int(after) if after not in (None, '') else None
+        wait = min(float(request.args.get('wait', 0)), config.CHANGE_STREAM_MAX_SECONDS)
+    except ValueError:
+        return jsonify({'error': 'after tam sayı, wait sayı olmalı'}), 400
+    if change_feed.last_seq is None and not change_feed.wait(-1, 5):
+        return jsonify({'error': 'Değişiklik akışı hazır değil'}), 503
+    if after is None:
+        after = change_feed.last_seq
+    if request.args.get('stream') == '0':
+        try:
+            events, position = read_changes(after, tables)
+            if not events and wait > 0 and change_feed.wait(position, wait):
+                events, position = read_changes(position, tables)
+        except ResumeError:
+            return jsonify({'events': [], 'seq': change_feed.last_seq, 'reset': True})
+        return jsonify({'events': events, 'seq': position, 'reset': False})
+    return Response(sse_changes(after, tables), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/change_feed_stats', methods=['GET'])
+def change_feed_stats():
+    return jsonify(change_feed.stats() if change_feed is not None else {'enabled': False})
+
+@app.route('/compression_stats', methods=['GET'])
+def compression_stats():
+    return jsonify({
+        'compression': compressor.stats() if compressor is not None else None,
+        'table_versions': table_versions.stats(),
+    })
+
+def load_database_info(database_id):
+    with get_pool().connection() as conn:
+        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        STATEMENTS.execute(cur, 'database_info.row', (database_id,))
+        info = cur.fetchone()
+        cur.close()
+    return info
+
+# database_info kayıtlarındaki dış kaynaklara havuzlanmış bağlantılar
+connectors = ConnectorManager(
+    load_database_info,
+    maxconn=config.CONNECTOR_POOL_MAX,
+    timeout=config.DB_POOL_TIMEOUT,
+    check_after=config.DB_POOL_CHECK_AFTER,
+    idle_timeout=config.CONNECTOR_IDLE_TIMEOUT
+)
+
+@app.route('/connector_stats', methods=['GET'])
+def connector_stats():
+    return jsonify(connectors.stats())
+
+# Kaynakların şema özetleri; katalog sadece değişiklik işaretleri farklıysa tekrar okunur
+schema_cache = SchemaCache(connectors, config.SCHEMA_CACHE_DIR, max_age=config.SCHEMA_CACHE_MAX_AGE)
+
+@app.route('/schema_cache_stats', methods=['GET'])
+def schema_cache_stats():
+    return jsonify(schema_cache.stats())
+
+def bulk_load(name):
+    # Gövde JSON dizisi, NDJSON veya CSV olabilir; dosya 'file' alanıyla da yüklenebilir
+    # ?on_conflict=nothing|update&conflict_target=kolon  ?atomic=true: hata varsa hiçbir şey yazılmaz
+    upload = request.files.get('file')
+    if upload:
+        body, content_type, filename = upload.read(), upload.mimetype, upload.filename
+    else:
+        body, content_type, filename = request.get_data(), request.content_type, ''
+    atomic = request.args.get('atomic', '').lower() in ('1', 'true', 'yes')
+    try:
+        parsed = parse_payload(body, content_type, filename)
+        conn = get_db_connection()
+        cur = conn.cursor()
+        loader = BulkLoader(cur, name, request.args.get('on_conflict'), request.args.get('conflict_target'),
+                            transforms=BULK_TRANSFORMS.get(name),
+                            column_transforms=BULK_COLUMN_TRANSFORMS.get(name))
+    except BulkError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        report = loader.load(parsed)
+    except BulkError as e:
+        conn.rollback()
+        cur.close()
+        conn.close()
+        return jsonify({'error': str(e)}), 400
+    if name == 'auto_prompt' and report['loaded']:
+        notify_auto_prompt_changed(cur)
+    if atomic and report['failed']:
+        conn.rollback()
+        report.update({'status': 'rolled_back', 'loaded': 0})
+        cur.close()
+        conn.close()
+        return jsonify(report), 400
+    conn.commit()
     cur.close()
     conn.close()
-    return jsonify(roles)
+    if report['loaded']:
+        cache.invalidate(name, bulk=True)
+        if name == 'users':
+            login_cache.clear()
+        if name == 'roles':
+            role_permissions.invalidate()
+        if name == 'database_info':
+            connectors.invalidate()
+            schema_cache.invalidate()
+            get_prep_executor().invalidate()
+    return jsonify(report)
+
+# 1. Roles CRUD
+@app.route('/roles', methods=['GET'])
+def get_roles():
+    return list_table('roles')
 
 @app.route('/roles', methods=['POST'])
 def add_role():
@@ -39,8 +725,8 @@ def add_role():
     permissions = data.get('permissions')
     if isinstance(permissions, dict):
         permissions = json.dumps(permissions)
-    cur.execute(
-        'INSERT INTO llm_platform.roles (role_id, role_name, permissions, admin_or_not) VALUES (%s, %s, %s, %s)',
+    STATEMENTS.execute(
+        cur, 'roles.insert',
         (
             data.get('role_id'),
             data.get('role_name'),
@@ -51,16 +737,28 @@ def add_role():
     conn.commit()
     cur.close()
     conn.close()
+    cache.invalidate('roles')
+    role_permissions.invalidate(data.get('role_id'))
     return jsonify({'status': 'success'})
 
+@app.route('/roles/bulk', methods=['POST'])
+def bulk_roles():
+    return bulk_load('roles')
+
+@app.route('/roles/<int:role_id>', methods=['GET'])
+def get_role(role_id):
+    return get_record('roles', role_id)
+
 @app.route('/roles/<int:role_id>', methods=['DELETE'])
 def delete_role(role_id):
     conn = get_db_connection()
     cur = conn.cursor()
-    cur.execute('DELETE FROM llm_platform.roles WHERE role_id = %s', (role_id,))
+    STATEMENTS.execute(cur, 'roles.delete', (role_id,))
     conn.commit()
     cur.close()
     conn.close()
+    cache.invalidate('roles', role_id)
+    role_permissions.invalidate(role_id)
     return jsonify({'status': 'deleted'})
 
 @app.route('/roles/<int:role_id>', methods=['PUT'])
@@ -71,8 +769,8 @@ def update_role(role_id):
     permissions = data.get('permissions')
     if isinstance(permissions, dict):
         permissions = json.dumps(permissions)
-    cur.execute(
-        'UPDATE llm_platform.roles SET role_name=%s, permissions=%s, admin_or_not=%s WHERE role_id=%s',
+    STATEMENTS.execute(
+        cur, 'roles.update',
         (
             data.get('role_name'),
             permissions,
@@ -83,50 +781,46 @@ def update_role(role_id):
     conn.commit()
     cur.close()
     conn.close()
+    cache.invalidate('roles', role_id)
+    role_permissions.invalidate(role_id)
     return jsonify({'status': 'updated'})
 
 # 2. Users CRUD
 @app.route('/users', methods=['GET'])
 def get_users():
-    conn = get_db_connection()
-    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cur.execute('SELECT * FROM llm_platform.users')
-    users = cur.fetchall()
-    cur.close()
-    conn.close()
-    return jsonify(users)
+    return list_table('users')
 
 @app.route('/users', methods=['POST'])
 def add_user():
     data = request.get_json(force=True) or {}
     conn = get_db_connection()
     cur = conn.cursor()
-    fields = ['role_id', 'name', 'surname', 'password', 'e_mail', 'institution_working']
-    values = [data.get(f) for f in fields]
-    sql_fields = ', '.join(fields)
-    sql_placeholders = ', '.join(['%s'] * len(fields))
-    if data.get('create_date'):
-        sql_fields += ', create_date'
-        sql_placeholders += ', %s'
-        values.append(data.get('create_date'))
-    if data.get('change_date'):
-        sql_fields += ', change_date'
-        sql_placeholders += ', %s'
-        values.append(data.get('change_date'))
-    cur.execute(f'INSERT INTO llm_platform.users ({sql_fields}) VALUES ({sql_placeholders})', values)
+    values = [passwords.for_storage(data.get(f)) if f == 'password' else data.get(f) for f in USER_FIELDS]
+    STATEMENTS.execute(cur, 'users.insert', values, optional=given_dates(data))
     conn.commit()
     cur.close()
     conn.close()
+    login_cache.clear()
     return jsonify({'status': 'success'})
 
+@app.route('/users/bulk', methods=['POST'])
+def bulk_users():
+    return bulk_load('users')
+
+@app.route('/users/<int:user_id>', methods=['GET'])
+def get_user(user_id):
+    return get_record('users', user_id)
+
 @app.route('/users/<int:user_id>', methods=['DELETE'])
 def delete_user(user_id):
     conn = get_db_connection()
     cur = conn.cursor()
-    cur.execute('DELETE FROM llm_platform.users WHERE id = %s', (user_id,))
+    STATEMENTS.execute(cur, 'users.delete', (user_id,))
+    revoke_user_tokens(cur, user_id)
     conn.commit()
     cur.close()
     conn.close()
+    login_cache.clear()
     return jsonify({'status': 'deleted'})
 
 @app.route('/users/<int:user_id>', methods=['PUT'])
@@ -134,13 +828,13 @@ def update_user(user_id):
     data = request.get_json(force=True) or {}
     conn = get_db_connection()
     cur = conn.cursor()
-    cur.execute(
-        'UPDATE llm_platform.users SET role_id=%s, name=%s, surname=%s, password=%s, e_mail=%s, institution_working=%s, status=%s, change_date=%s, last_login=%s WHERE id=%s',
+    STATEMENTS.execute(
+        cur, 'users.update',
         (
             data.get('role_id'),
             data.get('name'),
             data.get('surname'),
-            data.get('password'),
+            passwords.for_storage(data.get('password')) or None,
             data.get('e_mail'),
             data.get('institution_working'),
             data.get('status'),
@@ -149,53 +843,50 @@ def update_user(user_id):
             user_id
         )
     )
+    row = cur.fetchone()
+    if row and row[0]:
+        revoke_user_tokens(cur, user_id)
     conn.commit()
     cur.close()
     conn.close()
+    login_cache.clear()
     return jsonify({'status': 'updated'})
 
 # 3. database_info CRUD
 @app.route('/database_info', methods=['GET'])
 def get_database_info():
-    conn = get_db_connection()
-    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cur.execute('SELECT * FROM llm_platform.database_info')
-    records = cur.fetchall()
-    cur.close()
-    conn.close()
-    return jsonify(records)
+    return list_table('database_info')
 
 @app.route('/database_info', methods=['POST'])
 def add_database_info():
     data = request.get_json(force=True) or {}
     conn = get_db_connection()
     cur = conn.cursor()
-    fields = ['database_ip', 'database_port', 'database_user', 'database_password', 'database_type', 'database_name', 'user_id']
-    values = [data.get(f) for f in fields]
-    sql_fields = ', '.join(fields)
-    sql_placeholders = ', '.join(['%s'] * len(fields))
-    if data.get('create_date'):
-        sql_fields += ', create_date'
-        sql_placeholders += ', %s'
-        values.append(data.get('create_date'))
-    if data.get('change_date'):
-        sql_fields += ', change_date'
-        sql_placeholders += ', %s'
-        values.append(data.get('change_date'))
-    cur.execute(f'INSERT INTO llm_platform.database_info ({sql_fields}) VALUES ({sql_placeholders})', values)
+    STATEMENTS.execute(cur, 'database_info.insert', [data.get(f) for f in DATABASE_INFO_FIELDS], optional=given_dates(data))
     conn.commit()
     cur.close()
     conn.close()
     return jsonify({'status': 'success'})
 
+@app.route('/database_info/bulk', methods=['POST'])
+def bulk_database_info():
+    return bulk_load('database_info')
+
+@app.route('/database_info/<int:database_id>', methods=['GET'])
+def get_database_info_record(database_id):
+    return get_record('database_info', database_id)
+
 @app.route('/database_info/<int:database_id>', methods=['DELETE'])
 def delete_database_info(database_id):
     conn = get_db_connection()
     cur = conn.cursor()
-    cur.execute('DELETE FROM llm_platform.database_info WHERE database_id = %s', (database_id,))
+    STATEMENTS.execute(cur, 'database_info.delete', (database_id,))
     conn.commit()
     cur.close()
     conn.close()
+    connectors.invalidate(database_id)
+    schema_cache.invalidate(database_id)
+    get_prep_executor().invalidate(database_id=database_id)
     return jsonify({'status': 'deleted'})
 
 @app.route('/database_info/<int:database_id>', methods=['PUT'])
@@ -203,8 +894,8 @@ def update_database_info(database_id):
     data = request.get_json(force=True) or {}
     conn = get_db_connection()
     cur = conn.cursor()
-    cur.execute(
-        'UPDATE llm_platform.database_info SET database_ip=%s, database_port=%s, database_user=%s, database_password=%s, database_type=%s, database_name=%s, user_id=%s WHERE database_id=%s',
+    STATEMENTS.execute(
+        cur, 'database_info.update',
         (
             data.get('database_ip'),
             data.get('database_port'),
@@ -219,18 +910,29 @@ def update_database_info(database_id):
     conn.commit()
     cur.close()
     conn.close()
+    # Bağlantı bilgileri değişmiş olabilir; havuz ve şema özeti bir sonraki kullanımda yeniden kurulur,
+    # eski kaynaktan okunmuş sorgu sonuçları ve prep çıktıları silinir
+    connectors.invalidate(database_id)
+    schema_cache.invalidate(database_id)
+    get_prep_executor().invalidate(database_id=database_id)
     return jsonify({'status': 'updated'})
 
+@app.route('/database_info/<int:database_id>/schema', methods=['GET'])
+def get_database_schema(database_id):
+    # ?refresh=true değişiklik işaretlerini hemen kontrol eder; ?format=text prompt'a konan metni döner
+    refresh = request.args.get('refresh', '').lower() in ('1', 'true', 'yes')
+    try:
+        snapshot = schema_cache.get(database_id, refresh=refresh)
+    except ConnectorError as e:
+        return jsonify({'error': str(e)}), 400
+    if request.args.get('format') == 'text':
+        return Response(render_schema(snapshot), mimetype='text/plain')
+    return jsonify(snapshot)
+
 # 4. data_prepare_modules CRUD
 @app.route('/data_prepare_modules', methods=['GET'])
 def get_data_prepare_modules():
-    conn = get_db_connection()
-    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cur.execute('SELECT * FROM llm_platform.data_prepare_modules')
-    records = cur.fetchall()
-    cur.close()
-    conn.close()
-    return jsonify(records)
+    return list_table('data_prepare_modules')
 
 @app.route('/data_prepare_modules', methods=['POST'])
 def add_data_prepare_module():
@@ -241,32 +943,118 @@ def add_data_prepare_module():
     trigger_time = data.get('trigger_time')
     if isinstance(trigger_time, dict):
         trigger_time = json.dumps(trigger_time)
-    fields = ['module_name', 'description', 'user_id']
-    values = [data.get(f) for f in fields]
-    sql_fields = ', '.join(fields)
-    sql_placeholders = ', '.join(['%s'] * len(fields))
-    if data.get('create_date'):
-        sql_fields += ', create_date'
-        sql_placeholders += ', %s'
-        values.append(data.get('create_date'))
-    if data.get('change_date'):
-        sql_fields += ', change_date'
-        sql_placeholders += ', %s'
-        values.append(data.get('change_date'))
-    cur.execute(f'INSERT INTO llm_platform.data_prepare_modules ({sql_fields}) VALUES ({sql_placeholders})', values)
+    optional = given_dates(data)
+    if 'query_cache_ttl' in data:
+        optional['query_cache_ttl'] = data.get('query_cache_ttl')
+    STATEMENTS.execute(cur, 'data_prepare_modules.insert', [data.get(f) for f in MODULE_FIELDS], optional=optional)
     conn.commit()
     cur.close()
     conn.close()
     return jsonify({'status': 'success'})
 
+@app.route('/data_prepare_modules/bulk', methods=['POST'])
+def bulk_data_prepare_modules():
+    return bulk_load('data_prepare_modules')
+
+@app.route('/data_prepare_modules/<int:module_id>', methods=['GET'])
+def get_data_prepare_module(module_id):
+    return get_record('data_prepare_modules', module_id)
+
+_prep_executor = None
+
+# data_prepare_modules.query sonuçları; modülün query_cache_ttl alanı (saniye) yoksa QUERY_CACHE_TTL
+query_cache = QueryResultCache(
+    config.QUERY_CACHE_DIR,
+    max_bytes=config.QUERY_CACHE_MAX_MB * 1024 * 1024,
+    default_ttl=config.QUERY_CACHE_TTL
+)
+
+@app.route('/query_cache_stats', methods=['GET'])
+def query_cache_stats():
+    return jsonify(query_cache.stats())
+
+def get_prep_executor():
+    global _prep_executor
+    if _prep_executor is None:
+        _prep_executor = PrepExecutor(
+            config.PREP_CACHE_DIR,
+            workers=config.PREP_WORKERS,
+            chunk_rows=config.PREP_CHUNK_ROWS,
+            memory_mb=config.PREP_MEMORY_MB,
+            cpu_seconds=config.PREP_CPU_SECONDS,
+            task_timeout=config.PREP_TASK_TIMEOUT,
+            connect=lambda source: connectors.get(source['database_id'], info=source),
+            result_cache=query_cache
+        )
+    return _prep_executor
+
+@app.route('/data_prepare_modules/<int:module_id>/run', methods=['POST'])
+def run_data_prepare_module(module_id):
+    # Modülün query'sini kaynağında çalıştırıp data_prep_code ile işler; ?force=true önbelleği atlar
+    force = request.args.get('force', '').lower() in ('1', 'true', 'yes')
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    STATEMENTS.execute(cur, 'data_prepare_modules.row', (module_id,))
+    module = cur.fetchone()
+    if not module:
+        cur.close()
+        conn.close()
+        return jsonify({'error': 'Modül bulunamadı'}), 404
+    source_id = module.get('database_id') or module.get('csv_database_id')
+    STATEMENTS.execute(cur, 'database_info.row', (source_id,))
+    source = cur.fetchone()
+    cur.close()
+    conn.close()
+    if not source:
+        return jsonify({'error': 'Modülün veritabanı kaydı bulunamadı'}), 400
+    try:
+        result = get_prep_executor().run_module(module, source, force=force)
+    except (PrepError, ConnectorError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(result)
+
+@app.route('/data_prepare_modules/<int:module_id>/schema', methods=['POST'])
+def fill_data_prepare_module_schema(module_id):
+    # db_schema ve csv_db_schema alanlarını database_id / csv_database_id kaynaklarının özetiyle doldurur
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    STATEMENTS.execute(cur, 'data_prepare_modules.row', (module_id,))
+    module = cur.fetchone()
+    if not module:
+        cur.close()
+        conn.close()
+        return jsonify({'error': 'Modül bulunamadı'}), 404
+    result = {}
+    try:
+        for field, source_field in (('db_schema', 'database_id'), ('csv_db_schema', 'csv_database_id')):
+            if module.get(source_field):
+                snapshot = schema_cache.get(module[source_field])
+                result[field] = render_schema(snapshot)
+                result[f'{field}_version'] = snapshot['version']
+    except ConnectorError as e:
+        cur.close()
+        conn.close()
+        return jsonify({'error': str(e)}), 400
+    if 'db_schema' in result or 'csv_db_schema' in result:
+        fields = [f for f in ('db_schema', 'csv_db_schema') if f in result]
+        cur.execute(
+            f"UPDATE llm_platform.data_prepare_modules SET {', '.join(f + '=%s' for f in fields)} WHERE module_id=%s",
+            [result[f] for f in fields] + [module_id]
+        )
+        conn.commit()
+    cur.close()
+    conn.close()
+    return jsonify(result)
+
 @app.route('/data_prepare_modules/<int:module_id>', methods=['DELETE'])
 def delete_data_prepare_module(module_id):
     conn = get_db_connection()
     cur = conn.cursor()
-    cur.execute('DELETE FROM llm_platform.data_prepare_modules WHERE module_id = %s', (module_id,))
+    STATEMENTS.execute(cur, 'data_prepare_modules.delete', (module_id,))
     conn.commit()
     cur.close()
     conn.close()
+    get_prep_executor().invalidate(module_id)
     return jsonify({'status': 'deleted'})
 
 @app.route('/data_prepare_modules/<int:module_id>', methods=['PUT'])
@@ -274,32 +1062,22 @@ def update_data_prepare_module(module_id):
     data = request.get_json(force=True) or {}
     conn = get_db_connection()
     cur = conn.cursor()
-    cur.execute(
-        'UPDATE llm_platform.data_prepare_modules SET module_name=%s, description=%s, user_id=%s, create_date=%s, change_date=%s WHERE module_id=%s',
-        (
-            data.get('module_name'),
-            data.get('description'),
-            data.get('user_id'),
-            data.get('create_date'),
-            data.get('change_date'),
-            module_id
-        )
+    optional = {'query_cache_ttl': data.get('query_cache_ttl')} if 'query_cache_ttl' in data else None
+    STATEMENTS.execute(
+        cur, 'data_prepare_modules.update',
+        [data.get(f) for f in MODULE_FIELDS + DATE_FIELDS] + [module_id],
+        optional=optional
     )
     conn.commit()
     cur.close()
     conn.close()
+    get_prep_executor().invalidate(module_id)
     return jsonify({'status': 'updated'})
 
 # 5. assistants CRUD
 @app.route('/assistants', methods=['GET'])
 def get_assistants():
-    conn = get_db_connection()
-    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cur.execute('SELECT * FROM llm_platform.assistants')
-    records = cur.fetchall()
-    cur.close()
-    conn.close()
-    return jsonify(records)
+    return list_table('assistants')
 
 @app.route('/assistants', methods=['POST'])
 def add_assistant():
@@ -313,7 +1091,6 @@ def add_assistant():
     trigger_time = data.get('trigger_time')
     if isinstance(trigger_time, dict):
         trigger_time = json.dumps(trigger_time)
-    fields = ['title', 'explanation', 'parameters', 'user_id', 'working_place', 'default_instructions', 'data_instructions', 'file_path', 'trigger_time']
     values = [
         data.get('title'),
         data.get('explanation'),
@@ -325,30 +1102,30 @@ def add_assistant():
         data.get('file_path'),
         trigger_time
     ]
-    sql_fields = ', '.join(fields)
-    sql_placeholders = ', '.join(['%s'] * len(fields))
-    if data.get('create_date'):
-        sql_fields += ', create_date'
-        sql_placeholders += ', %s'
-        values.append(data.get('create_date'))
-    if data.get('change_date'):
-        sql_fields += ', change_date'
-        sql_placeholders += ', %s'
-        values.append(data.get('change_date'))
-    cur.execute(f'INSERT INTO llm_platform.assistants ({sql_fields}) VALUES ({sql_placeholders})', values)
+    STATEMENTS.execute(cur, 'assistants.insert', values, optional=given_dates(data))
     conn.commit()
     cur.close()
     conn.close()
+    cache.invalidate('assistants')
     return jsonify({'status': 'success'})
 
+@app.route('/assistants/bulk', methods=['POST'])
+def bulk_assistants():
+    return bulk_load('assistants')
+
+@app.route('/assistants/<int:asistan_id>', methods=['GET'])
+def get_assistant(asistan_id):
+    return get_record('assistants', asistan_id)
+
 @app.route('/assistants/<int:asistan_id>', methods=['DELETE'])
 def delete_assistant(asistan_id):
     conn = get_db_connection()
     cur = conn.cursor()
-    cur.execute('DELETE FROM llm_platform.assistants WHERE asistan_id = %s', (asistan_id,))
+    STATEMENTS.execute(cur, 'assistants.delete', (asistan_id,))
     conn.commit()
     cur.close()
     conn.close()
+    cache.invalidate('assistants', asistan_id)
     return jsonify({'status': 'deleted'})
 
 @app.route('/assistants/<int:asistan_id>', methods=['PUT'])
@@ -362,8 +1139,8 @@ def update_assistant(asistan_id):
         parameters = json.dumps(parameters)
     if isinstance(trigger_time, dict):
         trigger_time = json.dumps(trigger_time)
-    cur.execute(
-        'UPDATE llm_platform.assistants SET title=%s, explanation=%s, parameters=%s, user_id=%s, create_date=%s, change_date=%s, working_place=%s, default_instructions=%s, data_instructions=%s, file_path=%s, trigger_time=%s WHERE asistan_id=%s',
+    STATEMENTS.execute(
+        cur, 'assistants.update',
         (
             data.get('title'),
             data.get('explanation'),
@@ -382,25 +1159,24 @@ def update_assistant(asistan_id):
     conn.commit()
     cur.close()
     conn.close()
+    cache.invalidate('assistants', asistan_id)
     return jsonify({'status': 'updated'})
 
 # 6. auto_prompt CRUD
 @app.route('/auto_prompt', methods=['GET'])
 def get_auto_prompt():
-    conn = get_db_connection()
-    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cur.execute('''
-        SELECT ap.*, a.title as assistant_title
-        FROM llm_platform.auto_prompt ap
-        LEFT JOIN llm_platform.assistants a ON ap.asistan_id = a.asistan_id
-    ''')
-    records = cur.fetchall()
-    for rec in records:
-        if 'asistan_id' in rec:
-            rec['assistant_title'] = rec.pop('assistant_title')
-    cur.close()
-    conn.close()
-    return jsonify(records)
+    # assistant_title, assistants tablosuyla join edilerek gelir (bkz. listing.TABLES)
+    return list_table('auto_prompt')
+
+def notify_auto_prompt_changed(cur, prompt_id='*'):
+    # Zamanlayıcı (scheduler.py) bu kanalı dinler ve sadece değişen kaydı yeniden okur.
+    # Bildirim transaction commit edilince gönderilir.
+    STATEMENTS.execute(cur, 'auto_prompt.notify', (NOTIFY_CHANNEL, str(prompt_id)))
+
+def find_assistant_id(cur, title):
+    STATEMENTS.execute(cur, 'assistants.id_by_title', (title,))
+    row = cur.fetchone()
+    return row[0] if row else None
 
 @app.route('/auto_prompt', methods=['POST'])
 def add_auto_prompt():
@@ -415,15 +1191,16 @@ def add_auto_prompt():
         cur.close()
         conn.close()
         return jsonify({'error': 'assistant_title gerekli'}), 400
-    cur.execute('SELECT asistan_id FROM llm_platform.assistants WHERE title = %s', (assistant_title,))
-    row = cur.fetchone()
-    if not row:
+    asistan_id = cache.get_or_load(
+        cache.lookup_key('assistants', 'title', assistant_title),
+        lambda: find_assistant_id(cur, assistant_title)
+    )
+    if asistan_id is None:
         cur.close()
         conn.close()
         return jsonify({'error': 'assistant_title bulunamadı'}), 400
-    asistan_id = row[0]
-    cur.execute(
-        'INSERT INTO llm_platform.auto_prompt (asistan_id, question, trigger_time, option_code, mcrisactive, receiver_emails) VALUES (%s, %s, %s, %s, %s, %s)',
+    STATEMENTS.execute(
+        cur, 'auto_prompt.insert',
         (
             asistan_id,
             data.get('question'),
@@ -433,16 +1210,26 @@ def add_auto_prompt():
             data.get('receiver_emails')
         )
     )
+    notify_auto_prompt_changed(cur, cur.fetchone()[0])
     conn.commit()
     cur.close()
     conn.close()
     return jsonify({'status': 'success'})
 
+@app.route('/auto_prompt/bulk', methods=['POST'])
+def bulk_auto_prompt():
+    return bulk_load('auto_prompt')
+
+@app.route('/auto_prompt/<int:prompt_id>', methods=['GET'])
+def get_auto_prompt_record(prompt_id):
+    return get_record('auto_prompt', prompt_id)
+
 @app.route('/auto_prompt/<int:prompt_id>', methods=['DELETE'])
 def delete_auto_prompt(prompt_id):
     conn = get_db_connection()
     cur = conn.cursor()
-    cur.execute('DELETE FROM llm_platform.auto_prompt WHERE prompt_id = %s', (prompt_id,))
+    STATEMENTS.execute(cur, 'auto_prompt.delete', (prompt_id,))
+    notify_auto_prompt_changed(cur, prompt_id)
     conn.commit()
     cur.close()
     conn.close()
@@ -456,8 +1243,8 @@ def update_auto_prompt(prompt_id):
     trigger_time = data.get('trigger_time')
     if isinstance(trigger_time, dict):
         trigger_time = json.dumps(trigger_time)
-    cur.execute(
-        'UPDATE llm_platform.auto_prompt SET prompt_text=%s, assistants_id=%s, trigger_time=%s, mcrisactive=%s WHERE prompt_id=%s',
+    STATEMENTS.execute(
+        cur, 'auto_prompt.update',
         (
             data.get('prompt_text'),
             data.get('assistants_id'),
@@ -466,11 +1253,52 @@ def update_auto_prompt(prompt_id):
             prompt_id
         )
     )
+    notify_auto_prompt_changed(cur, prompt_id)
     conn.commit()
     cur.close()
     conn.close()
     return jsonify({'status': 'updated'})
 
+def authenticate(cur, email, password):
+    # Önbellekte özet varsa tek UPDATE ... RETURNING; yoksa veya eskimişse önce özet okunur
+    credentials = login_cache.credentials(email)
+    from_cache = credentials is not None
+    failed_hash = None
+    while True:
+        if credentials is None:
+            STATEMENTS.execute(cur, 'users.credentials', (email,))
+            row = cur.fetchone()
+            if row is None:
+                login_cache.reject(email)
+                return None
+            credentials = (row['id'], row['password'])
+            login_cache.remember(email, *credentials)
+            if credentials[1] == failed_hash:
+                # Önbellekteki özet günceldi; şifre gerçekten yanlış (tekrar özetlenmez)
+                login_cache.reject(email, password)
+                return None
+        user_id, stored = credentials
+        if passwords.verify(password, stored):
+            new_hash = passwords.hash(password) if passwords.needs_rehash(stored) else stored
+            if last_logins is None:
+                STATEMENTS.execute(cur, 'users.login', (new_hash, user_id, stored))
+            elif new_hash == stored:
+                STATEMENTS.execute(cur, 'users.login_row', (user_id, stored))
+            else:
+                STATEMENTS.execute(cur, 'users.rehash', (new_hash, user_id, stored))
+            user = cur.fetchone()
+            if user is not None:
+                login_cache.remember(email, user_id, new_hash)
+                return user
+        else:
+            if not from_cache:
+                login_cache.reject(email, password)
+                return None
+            failed_hash = stored
+        # Şifre başka bir süreçte/istekte değişmiş olabilir; kayıt yeniden okunur
+        login_cache.forget(email)
+        credentials, from_cache = None, False
+
 @app.route('/login', methods=['POST'])
 def login():
     data = request.get_json(force=True) or {}
@@ -478,23 +1306,109 @@ def login():
     password = data.get('password')
     if not email or not password:
         return jsonify({'error': 'E-posta ve şifre gerekli'}), 400
+    if login_cache.is_rejected(email, password):
+        return jsonify({'error': 'Geçersiz e-posta veya şifre'}), 401
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    user = authenticate(cur, email, password)
+    conn.commit()
+    cur.close()
+    conn.close()
+    if user is None:
+        return jsonify({'error': 'Geçersiz e-posta veya şifre'}), 401
+    user.pop('password', None)
+    if last_logins is not None:
+        # Yanıttaki last_login, tampona yazılan (kısa süre sonra veritabanına geçecek) zamandır
+        last_logins.start()
+        user['last_login'] = last_logins.record(user['id'])
+    role_permissions.store(user['role_id'], user.get('role'))
+    user.update(tokens.issue(user))
+    return jsonify(user)
+
+@app.route('/token/refresh', methods=['POST'])
+def refresh_token():
+    # Rol id'si kullanıcıdan yeniden okunur; kullanılan refresh token iptal edilip yenisi verilir
+    data = request.get_json(force=True, silent=True) or {}
+    try:
+        claims = tokens.verify(data.get('refresh_token') or '', kind='refresh')
+    except TokenError as e:
+        return jsonify({'error': str(e)}), 401
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    cur.execute('SELECT * FROM llm_platform.users WHERE e_mail = %s AND password = %s', (email, password))
+    STATEMENTS.execute(cur, 'users.token_subject', (claims['sub'],))
     user = cur.fetchone()
-    if user:
-        cur.execute('UPDATE llm_platform.users SET last_login = CURRENT_TIMESTAMP WHERE id = %s', (user['id'],))
-        conn.commit()
-        # Kullanıcıyı tekrar çek, güncel last_login ile
-        cur.execute('SELECT * FROM llm_platform.users WHERE id = %s', (user['id'],))
-        user = cur.fetchone()
+    if user is None:
         cur.close()
         conn.close()
-        return jsonify(user)
-    else:
+        return jsonify({'error': 'Kullanıcı bulunamadı'}), 401
+    revoke_token(cur, claims)
+    conn.commit()
+    cur.close()
+    conn.close()
+    role_permissions.store(user['role_id'], user['role'])
+    return jsonify(tokens.issue(user))
+
+@app.route('/logout', methods=['POST'])
+def logout():
+    # Erişim token'ı ve (gönderildiyse) refresh token iptal edilir
+    data = request.get_json(force=True, silent=True) or {}
+    revoked = [g.claims] if g.get('claims') else []
+    try:
+        if data.get('refresh_token'):
+            revoked.append(tokens.verify(data['refresh_token'], kind='refresh'))
+    except TokenError:
+        pass
+    if revoked:
+        conn = get_db_connection()
+        cur = conn.cursor()
+        for claims in revoked:
+            revoke_token(cur, claims)
+        conn.commit()
         cur.close()
         conn.close()
-        return jsonify({'error': 'Geçersiz e-posta veya şifre'}), 401
+    return jsonify({'status': 'logged_out', 'revoked': len(revoked)})
+
+@app.route('/token_stats', methods=['GET'])
+def token_stats():
+    return jsonify(tokens.stats())
+
+@app.route('/permission_stats', methods=['GET'])
+def permission_stats():
+    return jsonify(role_permissions.stats())
+
+@app.route('/last_login_stats', methods=['GET'])
+def last_login_stats():
+    return jsonify(last_logins.stats() if last_logins is not None else {'enabled': False})
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    if request_metrics is None:
+        return jsonify({'error': 'Ölçüm kapalı (METRICS_ENABLED=0)'}), 404
+    gauges = {}
+    if _pool is not None:
+        stats = _pool.stats()
+        gauges = {f'db_pool_{k}': stats[k] for k in ('size', 'in_use', 'idle', 'waiting')}
+    return Response(request_metrics.render(gauges), mimetype='text/plain; version=0.0.4')
+
+@app.route('/profiles', methods=['GET'])
+def list_profiles():
+    # X-Profile başlığıyla profillenmiş son istekler; okumak için de aynı başlık gerekir
+    if not profiling_requested():
+        return jsonify({'error': 'Geçersiz X-Profile'}), 403
+    return jsonify(profiles.list())
+
+@app.route('/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    if not profiling_requested():
+        return jsonify({'error': 'Geçersiz X-Profile'}), 403
+    profile = profiles.get(profile_id)
+    if profile is None:
+        return jsonify({'error': 'Profil bulunamadı'}), 404
+    return Response(profile['folded'], mimetype='text/plain')
+
+@app.route('/login_stats', methods=['GET'])
+def login_stats():
+    return jsonify(login_cache.stats())
 
 @app.route('/test')
 def test():
@@ -0,0 +1,943 @@
+# app.py ile aynı route'ları ve JSON cevaplarını asyncpg üzerinden sunan ASGI girişi.
+# Çalıştırma: uvicorn asgi_app:app --workers 4
+import asyncio
+import json
+import logging
+import re
+from contextlib import asynccontextmanager
+from datetime import datetime
+from decimal import Decimal
+
+import asyncpg
+import psycopg2
+from psycopg2 import sql
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import Response, PlainTextResponse, StreamingResponse
+from starlette.requests import Request
+from starlette.routing import Route
+from werkzeug.http import parse_date
+
+import config
+from auth import PasswordHasher, LoginCache
+from tokens import TokenService, RevocationList, TokenError
+from permissions import PermissionEngine
+from last_login import LastLoginBuffer
+from cache import create_cache, json_entry
+from json_provider import encode
+from listing import TABLES, COLUMN_TYPES, build_list_query, build_get_query, encode_cursor, ListQueryError
+from streaming import aiter_batches, aexport_stream, EXPORT_FORMATS
+from changes import ChangeFeed, ResumeError, FIRST_SQL, HISTORY_SQL, to_event
+
+CACHED_TABLES = {'roles', 'assistants'}
+cache = create_cache(config.CACHE_BACKEND, config.CACHE_TTL, config.CACHE_MAX_ENTRIES, config.CACHE_REDIS_URL)
+
+pool = None
+last_logins = None
+last_login_task = None
+change_feed = None
+change_signal = None  # yeni olayda set edilip yenisiyle değiştirilen asyncio.Event
+
+passwords = PasswordHasher(cost=config.PASSWORD_HASH_COST, workers=config.PASSWORD_HASH_WORKERS)
+login_cache = LoginCache(
+    negative_ttl=config.LOGIN_NEGATIVE_TTL,
+    credential_ttl=config.LOGIN_CREDENTIAL_TTL,
+    max_entries=config.LOGIN_CACHE_MAX_ENTRIES,
+)
+tokens = TokenService(
+    config.TOKEN_SECRET,
+    access_ttl=config.ACCESS_TOKEN_TTL,
+    refresh_ttl=config.REFRESH_TOKEN_TTL,
+    revocations=RevocationList(config.TOKEN_REVOCATION_REFRESH),
+)
+role_permissions = PermissionEngine(TABLES, ttl=config.PERMISSION_CACHE_TTL)
+PUBLIC_PATHS = {'/login', '/token/refresh', '/test'}
+logger = logging.getLogger(__name__)
+
+
+class BadRequest(Exception):
+    pass
+
+
+async def init_connection(conn):
+    # psycopg2 gibi JSON/JSONB kolonlarını Python nesnesine çevir
+    for name in ('json', 'jsonb'):
+        await conn.set_type_codec(name, encoder=json.dumps, decoder=json.loads, schema='pg_catalog')
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await startup()
+    yield
+    await shutdown()
+
+
+async def startup():
+    global pool
+    pool = await asyncpg.create_pool(
+        host=config.DB_CONFIG['host'],
+        port=config.DB_CONFIG['port'],
+        database=config.DB_CONFIG['database'],
+        user=config.DB_CONFIG['user'],
+        password=config.DB_CONFIG['password'],
+        min_size=config.DB_POOL_MIN,
+        max_size=config.DB_POOL_MAX,
+        init=init_connection,
+    )
+    if config.LAST_LOGIN_FLUSH_MS > 0:
+        start_last_login_buffer()
+    if config.CHANGE_FEED:
+        start_change_feed()
+
+
+async def shutdown():
+    if last_login_task is not None:
+        last_login_task.cancel()
+        await last_logins.aflush()
+    if change_feed is not None:
+        await asyncio.to_thread(change_feed.stop)
+    if pool is not None:
+        await pool.close()
+
+
+# --- JSON: app.py ile aynı çıktı (json_provider.encode) ---
+
+def dumps(obj):
+    return encode(obj, datetime_format=config.JSON_DATETIME_FORMAT).decode()
+
+
+def jsonify(obj, status=200):
+    body = encode(obj, datetime_format=config.JSON_DATETIME_FORMAT) + b'\n'
+    return Response(body, status_code=status, media_type='application/json')
+
+
+async def get_json(request):
+    # Flask'taki request.get_json(force=True) or {} karşılığı
+    body = await request.body()
+    if not body:
+        return {}
+    try:
+        return json.loads(body) or {}
+    except ValueError:
+        raise BadRequest('Geçersiz JSON')
+
+
+# --- psycopg2 tarzı sorguyu asyncpg'ye uyarlama ---
+
+def render(query):
+    if isinstance(query, sql.Composed):
+        return ''.join(render(part) for part in query.seq)
+    if isinstance(query, sql.Identifier):
+        return '.'.join('"' + s.replace('"', '""') + '"' for s in query.strings)
+    if isinstance(query, sql.SQL):
+        return query.string
+    return str(query)
+
+
+def to_asyncpg(query):
+    # %s yer tutucularını $1, $2 ... şekline çevir
+    text = render(query) if not isinstance(query, str) else query
+    counter = iter(range(1, 1000))
+    return re.sub(r'%s', lambda _: f'${next(counter)}', text)
+
+
+def coerce(table, column, value):
+    # psycopg2 değerleri metin olarak gönderip dönüşümü Postgres'e bırakır;
+    # asyncpg tipli parametre istediği için aynı dönüşüm burada yapılır
+    if value is None:
+        return None
+    kind = COLUMN_TYPES.get(table, {}).get(column)
+    try:
+        if kind == 'int':
+            return int(value)
+        if kind == 'bool':
+            if isinstance(value, str):
+                return value.strip().lower() in ('1', 't', 'true', 'yes', 'y', 'on')
+            return bool(value)
+        if kind == 'timestamp':
+            if isinstance(value, datetime):
+                return value
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                parsed = parse_date(value)
+                if parsed is None:
+                    raise
+                return parsed.replace(tzinfo=None)
+        if kind == 'json':
+            return json.loads(value) if isinstance(value, str) else value
+    except (TypeError, ValueError):
+        raise BadRequest(f'{column} alanı için geçersiz değer: {value}')
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float, Decimal)):
+        return str(value)
+    return value
+
+
+def coerce_all(table, columns, values):
+    return [coerce(table, c, v) for c, v in zip(columns, values)]
+
+
+# --- Okuma ---
+
+def cached_json_response(request, entry):
+    etag = '"' + entry['etag'] + '"'
+    headers = {'ETag': etag}
+    if entry.get('next_cursor'):
+        headers['X-Next-Cursor'] = entry['next_cursor']
+    match = request.headers.get('if-none-match', '')
+    candidates = [m.strip().removeprefix('W/') for m in match.split(',')]
+    if etag in candidates or '*' in candidates:
+        return Response(status_code=304, headers=headers)
+    return Response(entry['body'], media_type='application/json', headers=headers)
+
+
+def list_handler(name):
+    async def handler(request):
+        # app.py list_table ile aynı parametreler: ?export=json|ndjson, ?json=python|db
+        export = request.query_params.get('export')
+        if export and export not in EXPORT_FORMATS:
+            return jsonify({'error': f'Geçersiz export formatı: {export}'}, 400)
+        try:
+            query = build_list_query(name, request.query_params, paginate=not export)
+        except ListQueryError as e:
+            return jsonify({'error': str(e)}, 400)
+        source = request.query_params.get('json', config.LIST_JSON_SOURCE)
+        if source not in ('python', 'db'):
+            return jsonify({'error': f'Geçersiz json kaynağı: {source}'}, 400)
+        params = [coerce(name, c, v) if c else v for c, v in zip(query.param_columns, query.params)]
+        if export:
+            batches = aiter_batches(pool, to_asyncpg(query.query), params)
+            return StreamingResponse(aexport_stream(export, batches, dumps), media_type=EXPORT_FORMATS[export])
+
+        async def load():
+            if source == 'db':
+                # JSON Postgres'te üretilir; sayfa parametreleri (LIMIT) sorgu parametrelerinden önce gelir
+                json_query, json_params = query.json_query()
+                json_params = list(json_params[:len(json_params) - len(params)]) + params
+                async with pool.acquire() as conn:
+                    body, last = await conn.fetchrow(to_asyncpg(json_query), *json_params)
+                next_cursor = encode_cursor(last) if last is not None else None
+                return json_entry(body + '\n', next_cursor=next_cursor)
+            async with pool.acquire() as conn:
+                rows = await conn.fetch(to_asyncpg(query.query), *params)
+            records, next_cursor = query.page([dict(r) for r in rows])
+            return json_entry(dumps(records) + '\n', next_cursor=next_cursor)
+
+        if name in CACHED_TABLES and not request.query_params.get('expand'):
+            entry = await cache.aget_or_load(cache.list_key(name, request.url.query), load)
+        else:
+            entry = await load()
+        return cached_json_response(request, entry)
+    return handler
+
+
+def get_handler(name):
+    pk = TABLES[name]['pk']
+    plain_query = to_asyncpg(build_get_query(name))
+
+    async def handler(request):
+        record_id = request.path_params[pk]
+        expand = request.query_params.get('expand')
+        try:
+            query = to_asyncpg(build_get_query(name, expand=expand)) if expand else plain_query
+        except ListQueryError as e:
+            return jsonify({'error': str(e)}, 400)
+
+        async def load():
+            async with pool.acquire() as conn:
+                row = await conn.fetchrow(query, record_id)
+            return json_entry(dumps(dict(row)) + '\n') if row else None
+
+        if name in CACHED_TABLES and not expand:
+            entry = await cache.aget_or_load(cache.record_key(name, record_id), load)
+        else:
+            entry = await load()
+        if entry is None:
+            return jsonify({'error': 'Kayıt bulunamadı'}, 404)
+        return cached_json_response(request, entry)
+    return handler
+
+
+def delete_handler(name):
+    pk = TABLES[name]['pk']
+    query = f'DELETE FROM llm_platform.{TABLES[name]["table"]} WHERE {pk} = $1'
+
+    async def handler(request):
+        record_id = request.path_params[pk]
+        async with pool.acquire() as conn:
+            await conn.execute(query, record_id)
+        if name in CACHED_TABLES:
+            cache.invalidate(name, record_id)
+        if name == 'users':
+            login_cache.clear()
+            await revoke_user_tokens(record_id)
+        if name == 'roles':
+            role_permissions.invalidate(record_id)
+        return jsonify({'status': 'deleted'})
+    return handler
+
+
+# --- Yazma (app.py'deki SQL'lerin aynısı) ---
+
+def _dump_json(value):
+    return json.dumps(value) if isinstance(value, dict) else value
+
+
+async def insert_with_dates(table, fields, values, data):
+    # create_date / change_date sadece gönderildiyse eklenir, yoksa DEFAULT kullanılır
+    fields = list(fields)
+    values = list(values)
+    for optional in ('create_date', 'change_date'):
+        if data.get(optional):
+            fields.append(optional)
+            values.append(data.get(optional))
+    placeholders = ', '.join(f'${i}' for i in range(1, len(fields) + 1))
+    async with pool.acquire() as conn:
+        await conn.execute(
+            f'INSERT INTO llm_platform.{table} ({", ".join(fields)}) VALUES ({placeholders})',
+            *coerce_all(table, fields, values)
+        )
+
+
+async def add_role(request):
+    data = await get_json(request)
+    columns = ['role_id', 'role_name', 'permissions', 'admin_or_not']
+    values = [data.get('role_id'), data.get('role_name'), _dump_json(data.get('permissions')), data.get('admin_or_not')]
+    async with pool.acquire() as conn:
+        await conn.execute(
+            'INSERT INTO llm_platform.roles (role_id, role_name, permissions, admin_or_not) VALUES ($1, $2, $3, $4)',
+            *coerce_all('roles', columns, values)
+        )
+    cache.invalidate('roles')
+    role_permissions.invalidate(data.get('role_id'))
+    return jsonify({'status': 'success'})
+
+
+async def update_role(request):
+    role_id = request.path_params['role_id']
+    data = await get_json(request)
+    columns = ['role_name', 'permissions', 'admin_or_not']
+    values = [data.get('role_name'), _dump_json(data.get('permissions')), data.get('admin_or_not')]
+    async with pool.acquire() as conn:
+        await conn.execute(
+            'UPDATE llm_platform.roles SET role_name=$1, permissions=$2, admin_or_not=$3 WHERE role_id=$4',
+            *coerce_all('roles', columns, values), role_id
+        )
+    cache.invalidate('roles', role_id)
+    role_permissions.invalidate(role_id)
+    return jsonify({'status': 'updated'})
+
+
+async def add_user(request):
+    data = await get_json(request)
+    data['password'] = await passwords.afor_storage(data.get('password'))
+    fields = ['role_id', 'name', 'surname', 'password', 'e_mail', 'institution_working']
+    await insert_with_dates('users', fields, [data.get(f) for f in fields], data)
+    login_cache.clear()
+    return jsonify({'status': 'success'})
+
+
+async def update_user(request):
+    user_id = request.path_params['user_id']
+    data = await get_json(request)
+    # password gönderilmezse (veya boşsa) kayıtlı özet korunur
+    data['password'] = await passwords.afor_storage(data.get('password')) or None
+    columns = ['role_id', 'name', 'surname', 'password', 'e_mail', 'institution_working', 'status',
+               'change_date', 'last_login']
+    async with pool.acquire() as conn:
+        # Token'lar sadece rol, şifre veya durum değiştiyse iptal edilir (old: güncellemeden önceki satır)
+        credentials_changed = await conn.fetchval(
+            'UPDATE llm_platform.users u SET role_id=$1, name=$2, surname=$3, password=coalesce($4, old.password), e_mail=$5, '
+            'institution_working=$6, status=$7, change_date=$8, last_login=$9 '
+            'FROM llm_platform.users old WHERE u.id = $10 AND old.id = u.id '
+            'RETURNING (u.role_id, u.password, u.status) IS DISTINCT FROM (old.role_id, old.password, old.status)',
+            *coerce_all('users', columns, [data.get(c) for c in columns]), user_id
+        )
+    login_cache.clear()
+    if credentials_changed:
+        await revoke_user_tokens(user_id)
+    return jsonify({'status': 'updated'})
+
+
+async def add_database_info(request):
+    data = await get_json(request)
+    fields = ['database_ip', 'database_port', 'database_user', 'database_password', 'database_type',
+              'database_name', 'user_id']
+    await insert_with_dates('database_info', fields, [data.get(f) for f in fields], data)
+    return jsonify({'status': 'success'})
+
+
+async def update_database_info(request):
+    database_id = request.path_params['database_id']
+    data = await get_json(request)
+    columns = ['database_ip', 'database_port', 'database_user', 'database_password', 'database_type',
+               'database_name', 'user_id']
+    async with pool.acquire() as conn:
+        await conn.execute(
+            'UPDATE llm_platform.database_info SET database_ip=$1, database_port=$2, database_user=$3, '
+            'database_password=$4, database_type=$5, database_name=$6, user_id=$7 WHERE database_id=$8',
+            *coerce_all('database_info', columns, [data.get(c) for c in columns]), database_id
+        )
+    return jsonify({'status': 'updated'})
+
+
+async def add_data_prepare_module(request):
+    data = await get_json(request)
+    fields = ['module_name', 'description', 'user_id']
+    # query_cache_ttl sadece gönderildiyse yazılır (app.py ile aynı)
+    if 'query_cache_ttl' in data:
+        fields.append('query_cache_ttl')
+    await insert_with_dates('data_prepare_modules', fields, [data.get(f) for f in fields], data)
+    return jsonify({'status': 'success'})
+
+
+async def update_data_prepare_module(request):
+    module_id = request.path_params['module_id']
+    data = await get_json(request)
+    columns = ['module_name', 'description', 'user_id', 'create_date', 'change_date']
+    if 'query_cache_ttl' in data:
+        columns.append('query_cache_ttl')
+    assignments = ', '.join(f'{c}=${i}' for i, c in enumerate(columns, 1))
+    async with pool.acquire() as conn:
+        await conn.execute(
+            f'UPDATE llm_platform.data_prepare_modules SET {assignments} WHERE module_id=${len(columns) + 1}',
+            *coerce_all('data_prepare_modules', columns, [data.get(c) for c in columns]), module_id
+        )
+    return jsonify({'status': 'updated'})
+
+
+ASSISTANT_FIELDS = ['title', 'explanation', 'parameters', 'user_id', 'working_place', 'default_instructions',
+                    'data_instructions', 'file_path', 'trigger_time']
+
+
+async def add_assistant(request):
+    data = await get_json(request)
+    values = [data.get(f) for f in ASSISTANT_FIELDS]
+    await insert_with_dates('assistants', ASSISTANT_FIELDS, values, data)
+    cache.invalidate('assistants')
+    return jsonify({'status': 'success'})
+
+
+async def update_assistant(request):
+    asistan_id = request.path_params['asistan_id']
+    data = await get_json(request)
+    columns = ['title', 'explanation', 'parameters', 'user_id', 'create_date', 'change_date', 'working_place',
+               'default_instructions', 'data_instructions', 'file_path', 'trigger_time']
+    async with pool.acquire() as conn:
+        await conn.execute(
+            'UPDATE llm_platform.assistants SET title=$1, explanation=$2, parameters=$3, user_id=$4, '
+            'create_date=$5, change_date=$6, working_place=$7, default_instructions=$8, data_instructions=$9, '
+            'file_path=$10, trigger_time=$11 WHERE asistan_id=$12',
+            *coerce_all('assistants', columns, [data.get(c) for c in columns]), asistan_id
+        )
+    cache.invalidate('assistants', asistan_id)
+    return jsonify({'status': 'updated'})
+
+
+async def add_auto_prompt(request):
+    data = await get_json(request)
+    assistant_title = data.get('assistant_title')
+    if not assistant_title:
+        return jsonify({'error': 'assistant_title gerekli'}, 400)
+    async with pool.acquire() as conn:
+        asistan_id = await cache.aget_or_load(
+            cache.lookup_key('assistants', 'title', assistant_title),
+            lambda: conn.fetchval('SELECT asistan_id FROM llm_platform.assistants WHERE title = $1', assistant_title)
+        )
+        if asistan_id is None:
+            return jsonify({'error': 'assistant_title bulunamadı'}, 400)
+        columns = ['question', 'trigger_time', 'option_code', 'mcrisactive', 'receiver_emails']
+        await conn.execute(
+            'INSERT INTO llm_platform.auto_prompt (asistan_id, question, trigger_time, option_code, mcrisactive, '
+            'receiver_emails) VALUES ($1, $2, $3, $4, $5, $6)',
+            asistan_id, *coerce_all('auto_prompt', columns, [data.get(c) for c in columns])
+        )
+    return jsonify({'status': 'success'})
+
+
+async def update_auto_prompt(request):
+    prompt_id = request.path_params['prompt_id']
+    data = await get_json(request)
+    trigger_time = coerce('auto_prompt', 'trigger_time', data.get('trigger_time'))
+    assistants_id = data.get('assistants_id')
+    async with pool.acquire() as conn:
+        await conn.execute(
+            'UPDATE llm_platform.auto_prompt SET prompt_text=$1, assistants_id=$2, trigger_time=$3, mcrisactive=$4 '
+            'WHERE prompt_id=$5',
+            data.get('prompt_text'),
+            int(assistants_id) if assistants_id is not None else None,
+            trigger_time,
+            coerce('auto_prompt', 'mcrisactive', data.get('mcrisactive')),
+            prompt_id
+        )
+    return jsonify({'status': 'updated'})
+
+
+async def authenticate(conn, email, password):
+    # app.authenticate ile aynı akış
+    credentials = login_cache.credentials(email)
+    from_cache = credentials is not None
+    failed_hash = None
+    while True:
+        if credentials is None:
+            row = await conn.fetchrow('SELECT id, password FROM llm_platform.users WHERE e_mail = $1', email)
+            if row is None:
+                login_cache.reject(email)
+                return None
+            credentials = (row['id'], row['password'])
+            login_cache.remember(email, *credentials)
+            if credentials[1] == failed_hash:
+                login_cache.reject(email, password)
+                return None
+        user_id, stored = credentials
+        if await passwords.averify(password, stored):
+            new_hash = await passwords.ahash(password) if passwords.needs_rehash(stored) else stored
+            role = '(SELECT to_jsonb(r) FROM llm_platform.roles r WHERE r.role_id = users.role_id) AS role'
+            if last_logins is None:
+                user = await conn.fetchrow(
+                    'UPDATE llm_platform.users SET last_login = CURRENT_TIMESTAMP, password = $1 '
+                    f'WHERE id = $2 AND password = $3 RETURNING *, {role}',
+                    new_hash, user_id, stored
+                )
+            elif new_hash == stored:
+                user = await conn.fetchrow(
+                    f'SELECT *, {role} FROM llm_platform.users WHERE id = $1 AND password = $2', user_id, stored)
+            else:
+                user = await conn.fetchrow(
+                    f'UPDATE llm_platform.users SET password = $1 WHERE id = $2 AND password = $3 RETURNING *, {role}',
+                    new_hash, user_id, stored
+                )
+            if user is not None:
+                login_cache.remember(email, user_id, new_hash)
+                return user
+        else:
+            if not from_cache:
+                login_cache.reject(email, password)
+                return None
+            failed_hash = stored
+        login_cache.forget(email)
+        credentials, from_cache = None, False
+
+
+async def flush_last_logins(ids, times):
+    async with pool.acquire() as conn:
+        await conn.execute(
+            'UPDATE llm_platform.users AS u SET last_login = v.last_login '
+            'FROM unnest($1::integer[], $2::timestamp[]) AS v(id, last_login) '
+            'WHERE u.id = v.id AND (u.last_login IS NULL OR u.last_login < v.last_login)',
+            ids, times
+        )
+
+
+def start_last_login_buffer():
+    # app.last_logins ile aynı; yazma iş parçacığı yerine olay döngüsünde bir görev
+    global last_logins, last_login_task
+    full = asyncio.Event()
+    last_logins = LastLoginBuffer(flush_last_logins, config.LAST_LOGIN_FLUSH_MS / 1000,
+                                  config.LAST_LOGIN_FLUSH_MAX, on_full=full.set)
+
+    async def run():
+        while True:
+            try:
+                await asyncio.wait_for(full.wait(), last_logins.interval)
+            except asyncio.TimeoutError:
+                pass
+            full.clear()
+            await last_logins.aflush()
+    last_login_task = asyncio.get_running_loop().create_task(run())
+
+
+# --- Değişiklik akışı: app.change_stream ile aynı ---
+
+CHANGE_HISTORY_LIMIT = 1000
+
+
+def apply_changes(events):
+    # app.apply_changes ile aynı; dinleyici iş parçacığında çalışır (önbellek ve izinler kilitli)
+    for event in events:
+        table, record_id = event['table'], event['id']
+        if table in CACHED_TABLES and config.CACHE_BACKEND == 'memory':
+            cache.invalidate(table, record_id, bulk=record_id is None)
+        if table == 'roles':
+            role_permissions.invalidate(record_id)
+
+
+def start_change_feed():
+    # Dinleyici kendi iş parçacığında psycopg2 ile çalışır; bekleyen SSE istemcileri olay
+    # döngüsüne aktarılan bir asyncio.Event ile uyandırılır
+    global change_feed, change_signal
+    loop = asyncio.get_running_loop()
+    change_signal = asyncio.Event()
+
+    def pulse():
+        global change_signal
+        signal, change_signal = change_signal, asyncio.Event()
+        signal.set()
+
+    change_feed = ChangeFeed(lambda: psycopg2.connect(**config.DB_CONFIG), config.CHANGE_FEED_BUFFER,
+                             gap_timeout=config.CHANGE_FEED_GAP_TIMEOUT, retention=config.CHANGE_LOG_RETENTION)
+    change_feed.subscribe(apply_changes)
+    change_feed.subscribe(lambda events: loop.call_soon_threadsafe(pulse))
+    change_feed.start()
+
+
+async def wait_changes(after, timeout):
+    # ChangeFeed.wait'in asyncio karşılığı
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        signal = change_signal
+        if change_feed.last_seq is not None and change_feed.last_seq > after:
+            return True
+        remaining = deadline - loop.time()
+        if remaining <= 0 or not change_feed.enabled:
+            return False
+        try:
+            # İlk bağlantı konumu olaysız kurulur; hazır olmayı beklerken kısa aralıklarla bakılır
+            await asyncio.wait_for(signal.wait(), remaining if change_feed.last_seq is not None else min(remaining, 0.1))
+        except asyncio.TimeoutError:
+            pass
+
+
+async def read_changes(after, tables):
+    result = change_feed.since(after, tables)
+    if result is not None:
+        return result
+    upto = change_feed.last_seq
+    async with pool.acquire() as conn:
+        # changes.history ile aynı
+        first = await conn.fetchval(FIRST_SQL)
+        if first is not None and first > after + 1:
+            raise ResumeError(f'{after} sonrası değişiklikler artık tutulmuyor')
+        rows = await conn.fetch(to_asyncpg(HISTORY_SQL), after, upto, CHANGE_HISTORY_LIMIT)
+    events = [to_event(tuple(row)) for row in rows]
+    position = events[-1]['seq'] if len(events) == CHANGE_HISTORY_LIMIT else upto
+    return [e for e in events if tables is None or e['table'] in tables], position
+
+
+async def sse_changes(after, tables):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + config.CHANGE_STREAM_MAX_SECONDS
+    position = after
+    yield 'retry: 3000\n\n'
+    while True:
+        try:
+            events, new_position = await read_changes(position, tables)
+        except ResumeError:
+            position = change_feed.last_seq
+            yield f'id: {position}\nevent: reset\ndata: {json.dumps({"seq": position})}\n\n'
+            continue
+        if events:
+            yield ''.join(f'id: {e["seq"]}\nevent: change\ndata: {json.dumps(e)}\n\n' for e in events)
+        if new_position != position and (not events or events[-1]['seq'] != new_position):
+            yield f'id: {new_position}\n\n'
+        position = new_position
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return
+        if not await wait_changes(position, min(config.CHANGE_STREAM_PING, remaining)):
+            yield ': ping\n\n'
+
+
+def change_tables(request):
+    return [n.strip() for n in request.query_params.get('tables', '').split(',') if n.strip()] or None
+
+
+async def change_stream(request):
+    if change_feed is None or not change_feed.enabled:
+        return jsonify({'error': 'Değişiklik akışı kapalı'}, 503)
+    tables = change_tables(request)
+    unknown = [n for n in tables or () if n not in TABLES]
+    if unknown:
+        return jsonify({'error': f"Bilinmeyen tablo: {', '.join(unknown)}"}, 400)
+    try:
+        after = request.query_params.get('after', request.headers.get('last-event-id'))
+        after = int(after) if after not in (None, '') else None
+        wait = min(float(request.query_params.get('wait', 0)), config.CHANGE_STREAM_MAX_SECONDS)
+    except ValueError:
+        return jsonify({'error': 'after tam sayı, wait sayı olmalı'}, 400)
+    if change_feed.last_seq is None and not await wait_changes(-1, 5):
+        return jsonify({'error': 'Değişiklik akışı hazır değil'}, 503)
+    if after is None:
+        after = change_feed.last_seq
+    if request.query_params.get('stream') == '0':
+        try:
+            events, position = await read_changes(after, tables)
+            if not events and wait > 0 and await wait_changes(position, wait):
+                events, position = await read_changes(position, tables)
+        except ResumeError:
+            return jsonify({'events': [], 'seq': change_feed.last_seq, 'reset': True})
+        return jsonify({'events': events, 'seq': position, 'reset': False})
+    return StreamingResponse(sse_changes(after, tables), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+async def change_feed_stats(request):
+    return jsonify(change_feed.stats() if change_feed is not None else {'enabled': False})
+
+
+async def login(request):
+    data = await get_json(request)
+    email = data.get('e_mail')
+    password = data.get('password')
+    if not email or not password:
+        return jsonify({'error': 'E-posta ve şifre gerekli'}, 400)
+    if login_cache.is_rejected(email, password):
+        return jsonify({'error': 'Geçersiz e-posta veya şifre'}, 401)
+    async with pool.acquire() as conn:
+        user = await authenticate(conn, email, password)
+    if user is None:
+        return jsonify({'error': 'Geçersiz e-posta veya şifre'}, 401)
+    user = dict(user)
+    user.pop('password', None)
+    if last_logins is not None:
+        user['last_login'] = last_logins.record(user['id'])
+    role_permissions.store(user['role_id'], user.get('role'))
+    user.update(tokens.issue(user))
+    return jsonify(user)
+
+
+async def login_stats(request):
+    return jsonify(login_cache.stats())
+
+
+async def last_login_stats(request):
+    return jsonify(last_logins.stats() if last_logins is not None else {'enabled': False})
+
+
+# --- Token'lar (app.py ile aynı) ---
+
+async def load_revocations():
+    try:
+        async with pool.acquire() as conn:
+            await conn.execute('DELETE FROM llm_platform.revoked_tokens WHERE expires_at <= extract(epoch FROM now())')
+            rows = await conn.fetch('SELECT jti, user_id, not_before, expires_at FROM llm_platform.revoked_tokens')
+    except Exception:
+        logger.exception('Token iptal listesi okunamadı')
+        return
+    tokens.revocations.replace(
+        {r['jti']: r['expires_at'] for r in rows if r['jti']},
+        {r['user_id']: r['not_before'] for r in rows if not r['jti'] and r['user_id'] is not None},
+    )
+
+
+async def revoke_token(conn, claims):
+    tokens.revocations.revoke(claims['jti'], claims['exp'])
+    await conn.execute(
+        'INSERT INTO llm_platform.revoked_tokens (jti, user_id, not_before, expires_at) VALUES ($1, $2, NULL, $3)',
+        claims['jti'], claims['sub'], claims['exp']
+    )
+
+
+async def role_mask(role_id):
+    mask = role_permissions.lookup(role_id)
+    if mask is not None:
+        return mask
+    role = None
+    if role_id is not None:
+        async with pool.acquire() as conn:
+            role = await conn.fetchrow(
+                'SELECT permissions, admin_or_not FROM llm_platform.roles WHERE role_id = $1', role_id)
+    return role_permissions.store(role_id, dict(role) if role else None)
+
+
+async def revoke_user_tokens(user_id):
+    not_before = tokens.revocations.revoke_user(user_id)
+    async with pool.acquire() as conn:
+        await conn.execute(
+            'INSERT INTO llm_platform.revoked_tokens (jti, user_id, not_before, expires_at) VALUES (NULL, $1, $2, $3)',
+            user_id, not_before, not_before + config.REFRESH_TOKEN_TTL
+        )
+
+
+class AuthMiddleware:
+    # app.authorize karşılığı; tablo adı yolun ilk parçasından, işlem HTTP metodundan çıkarılır
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] == 'OPTIONS' or scope['path'] in PUBLIC_PATHS:
+            return await self.app(scope, receive, send)
+        header = dict(scope['headers']).get(b'authorization', b'').decode('latin-1')
+        state = scope.setdefault('state', {})
+        if not header.startswith('Bearer '):
+            state['claims'] = None
+            if config.AUTH_REQUIRED:
+                return await jsonify({'error': 'Yetkilendirme gerekli'}, 401)(scope, receive, send)
+            return await self.app(scope, receive, send)
+        if tokens.revocations.needs_refresh():
+            if tokens.revocations.loaded:
+                asyncio.get_running_loop().create_task(load_revocations())
+            else:
+                await load_revocations()
+        try:
+            claims = tokens.verify(header[7:])
+        except TokenError as e:
+            return await jsonify({'error': str(e)}, 401)(scope, receive, send)
+        state['claims'] = claims
+        table = scope['path'].split('/')[1]
+        action = 'read' if scope['method'] in ('GET', 'HEAD') else 'write'
+        if scope['path'] == '/changes':
+            # Değişiklik akışı istenen (verilmezse tüm) tabloların okuma iznini ister
+            tables = change_tables(Request(scope)) or list(TABLES)
+        else:
+            tables = [table] if table in TABLES else []
+        mask = await role_mask(claims['role']) if tables else 0
+        for table in tables:
+            if not role_permissions.check(mask, table, action):
+                return await jsonify({'error': f'{table} için {action} izni yok'}, 403)(scope, receive, send)
+        return await self.app(scope, receive, send)
+
+
+async def refresh_token(request):
+    data = await get_json(request)
+    try:
+        claims = tokens.verify(data.get('refresh_token') or '', kind='refresh')
+    except TokenError as e:
+        return jsonify({'error': str(e)}, 401)
+    async with pool.acquire() as conn:
+        user = await conn.fetchrow(
+            'SELECT u.id, u.role_id, to_jsonb(r) AS role FROM llm_platform.users u '
+            'LEFT JOIN llm_platform.roles r ON r.role_id = u.role_id WHERE u.id = $1',
+            claims['sub']
+        )
+        if user is None:
+            return jsonify({'error': 'Kullanıcı bulunamadı'}, 401)
+        await revoke_token(conn, claims)
+    role_permissions.store(user['role_id'], user['role'])
+    return jsonify(tokens.issue(dict(user)))
+
+
+async def logout(request):
+    data = await get_json(request)
+    claims = request.scope.get('state', {}).get('claims')
+    revoked = [claims] if claims else []
+    try:
+        if data.get('refresh_token'):
+            revoked.append(tokens.verify(data['refresh_token'], kind='refresh'))
+    except TokenError:
+        pass
+    if revoked:
+        async with pool.acquire() as conn:
+            for item in revoked:
+                await revoke_token(conn, item)
+    return jsonify({'status': 'logged_out', 'revoked': len(revoked)})
+
+
+async def token_stats(request):
+    return jsonify(tokens.stats())
+
+
+async def permission_stats(request):
+    return jsonify(role_permissions.stats())
+
+
+async def pool_stats(request):
+    return jsonify({
+        'min_size': pool.get_min_size(),
+        'max_size': pool.get_max_size(),
+        'size': pool.get_size(),
+        'idle': pool.get_idle_size(),
+        'in_use': pool.get_size() - pool.get_idle_size(),
+    })
+
+
+async def cache_stats(request):
+    return jsonify(cache.stats())
+
+
+async def test(request):
+    return PlainTextResponse('Backend çalışıyor!')
+
+
+async def bad_request(request, exc):
+    return jsonify({'error': str(exc)}, 400)
+
+
+async def database_error(request, exc):
+    return jsonify({'error': str(exc)}, 500)
+
+
+WRITE_ROUTES = {
+    'roles': (add_role, update_role),
+    'users': (add_user, update_user),
+    'database_info': (add_database_info, update_database_info),
+    'data_prepare_modules': (add_data_prepare_module, update_data_prepare_module),
+    'assistants': (add_assistant, update_assistant),
+    'auto_prompt': (add_auto_prompt, update_auto_prompt),
+}
+
+# app.py'deki route değişken adları (role_id, user_id, ...) korunur
+PATH_PARAMS = {
+    'roles': 'role_id',
+    'users': 'user_id',
+    'database_info': 'database_id',
+    'data_prepare_modules': 'module_id',
+    'assistants': 'asistan_id',
+    'auto_prompt': 'prompt_id',
+}
+
+
+def _routes():
+    routes = []
+    for name, (add, update) in WRITE_ROUTES.items():
+        param = PATH_PARAMS[name]
+        item = f'/{name}/{{{param}:int}}'
+        routes += [
+            Route(f'/{name}', list_handler(name), methods=['GET']),
+            Route(f'/{name}', add, methods=['POST']),
+            Route(item, _with_param(get_handler(name), param, TABLES[name]['pk']), methods=['GET']),
+            Route(item, _with_param(delete_handler(name), param, TABLES[name]['pk']), methods=['DELETE']),
+            Route(item, update, methods=['PUT']),
+        ]
+    routes += [
+        Route('/login', login, methods=['POST']),
+        Route('/login_stats', login_stats, methods=['GET']),
+        Route('/last_login_stats', last_login_stats, methods=['GET']),
+        Route('/token/refresh', refresh_token, methods=['POST']),
+        Route('/logout', logout, methods=['POST']),
+        Route('/token_stats', token_stats, methods=['GET']),
+        Route('/permission_stats', permission_stats, methods=['GET']),
+        Route('/pool_stats', pool_stats, methods=['GET']),
+        Route('/cache_stats', cache_stats, methods=['GET']),
+        Route('/changes', change_stream, methods=['GET']),
+        Route('/change_feed_stats', change_feed_stats, methods=['GET']),
+        Route('/test', test, methods=['GET']),
+    ]
+    return routes
+
+
+def _with_param(handler, param, pk):
+    # Genel handler'lar birincil anahtar adını bekler; users için user_id -> id
+    if param == pk:
+        return handler
+
+    async def wrapped(request):
+        request.path_params[pk] = request.path_params[param]
+        return await handler(request)
+    return wrapped
+
+
+# Sıkıştırma: Starlette'in hazır katmanı sadece gzip bilir (br/zstd Flask uygulamasında, compression.py)
+MIDDLEWARE = [Middleware(AuthMiddleware)]
+if 'gzip' in config.COMPRESSION:
+    MIDDLEWARE.insert(0, Middleware(GZipMiddleware, minimum_size=config.COMPRESS_MIN_BYTES,
+                                    compresslevel=config.COMPRESS_LEVELS['gzip']))
+# CORS en dışta: 401/403 cevapları ve preflight istekleri de başlıkları alır (app.py'deki CORS(app, ...) karşılığı)
+MIDDLEWARE.insert(0, Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'],
+                                expose_headers=['X-Next-Cursor', 'ETag', 'Content-Encoding']))
+
+app = Starlette(
+    routes=_routes(),
+    lifespan=lifespan,
+    middleware=MIDDLEWARE,
+    exception_handlers={
+        BadRequest: bad_request,
+        asyncpg.PostgresError: database_error,
+    },
+)
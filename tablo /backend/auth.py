@@ -0,0 +1,191 @@
+# Giriş (login) yardımcıları: tuzlu şifre özetleri ve giriş önbelleği.
+# Şifreler scrypt ile özetlenir: scrypt$<cost>$<r>$<p>$<tuz>$<özet> (n = 2**cost).
+# Özet hesaplama sınırlı bir iş parçacığı havuzunda yapılır; hashlib.scrypt GIL'i bıraktığı
+# için diğer istekler beklemez, aynı anda en fazla `workers` özet hesaplanır (giriş
+# fırtınasında CPU/bellek sınırlı kalır). Eski düz metin şifreler ilk başarılı girişte özetlenir.
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+HASH_PREFIX = 'scrypt'
+
+
+def _b64(data):
+    return base64.b64encode(data).decode('ascii')
+
+
+def is_hashed(value):
+    return isinstance(value, str) and value.startswith(HASH_PREFIX + '$') and value.count('$') == 5
+
+
+class PasswordHasher:
+    def __init__(self, cost=14, block_size=8, parallelism=1, workers=4):
+        self.cost = cost
+        self.block_size = block_size
+        self.parallelism = parallelism
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+
+    def _derive(self, password, salt, cost, r, p):
+        n = 2 ** cost
+        return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+                              maxmem=256 * n * r * p, dklen=32)
+
+    def _hash(self, password):
+        salt = os.urandom(16)
+        digest = self._derive(password, salt, self.cost, self.block_size, self.parallelism)
+        return f'{HASH_PREFIX}${self.cost}${self.block_size}${self.parallelism}${_b64(salt)}${_b64(digest)}'
+
+    def _verify(self, password, stored):
+        if not stored:
+            return False
+        if not is_hashed(stored):
+            # Henüz özetlenmemiş eski kayıt
+            return hmac.compare_digest(password.encode('utf-8'), stored.encode('utf-8'))
+        _, cost, r, p, salt, digest = stored.split('$')
+        try:
+            actual = self._derive(password, base64.b64decode(salt), int(cost), int(r), int(p))
+        except ValueError:
+            return False
+        return hmac.compare_digest(actual, base64.b64decode(digest))
+
+    def needs_rehash(self, stored):
+        # Düz metin veya farklı maliyetle özetlenmiş şifre
+        return not is_hashed(stored) or stored.split('$')[1:4] != [
+            str(self.cost), str(self.block_size), str(self.parallelism)]
+
+    def hash(self, password):
+        return self._executor.submit(self._hash, password).result()
+
+    def verify(self, password, stored):
+        return self._executor.submit(self._verify, password, stored).result()
+
+    def hash_many(self, passwords):
+        # Toplu yükleme: şifreler havuzun tüm iş parçacıklarında paralel özetlenir. Kuyruğa en fazla
+        # workers kadar iş konur; arada gelen girişler tüm toplu işin bitmesini beklemez
+        hashed = []
+        for start in range(0, len(passwords), self.workers):
+            hashed.extend(self._executor.map(self._hash, passwords[start:start + self.workers]))
+        return hashed
+
+    async def ahash(self, password):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._hash, password)
+
+    async def averify(self, password, stored):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._verify, password, stored)
+
+    def for_storage(self, value):
+        # Yazma isteklerindeki password alanı: boşsa olduğu gibi, zaten özetse (panel kaydı
+        # geri gönderdiyse) tekrar özetlenmeden, değilse özetlenerek yazılır
+        if not value or is_hashed(value):
+            return value
+        return self.hash(value)
+
+    def for_storage_many(self, values):
+        # for_storage'ın kolon hali; sadece özetlenmemiş değerler hesaplanır
+        pending = [i for i, value in enumerate(values) if value and not is_hashed(value)]
+        result = list(values)
+        for i, digest in zip(pending, self.hash_many([values[i] for i in pending])):
+            result[i] = digest
+        return result
+
+    async def afor_storage(self, value):
+        if not value or is_hashed(value):
+            return value
+        return await self.ahash(value)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+class LoginCache:
+    # Negatif önbellek: bilinmeyen e-postalar ve yanlış (e-posta, şifre) çiftleri negative_ttl
+    # saniye boyunca veritabanına ve özet hesaplamaya gitmeden reddedilir. Şifreler bellekte
+    # düz tutulmaz; süreç başına rastgele anahtarla HMAC'lenir.
+    # Kimlik önbelleği: e-posta -> (id, şifre özeti). Başarılı giriş tek bir
+    # UPDATE ... WHERE id = %s AND password = <önbellekteki özet> RETURNING * ile yapılır;
+    # şifre başka süreçte değiştiyse UPDATE satır bulamaz ve kayıt yeniden okunur.
+
+    def __init__(self, negative_ttl=60, credential_ttl=300, max_entries=100000):
+        self.negative_ttl = negative_ttl
+        self.credential_ttl = credential_ttl
+        self.max_entries = max_entries
+        self._secret = os.urandom(32)
+        self._rejected = OrderedDict()  # anahtar -> bitiş zamanı
+        self._credentials = OrderedDict()  # e-posta -> (bitiş zamanı, id, özet)
+        self._lock = threading.Lock()
+        self._metrics = {'negative_hits': 0, 'credential_hits': 0, 'rejected': 0}
+
+    def _key(self, email, password=None):
+        raw = email + ('\0' + password if password is not None else '')
+        return hmac.new(self._secret, raw.encode('utf-8'), hashlib.sha256).digest()
+
+    def _put(self, store, key, value):
+        store[key] = value
+        store.move_to_end(key)
+        while len(store) > self.max_entries:
+            store.popitem(last=False)
+
+    def is_rejected(self, email, password):
+        if self.negative_ttl <= 0:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            for key in (self._key(email), self._key(email, password)):
+                expires = self._rejected.get(key)
+                if expires is None:
+                    continue
+                if expires > now:
+                    self._metrics['negative_hits'] += 1
+                    return True
+                del self._rejected[key]
+        return False
+
+    def reject(self, email, password=None):
+        # password verilmezse e-posta hiç bulunamamıştır
+        if self.negative_ttl <= 0:
+            return
+        with self._lock:
+            self._put(self._rejected, self._key(email, password), time.monotonic() + self.negative_ttl)
+            self._metrics['rejected'] += 1
+
+    def credentials(self, email):
+        if self.credential_ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._credentials.get(email)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._credentials[email]
+                return None
+            self._metrics['credential_hits'] += 1
+            return entry[1], entry[2]
+
+    def remember(self, email, user_id, password_hash):
+        if self.credential_ttl <= 0:
+            return
+        with self._lock:
+            self._put(self._credentials, email,
+                      (time.monotonic() + self.credential_ttl, user_id, password_hash))
+
+    def forget(self, email):
+        with self._lock:
+            self._credentials.pop(email, None)
+
+    def clear(self):
+        # users tablosuna yazılınca (yeni kullanıcı, şifre/e-posta değişikliği)
+        with self._lock:
+            self._rejected.clear()
+            self._credentials.clear()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._metrics, rejected_entries=len(self._rejected),
+                        credential_entries=len(self._credentials))
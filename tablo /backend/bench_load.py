@@ -0,0 +1,650 @@
+# API yük testi: veri tohumlama, sabit eşzamanlılıkla karışık istek ve JSON rapor.
+#   python bench_load.py seed --scale medium           # 100k kullanıcı, 10k asistan, 100k auto_prompt
+#   python bench_load.py run --concurrency 16 --duration 60 --output sonuc.json
+#   python bench_load.py run --target http://localhost:8000 --concurrency 64
+#   python bench_load.py compare once.json sonra.json
+#   python bench_load.py reset                         # tohumlanan kayıtları siler
+# Tohumlanan kayıtlar işaretlidir: e-posta *@bench.local, rol/asistan adı load-*; var olan veriye
+# dokunulmaz. Veritabanı config.DB_CONFIG'ten (veya --dsn ile verilen yerel/geçici bir
+# PostgreSQL'den) okunur; tablolar yoksa --apply-schema ile schema.sql uygulanır.
+# run varsayılan olarak uygulamayı süreç içinde (Flask test istemcisi) çalıştırır; --target ile
+# ayakta olan bir sunucuya (Flask/gunicorn veya asgi_app/uvicorn) HTTP üzerinden gidilir.
+# Aynı --seed ile istek sırası aynıdır; rapora commit, ayarlar ve veri boyutu da yazılır.
+import argparse
+import csv
+import http.client
+import io
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from urllib.parse import urlencode, urlsplit
+
+import psycopg2
+
+import config
+
+PRESETS = {
+    'small': {'users': 1_000, 'assistants': 1_000, 'auto_prompts': 10_000},
+    'medium': {'users': 100_000, 'assistants': 10_000, 'auto_prompts': 100_000},
+    'large': {'users': 1_000_000, 'assistants': 10_000, 'auto_prompts': 100_000},
+}
+ROLES = 20
+DOMAIN = 'bench.local'
+PASSWORD = 'Yuk-Testi-1'
+ADMIN_EMAIL = f'load-admin@{DOMAIN}'
+COPY_CHUNK = 50_000
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'schema.sql')
+
+NAMES = ['Ayşe', 'Mehmet', 'Zeynep', 'Ali', 'Elif', 'Mustafa', 'Fatma', 'Ahmet', 'Emine', 'Can']
+SURNAMES = ['Yılmaz', 'Kaya', 'Demir', 'Şahin', 'Çelik', 'Yıldız', 'Aydın', 'Öztürk', 'Arslan', 'Doğan']
+INSTITUTIONS = ['Genel Müdürlük', 'Bölge 1', 'Bölge 2', 'Ar-Ge', 'Finans', 'İK']
+PERMISSION_TEMPLATES = [
+    {'all': 'read'},
+    {'all': 'read', 'users': 'rw'},
+    {'all': 'read', 'assistants': 'rw', 'auto_prompt': 'rw'},
+    {'users': 'read', 'roles': 'read'},
+]
+
+
+def connect(dsn=None):
+    return psycopg2.connect(dsn) if dsn else psycopg2.connect(**config.DB_CONFIG)
+
+
+# --- Tohumlama ---
+
+def copy_rows(cur, table, columns, rows):
+    # CSV biçiminde COPY; satırlar COPY_CHUNK'lık parçalarla gönderilir
+    statement = f'COPY llm_platform.{table} ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)'
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count % COPY_CHUNK == 0:
+            buffer.seek(0)
+            cur.copy_expert(statement, buffer)
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        buffer.seek(0)
+        cur.copy_expert(statement, buffer)
+    return count
+
+
+def apply_schema(cur):
+    cur.execute("SELECT to_regclass('llm_platform.users')")
+    if cur.fetchone()[0] is not None:
+        return False
+    with open(SCHEMA_PATH, encoding='utf-8') as f:
+        schema = f.read()
+    cur.execute('CREATE SCHEMA IF NOT EXISTS llm_platform')
+    cur.execute('SET search_path TO llm_platform')
+    cur.execute(schema)
+    cur.execute('SET search_path TO DEFAULT')
+    return True
+
+
+def reset(cur):
+    deleted = {}
+    for table, where in [
+        ('auto_prompt', "asistan_id IN (SELECT asistan_id FROM llm_platform.assistants WHERE title LIKE 'load-%')"),
+        ('assistants', "title LIKE 'load-%'"),
+        ('users', f"e_mail LIKE '%@{DOMAIN}'"),
+        ('roles', "role_name LIKE 'load-%'"),
+    ]:
+        cur.execute(f'DELETE FROM llm_platform.{table} WHERE {where}')
+        deleted[table] = cur.rowcount
+    return deleted
+
+
+def seed(cur, counts, rng, password_hash):
+    started = time.perf_counter()
+    role_ids = []
+    for i in range(ROLES):
+        permissions = PERMISSION_TEMPLATES[i % len(PERMISSION_TEMPLATES)]
+        cur.execute('INSERT INTO llm_platform.roles (role_name, permissions, admin_or_not) '
+                    'VALUES (%s, %s, %s) RETURNING role_id',
+                    (f'load-role-{i}', json.dumps(permissions), i == 0))
+        role_ids.append(cur.fetchone()[0])
+
+    def users():
+        yield (role_ids[0], 'Yük', 'Yönetici', password_hash, ADMIN_EMAIL, INSTITUTIONS[0], 'aktif')
+        for i in range(counts['users'] - 1):
+            yield (rng.choice(role_ids[1:]), rng.choice(NAMES), rng.choice(SURNAMES), password_hash,
+                   f'load-{i}@{DOMAIN}', rng.choice(INSTITUTIONS), 'aktif' if rng.random() < 0.9 else 'pasif')
+    copy_rows(cur, 'users', ['role_id', 'name', 'surname', 'password', 'e_mail', 'institution_working', 'status'],
+              users())
+    cur.execute('SELECT min(id), max(id) FROM llm_platform.users WHERE e_mail LIKE %s', (f'%@{DOMAIN}',))
+    first_user, last_user = cur.fetchone()
+
+    def assistants():
+        for i in range(counts['assistants']):
+            yield (f'load-{i}', 'Yük testi asistanı', json.dumps({'temperature': round(rng.random(), 2)}),
+                   rng.randint(first_user, last_user), rng.choice(INSTITUTIONS), 'Kısa ve net yanıt ver.', '',
+                   json.dumps({'cron': f'{rng.randrange(60)} {rng.randrange(24)} * * *'}))
+    copy_rows(cur, 'assistants', ['title', 'explanation', 'parameters', 'user_id', 'working_place',
+                                  'default_instructions', 'data_instructions', 'trigger_time'], assistants())
+    cur.execute("SELECT min(asistan_id), max(asistan_id) FROM llm_platform.assistants WHERE title LIKE 'load-%'")
+    first_assistant, last_assistant = cur.fetchone()
+
+    def auto_prompts():
+        # mcrisactive = false: zamanlayıcı (scheduler.py) bu kayıtları çalıştırmaz
+        for i in range(counts['auto_prompts']):
+            yield (rng.randint(first_assistant, last_assistant), f'Yük testi sorusu {i}',
+                   json.dumps({'cron': '0 9 * * 1'}), 'mail', False, f'load-{i % 100}@{DOMAIN}')
+    copy_rows(cur, 'auto_prompt', ['asistan_id', 'question', 'trigger_time', 'option_code', 'mcrisactive',
+                                   'receiver_emails'], auto_prompts())
+    for table in ('roles', 'users', 'assistants', 'auto_prompt'):
+        cur.execute(f'ANALYZE llm_platform.{table}')
+    return round(time.perf_counter() - started, 2)
+
+
+def dataset(cur):
+    # Çalıştırmanın kullandığı id aralıkları; tohumlanan kayıtlar sıralı id alır
+    cur.execute('SELECT count(*), min(id), max(id) FROM llm_platform.users WHERE e_mail LIKE %s', (f'%@{DOMAIN}',))
+    users = cur.fetchone()
+    cur.execute("SELECT count(*), min(asistan_id), max(asistan_id) FROM llm_platform.assistants WHERE title LIKE 'load-%'")
+    assistants = cur.fetchone()
+    cur.execute('SELECT count(*), min(prompt_id), max(prompt_id) FROM llm_platform.auto_prompt '
+                "WHERE asistan_id IN (SELECT asistan_id FROM llm_platform.assistants WHERE title LIKE 'load-%')")
+    prompts = cur.fetchone()
+    cur.execute("SELECT array_agg(role_id ORDER BY role_id) FROM llm_platform.roles WHERE role_name LIKE 'load-%'")
+    roles = cur.fetchone()[0] or []
+    if not users[0]:
+        raise SystemExit('Tohumlanmış veri yok; önce: python bench_load.py seed')
+    return {
+        'users': {'count': users[0], 'first': users[1], 'last': users[2]},
+        'assistants': {'count': assistants[0], 'first': assistants[1], 'last': assistants[2]},
+        'auto_prompts': {'count': prompts[0], 'first': prompts[1], 'last': prompts[2]},
+        'roles': roles,
+    }
+
+
+# --- İstemciler ---
+
+class InProcessClient:
+    def __init__(self, app):
+        self._client = app.test_client()
+
+    def request(self, method, path, body=None, headers=None):
+        response = self._client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.headers, response.get_data()
+
+
+class HttpClient:
+    # İş parçacığı başına tek keep-alive bağlantı
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self._factory = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self._netloc = parts.netloc
+        self._prefix = parts.path.rstrip('/')
+        self._conn = None
+
+    def request(self, method, path, body=None, headers=None):
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = dict(headers or {})
+        if payload is not None:
+            headers['Content-Type'] = 'application/json'
+        for attempt in (0, 1):
+            if self._conn is None:
+                self._conn = self._factory(self._netloc, timeout=60)
+            try:
+                self._conn.request(method, self._prefix + path, body=payload, headers=headers)
+                response = self._conn.getresponse()
+                return response.status, response.headers, response.read()
+            except (ConnectionError, http.client.HTTPException):
+                self._conn.close()
+                self._conn = None
+                if attempt:
+                    raise
+
+
+# --- Senaryolar ---
+# Her senaryo bir veya birkaç çağrı yapar; süreler çağrının etiketine (uç nokta) yazılır.
+
+def scenario_get_user(call, rng, data):
+    call('GET /users/<id>', 'GET', f'/users/{rng.randint(data["users"]["first"], data["users"]["last"])}')
+
+
+def scenario_list_users(call, rng, data):
+    call('GET /users', 'GET', '/users?limit=50')
+
+
+def scenario_list_users_pages(call, rng, data):
+    # İlk sayfa ve X-Next-Cursor ile sonraki sayfa (keyset)
+    _, headers, _ = call('GET /users', 'GET', '/users?limit=50&fields=id,name,surname,e_mail')
+    cursor = headers.get('X-Next-Cursor')
+    if cursor:
+        call('GET /users?cursor', 'GET', '/users?' + urlencode({'limit': 50, 'fields': 'id,name,surname,e_mail',
+                                                                 'cursor': cursor}))
+
+
+def scenario_filter_users(call, rng, data):
+    call('GET /users?filter', 'GET', '/users?' + urlencode({'institution_working': rng.choice(INSTITUTIONS),
+                                                            'limit': 50}))
+
+
+def scenario_get_assistant(call, rng, data):
+    a = data['assistants']
+    call('GET /assistants/<id>', 'GET', f'/assistants/{rng.randint(a["first"], a["last"])}')
+
+
+def scenario_list_assistants(call, rng, data):
+    call('GET /assistants', 'GET', '/assistants?limit=50')
+
+
+def scenario_get_auto_prompt(call, rng, data):
+    p = data['auto_prompts']
+    call('GET /auto_prompt/<id>', 'GET', f'/auto_prompt/{rng.randint(p["first"], p["last"])}')
+
+
+def scenario_list_auto_prompts(call, rng, data):
+    call('GET /auto_prompt', 'GET', '/auto_prompt?limit=50')
+
+
+def scenario_list_roles(call, rng, data):
+    call('GET /roles', 'GET', '/roles')
+
+
+def scenario_lookup(call, rng, data):
+    call('GET /lookup', 'GET', '/lookup?tables=roles,assistants&mode=labels')
+
+
+def scenario_login(call, rng, data):
+    u = data['users']
+    i = rng.randrange(u['count'] - 1)
+    call('POST /login', 'POST', '/login', {'e_mail': f'load-{i}@{DOMAIN}', 'password': PASSWORD})
+
+
+def scenario_login_wrong_password(call, rng, data):
+    u = data['users']
+    i = rng.randrange(u['count'] - 1)
+    call('POST /login (hatalı)', 'POST', '/login', {'e_mail': f'load-{i}@{DOMAIN}', 'password': '123456'})
+
+
+def scenario_user_lifecycle(call, rng, data):
+    # Ekle -> e-postayla bul -> güncelle -> sil
+    email = f'load-run-{rng.getrandbits(48):012x}@{DOMAIN}'
+    call('POST /users', 'POST', '/users', {'name': 'Yük', 'surname': 'Geçici', 'e_mail': email,
+                                           'password': PASSWORD, 'role_id': rng.choice(data['roles'])})
+    _, _, body = call('GET /users?e_mail', 'GET', '/users?' + urlencode({'e_mail': email, 'fields': 'id'}))
+    try:
+        user_id = json.loads(body)[0]['id']
+    except (ValueError, LookupError, TypeError):
+        return
+    call('PUT /users/<id>', 'PUT', f'/users/{user_id}', {'name': 'Yük', 'surname': 'Güncel', 'e_mail': email,
+                                                         'status': 'aktif', 'role_id': rng.choice(data['roles'])})
+    call('DELETE /users/<id>', 'DELETE', f'/users/{user_id}')
+
+
+SCENARIOS = {
+    'get_user': (scenario_get_user, 25),
+    'list_users': (scenario_list_users, 6),
+    'list_users_pages': (scenario_list_users_pages, 4),
+    'filter_users': (scenario_filter_users, 4),
+    'get_assistant': (scenario_get_assistant, 12),
+    'list_assistants': (scenario_list_assistants, 6),
+    'get_auto_prompt': (scenario_get_auto_prompt, 6),
+    'list_auto_prompts': (scenario_list_auto_prompts, 6),
+    'list_roles': (scenario_list_roles, 4),
+    'lookup': (scenario_lookup, 5),
+    'login': (scenario_login, 12),
+    'login_wrong_password': (scenario_login_wrong_password, 3),
+    'user_lifecycle': (scenario_user_lifecycle, 5),
+}
+
+
+def parse_mix(text):
+    # "get_user=50,login=10" -> sadece verilen senaryolar, verilen ağırlıklarla
+    if not text:
+        return {name: weight for name, (_, weight) in SCENARIOS.items()}
+    mix = {}
+    for item in text.split(','):
+        name, _, weight = item.partition('=')
+        if name.strip() not in SCENARIOS:
+            raise SystemExit(f'Bilinmeyen senaryo: {name} (seçenekler: {", ".join(SCENARIOS)})')
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+# --- Ölçüm ---
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(q * len(values)))] if values else None
+
+
+def rss_kb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError):
+        return None
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}  # uç nokta -> [süre]
+        self.statuses = {}  # uç nokta -> {durum: sayı}
+        self.errors = {}  # uç nokta -> sayı (istisna)
+        self._lock = threading.Lock()
+
+    def add(self, endpoint, seconds, status):
+        with self._lock:
+            self.samples.setdefault(endpoint, []).append(seconds)
+            counts = self.statuses.setdefault(endpoint, {})
+            counts[status] = counts.get(status, 0) + 1
+
+    def error(self, endpoint):
+        with self._lock:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+
+def make_caller(client, headers, recorder, measuring):
+    def call(endpoint, method, path, body=None):
+        started = time.perf_counter()
+        try:
+            status, response_headers, data = client.request(method, path, body, headers)
+        except Exception:
+            if measuring():
+                recorder.error(endpoint)
+            raise
+        if measuring():
+            recorder.add(endpoint, time.perf_counter() - started, status)
+        return status, response_headers, data
+    return call
+
+
+def access_headers(client):
+    # Tohumlanan yönetici ile giriş; AUTH_REQUIRED açık sunucularda da çalışsın diye her istekte gönderilir
+    status, _, body = client.request('POST', '/login', {'e_mail': ADMIN_EMAIL, 'password': PASSWORD})
+    if status != 200:
+        raise SystemExit(f'Yönetici girişi başarısız ({status}): {body[:200]!r}')
+    return {'Authorization': 'Bearer ' + json.loads(body)['access_token']}
+
+
+def run_load(client_factory, data, mix, concurrency, duration, requests, warmup, seed):
+    recorder = Recorder()
+    headers = access_headers(client_factory())
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    started = time.perf_counter()
+    measure_from = started + warmup
+    deadline = measure_from + duration if duration else None
+    remaining = [requests] if requests else None
+    lock = threading.Lock()
+
+    def measuring():
+        return time.perf_counter() >= measure_from
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        call = make_caller(client_factory(), headers, recorder, measuring)
+        while True:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            if remaining is not None:
+                with lock:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+            name = rng.choices(names, weights)[0]
+            try:
+                SCENARIOS[name][0](call, rng, data)
+            except Exception:
+                pass  # hata call içinde sayıldı
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return recorder, time.perf_counter() - measure_from
+
+
+def memory_profile(client, headers, data, mix, samples, seed):
+    # Süreç içi hedefte uç nokta başına Python bellek kullanımı (tracemalloc); ölçüm süreleri
+    # bozmaması için yük testinden sonra, tek iş parçacığında ayrı yapılır
+    stats = {}
+    rng = random.Random(seed)
+
+    def call(endpoint, method, path, body=None):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        result = client.request(method, path, body, headers)
+        current, peak = tracemalloc.get_traced_memory()
+        item = stats.setdefault(endpoint, {'peak': [], 'retained': []})
+        item['peak'].append(peak - before)
+        item['retained'].append(current - before)
+        return result
+
+    tracemalloc.start()
+    try:
+        for name in mix:
+            for _ in range(samples):
+                try:
+                    SCENARIOS[name][0](call, rng, data)
+                except Exception:
+                    pass
+    finally:
+        tracemalloc.stop()
+    return {endpoint: {'peak_kb_mean': round(sum(v['peak']) / len(v['peak']) / 1024, 1),
+                       'peak_kb_max': round(max(v['peak']) / 1024, 1),
+                       'retained_bytes_mean': round(sum(v['retained']) / len(v['retained']))}
+            for endpoint, v in stats.items()}
+
+
+def summarize(recorder, seconds, memory):
+    endpoints = {}
+    total = 0
+    failures = 0
+    for endpoint in sorted(set(recorder.samples) | set(recorder.errors)):
+        values = sorted(recorder.samples.get(endpoint, []))
+        statuses = recorder.statuses.get(endpoint, {})
+        bad = sum(c for s, c in statuses.items() if s >= 500) + recorder.errors.get(endpoint, 0)
+        total += len(values)
+        failures += bad
+        endpoints[endpoint] = {
+            'requests': len(values),
+            'requests_per_second': round(len(values) / seconds, 1) if seconds else None,
+            'statuses': {str(s): c for s, c in sorted(statuses.items())},
+            'errors': bad,
+            'latency_ms': {
+                'mean': round(sum(values) / len(values) * 1000, 2) if values else None,
+                **{name: round(percentile(values, q) * 1000, 2) if values else None
+                   for name, q in (('p50', 0.5), ('p90', 0.9), ('p95', 0.95), ('p99', 0.99))},
+                'max': round(values[-1] * 1000, 2) if values else None,
+            },
+            'memory': memory.get(endpoint),
+        }
+    return {
+        'requests': total,
+        'seconds': round(seconds, 2),
+        'requests_per_second': round(total / seconds, 1) if seconds else None,
+        'errors': failures,
+    }, endpoints
+
+
+def git_revision():
+    here = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=here, capture_output=True, text=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=here,
+                                    capture_output=True, text=True).stdout.strip())
+    except OSError:
+        return None
+    return {'commit': commit or None, 'dirty': dirty}
+
+
+def server_settings():
+    # Süreç içi hedefte sonucu etkileyen ayarlar
+    names = ['DB_POOL_MAX', 'DB_PREPARED_STATEMENTS', 'PASSWORD_HASH_COST', 'LOGIN_NEGATIVE_TTL',
+             'LOGIN_CREDENTIAL_TTL', 'LAST_LOGIN_FLUSH_MS', 'METRICS_ENABLED', 'AUTH_REQUIRED', 'CACHE_BACKEND']
+    return {name: getattr(config, name, None) for name in names}
+
+
+# --- Komutlar ---
+
+def command_seed(args):
+    counts = dict(PRESETS[args.scale])
+    for key in counts:
+        if getattr(args, key) is not None:
+            counts[key] = getattr(args, key)
+    from auth import PasswordHasher
+    hasher = PasswordHasher(cost=config.PASSWORD_HASH_COST)
+    password_hash = hasher.hash(PASSWORD)  # tüm kullanıcılar aynı özeti paylaşır
+    hasher.shutdown()
+    conn = connect(args.dsn)
+    cur = conn.cursor()
+    result = {}
+    if args.apply_schema:
+        result['schema_applied'] = apply_schema(cur)
+    result['deleted'] = reset(cur)
+    result['seconds'] = seed(cur, counts, random.Random(args.seed), password_hash)
+    conn.commit()
+    result['dataset'] = dataset(cur)
+    result['dataset']['roles'] = len(result['dataset']['roles'])
+    conn.close()
+    print(json.dumps(result, indent=2))
+
+
+def command_reset(args):
+    conn = connect(args.dsn)
+    cur = conn.cursor()
+    deleted = reset(cur)
+    conn.commit()
+    conn.close()
+    print(json.dumps({'deleted': deleted}, indent=2))
+
+
+def command_run(args):
+    conn = connect(args.dsn)
+    data = dataset(conn.cursor())
+    conn.close()
+    mix = parse_mix(args.mix)
+
+    if args.target == 'inprocess':
+        if args.dsn:
+            raise SystemExit('--dsn süreç içi hedefte kullanılamaz; DB_HOST/DB_NAME ortam değişkenlerini verin')
+        import app as backend
+        client_factory = lambda: InProcessClient(backend.app)
+        settings = server_settings()
+    else:
+        client_factory = lambda: HttpClient(args.target)
+        settings = None
+
+    rss_before = rss_kb()
+    recorder, seconds = run_load(client_factory, data, mix, args.concurrency, args.duration, args.requests,
+                                 args.warmup, args.seed)
+    rss_after = rss_kb()
+    memory = {}
+    if args.target == 'inprocess' and args.memory_samples:
+        client = client_factory()
+        memory = memory_profile(client, access_headers(client), data, mix, args.memory_samples, args.seed)
+    totals, endpoints = summarize(recorder, seconds, memory)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'git': git_revision(),
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            'target': args.target,
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'requests': args.requests,
+            'warmup': args.warmup,
+            'seed': args.seed,
+            'mix': mix,
+            'settings': settings,
+            'dataset': {k: (v['count'] if isinstance(v, dict) else len(v)) for k, v in data.items()},
+        },
+        'totals': totals,
+        'process_memory_kb': {'rss_before': rss_before, 'rss_after': rss_after,
+                              'max_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss},
+        'endpoints': endpoints,
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    print(output)
+
+
+def command_compare(args):
+    # İki raporun uç nokta bazında farkı (yüzde; pozitif = yeni rapor daha yüksek)
+    with open(args.base, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(args.new, encoding='utf-8') as f:
+        new = json.load(f)
+
+    def change(old, current):
+        return round((current - old) / old * 100, 1) if old and current is not None else None
+
+    endpoints = {}
+    for endpoint in sorted(set(base['endpoints']) | set(new['endpoints'])):
+        a, b = base['endpoints'].get(endpoint), new['endpoints'].get(endpoint)
+        if not a or not b:
+            endpoints[endpoint] = {'only_in': 'base' if a else 'new'}
+            continue
+        endpoints[endpoint] = {
+            'requests_per_second_pct': change(a['requests_per_second'], b['requests_per_second']),
+            **{f'{q}_ms_pct': change(a['latency_ms'][q], b['latency_ms'][q]) for q in ('p50', 'p95', 'p99')},
+            'errors': [a['errors'], b['errors']],
+        }
+    print(json.dumps({
+        'base': base['meta'].get('git'), 'new': new['meta'].get('git'),
+        'requests_per_second_pct': change(base['totals']['requests_per_second'], new['totals']['requests_per_second']),
+        'endpoints': endpoints,
+    }, indent=2, ensure_ascii=False))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dsn', help='config.DB_CONFIG yerine bağlanılacak PostgreSQL (seed/reset/run verisi)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed_parser = commands.add_parser('seed')
+    seed_parser.add_argument('--scale', choices=sorted(PRESETS), default='small')
+    seed_parser.add_argument('--users', type=int)
+    seed_parser.add_argument('--assistants', type=int)
+    seed_parser.add_argument('--auto-prompts', dest='auto_prompts', type=int)
+    seed_parser.add_argument('--seed', type=int, default=1)
+    seed_parser.add_argument('--apply-schema', action='store_true', help='tablolar yoksa schema.sql uygula')
+    seed_parser.set_defaults(func=command_seed)
+
+    reset_parser = commands.add_parser('reset')
+    reset_parser.set_defaults(func=command_reset)
+
+    run_parser = commands.add_parser('run')
+    run_parser.add_argument('--target', default='inprocess', help="'inprocess' veya http://host:port")
+    run_parser.add_argument('--concurrency', type=int, default=16)
+    run_parser.add_argument('--duration', type=float, default=30, help='saniye (0 = --requests kadar)')
+    run_parser.add_argument('--requests', type=int, default=0, help='senaryo sayısı (duration 0 iken)')
+    run_parser.add_argument('--warmup', type=float, default=3, help='ölçüme girmeyen ilk saniyeler')
+    run_parser.add_argument('--mix', help='ör. get_user=50,login=10 (varsayılan: tüm senaryolar)')
+    run_parser.add_argument('--seed', type=int, default=1)
+    run_parser.add_argument('--memory-samples', type=int, default=20, help='uç nokta bellek ölçümü (süreç içi)')
+    run_parser.add_argument('--output')
+    run_parser.set_defaults(func=command_run)
+
+    compare_parser = commands.add_parser('compare')
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('new')
+    compare_parser.set_defaults(func=command_compare)
+
+    args = parser.parse_args()
+    if args.command == 'run' and not args.duration and not args.requests:
+        parser.error('--duration veya --requests verilmeli')
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
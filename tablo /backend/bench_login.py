@@ -0,0 +1,159 @@
+# /login için giriş fırtınası ölçümü: doğru girişler, var olan e-postalara yanlış şifre
+# denemeleri (credential stuffing) ve bilinmeyen e-postalar birlikte, çok iş parçacığıyla gönderilir.
+#   python bench_login.py --users 200 --requests 5000 --threads 16 --stuffing 0.7
+# config.DB_CONFIG veritabanına login-<etiket>-N@example.com kullanıcıları eklenir ve sonunda
+# silinir. Giriş önbelleği kapalı (LOGIN_*_TTL=0) ve açık iki mod ayrı süreçlerde çalışır.
+#   python bench_login.py --bulk-hash 2000
+# Toplu kullanıcı yüklemesindeki şifre özetleme: tek tek (for_storage) ve kolon halinde paralel
+# (for_storage_many) özetleme süreleri; veritabanı gerekmez.
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+# Sızdırılmış listelerden tekrar tekrar denenen şifreler
+COMMON_PASSWORDS = ['123456', 'password', 'qwerty', '111111', 'abc123', 'sifre123', 'admin', 'letmein']
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def measure(users, requests, threads, stuffing, unknown):
+    import app as backend
+
+    tag = uuid.uuid4().hex[:8]
+    password = 'Dogru-Sifre-1'
+    emails = [f'login-{tag}-{i}@example.com' for i in range(users)]
+    # Tüm kullanıcılar aynı özeti paylaşır; tohumlama süresi ölçüme girmez
+    stored = backend.passwords.hash(password)
+    with backend.get_pool().connection() as conn:
+        cur = conn.cursor()
+        cur.executemany('INSERT INTO llm_platform.users (name, e_mail, password) VALUES (%s, %s, %s)',
+                        [('login-bench', email, stored) for email in emails])
+        conn.commit()
+        cur.close()
+
+    rng = random.Random(7)
+    plan = []
+    for _ in range(requests):
+        roll = rng.random()
+        if roll < unknown:
+            plan.append((f'yok-{rng.randrange(users)}@example.com', rng.choice(COMMON_PASSWORDS), 'unknown'))
+        elif roll < unknown + stuffing:
+            plan.append((rng.choice(emails), rng.choice(COMMON_PASSWORDS), 'stuffing'))
+        else:
+            plan.append((rng.choice(emails), password, 'valid'))
+
+    latencies = {'valid': [], 'stuffing': [], 'unknown': []}
+    statuses = {}
+    lock = threading.Lock()
+    cursor = iter(plan)
+
+    def worker():
+        client = backend.app.test_client()
+        while True:
+            with lock:
+                item = next(cursor, None)
+            if item is None:
+                return
+            email, attempt, kind = item
+            started = time.perf_counter()
+            response = client.post('/login', json={'e_mail': email, 'password': attempt})
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies[kind].append(elapsed)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    seconds = time.perf_counter() - started
+
+    with backend.get_pool().connection() as conn:
+        cur = conn.cursor()
+        cur.execute('DELETE FROM llm_platform.users WHERE e_mail LIKE %s', (f'login-{tag}-%',))
+        conn.commit()
+        cur.close()
+
+    return {
+        'login_cache': backend.config.LOGIN_NEGATIVE_TTL > 0,
+        'hash_cost': backend.config.PASSWORD_HASH_COST,
+        'requests': requests,
+        'seconds': round(seconds, 3),
+        'requests_per_second': round(requests / seconds) if seconds else None,
+        'statuses': statuses,
+        'latency_ms': {
+            kind: {'p50': round(percentile(values, 0.5) * 1000, 2) if values else None,
+                   'p95': round(percentile(values, 0.95) * 1000, 2) if values else None,
+                   'count': len(values)}
+            for kind, values in latencies.items()
+        },
+        'cache': backend.login_cache.stats(),
+        'statements': backend.STATEMENTS.stats(),
+    }
+
+
+def measure_bulk_hash(count):
+    import config
+    from auth import PasswordHasher
+
+    hasher = PasswordHasher(cost=config.PASSWORD_HASH_COST, workers=config.PASSWORD_HASH_WORKERS)
+    values = [f'Toplu-Sifre-{i}' for i in range(count)]
+    result = {'passwords': count, 'hash_cost': config.PASSWORD_HASH_COST, 'workers': config.PASSWORD_HASH_WORKERS}
+    for mode, run in (('serial', lambda: [hasher.for_storage(v) for v in values]),
+                      ('column', lambda: hasher.for_storage_many(values))):
+        started = time.perf_counter()
+        run()
+        seconds = time.perf_counter() - started
+        result[mode] = {'seconds': round(seconds, 3), 'per_second': round(count / seconds) if seconds else None}
+    hasher.shutdown()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--stuffing', type=float, default=0.7, help='yanlış şifre oranı')
+    parser.add_argument('--unknown', type=float, default=0.1, help='bilinmeyen e-posta oranı')
+    parser.add_argument('--bulk-hash', type=int, default=0, help='sadece toplu şifre özetlemeyi ölç')
+    parser.add_argument('--child', action='store_true')
+    args = parser.parse_args()
+
+    if args.bulk_hash:
+        print(json.dumps(measure_bulk_hash(args.bulk_hash), indent=2))
+        return
+
+    if args.child:
+        print(json.dumps(measure(args.users, args.requests, args.threads, args.stuffing, args.unknown)))
+        return
+
+    results = []
+    for ttl in ('0', None):
+        env = dict(os.environ)
+        if ttl is not None:
+            env.update(LOGIN_NEGATIVE_TTL=ttl, LOGIN_CREDENTIAL_TTL=ttl)
+        output = subprocess.run(
+            [sys.executable, __file__, '--child', '--users', str(args.users), '--requests', str(args.requests),
+             '--threads', str(args.threads), '--stuffing', str(args.stuffing), '--unknown', str(args.unknown)],
+            check=True, capture_output=True, text=True, env=env,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    print(json.dumps({'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+# Derlenmiş rol izinlerinin istek başına maliyetini ölçer; veritabanı gerekmez.
+#   python bench_permissions.py --roles 1000 10000 --checks 200000
+# Rastgele roles.permissions JSON'ları üretilir ve derlenir. Ardından şunlar ölçülür:
+#   - kontrol başına süre: derlenmiş bit kümesi ile, ve her kontrolde JSON'u çözen
+#     basit yöntemle
+#   - authorize() before_request'inin eklediği süre: token'lı istek ile token'sız istek
+#     arasındaki fark
+import argparse
+import json
+import random
+import time
+
+from listing import TABLES
+from permissions import ACTIONS, PermissionEngine, parse_permissions
+
+VALUES = ['read', 'write', 'rw', ['read'], 'r', 'none']
+
+
+def random_permissions(rng):
+    tables = rng.sample(sorted(TABLES), rng.randrange(len(TABLES) + 1))
+    permissions = {table: rng.choice(VALUES) for table in tables}
+    if rng.random() < 0.3:
+        permissions['all'] = 'read'
+    return json.dumps(permissions)
+
+
+def naive_check(role, table, action):
+    parsed = parse_permissions(role['permissions'])
+    return bool(role['admin_or_not']) or action in parsed.get(table, parsed.get('*', ()))
+
+
+def per_check_ns(fn, plan):
+    started = time.perf_counter()
+    for args in plan:
+        fn(*args)
+    return round((time.perf_counter() - started) / len(plan) * 1e9)
+
+
+def measure_engine(count, checks, rng):
+    roles = {role_id: {'permissions': random_permissions(rng), 'admin_or_not': rng.random() < 0.02}
+             for role_id in range(1, count + 1)}
+    engine = PermissionEngine(TABLES, ttl=3600)
+    started = time.perf_counter()
+    for role_id, role in roles.items():
+        engine.store(role_id, role)
+    compile_us = (time.perf_counter() - started) / count * 1e6
+
+    plan = [(rng.randrange(1, count + 1), rng.choice(sorted(TABLES)), rng.choice(ACTIONS)) for _ in range(checks)]
+    mismatches = sum(engine.check(engine.lookup(r), t, a) != naive_check(roles[r], t, a) for r, t, a in plan[:10000])
+    return {
+        'roles': count,
+        'compile_us_per_role': round(compile_us, 2),
+        'compiled_ns_per_check': per_check_ns(lambda r, t, a: engine.check(engine.lookup(r), t, a), plan),
+        'naive_ns_per_check': per_check_ns(lambda r, t, a: naive_check(roles[r], t, a), plan),
+        'mismatches': mismatches,
+    }
+
+
+def measure_request(count, requests, rng):
+    import app as backend
+
+    # İptal listesi yüklü sayılır; ölçüm sırasında veritabanına gidilmez
+    backend.tokens.revocations.refresh_interval = float('inf')
+    backend.tokens.revocations.needs_refresh()
+    backend.tokens.revocations.replace({}, {})
+    for role_id in range(1, count + 1):
+        backend.role_permissions.store(role_id, {'permissions': random_permissions(rng), 'admin_or_not': False})
+    backend.role_permissions.ttl = 3600
+    headers = [{'Authorization': 'Bearer ' + backend.tokens.issue({'id': i, 'role_id': rng.randrange(1, count + 1)})['access_token']}
+               for i in range(1000)]
+    paths = [f'/{table}' for table in sorted(TABLES)]
+
+    def run(with_token):
+        started = time.perf_counter()
+        for i in range(requests):
+            with backend.app.test_request_context(paths[i % len(paths)], headers=headers[i % len(headers)] if with_token else None):
+                backend.authorize()
+        return (time.perf_counter() - started) / requests * 1e6
+
+    run(True)
+    without, with_token = run(False), run(True)
+    return {'roles': count, 'request_us': round(without, 2), 'authorized_request_us': round(with_token, 2),
+            'overhead_us': round(with_token - without, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--roles', type=int, nargs='+', default=[10, 1000, 10000])
+    parser.add_argument('--checks', type=int, default=200000)
+    parser.add_argument('--requests', type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(19)
+    print(json.dumps({
+        'engine': [measure_engine(count, args.checks, rng) for count in args.roles],
+        'request': measure_request(max(args.roles), args.requests, rng),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+# prepare() için tam tablo ve parçalı Pipeline yaklaşımlarını karşılaştırır.
+#   python bench_prepare.py --rows 10000000 --chunk-rows 500000
+# Her yöntem ayrı bir süreçte çalışır; süre ve en yüksek bellek (RSS) JSON olarak yazdırılır.
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import prep
+
+SEED_CHUNK = 1_000_000
+CATEGORIES = np.array(['elektronik', 'giyim', 'gida', 'kitap', 'oyuncak'], dtype=object)
+
+
+def synthetic_chunks(rows, chunk_rows):
+    rng = np.random.default_rng(42)
+    for start in range(0, rows, chunk_rows):
+        n = min(chunk_rows, rows - start)
+        yield pd.DataFrame({
+            'order_id': np.arange(start, start + n, dtype=np.int64),
+            'price': rng.uniform(1, 500, n).round(2),
+            'quantity': rng.integers(1, 20, n, dtype=np.int64),
+            'category': CATEGORIES[rng.integers(0, len(CATEGORIES), n)],
+        })
+
+
+def legacy_prepare(df):
+    # Eski uygulama: tüm tabloyu yerinde değiştirir
+    df['total'] = df['price'] * df['quantity']
+    return df
+
+
+def run_full(rows, chunk_rows, out):
+    df = pd.concat(synthetic_chunks(rows, SEED_CHUNK), ignore_index=True)
+    df = legacy_prepare(df)
+    df.to_parquet(os.path.join(out, 'full.parquet'), index=False)
+    return len(df)
+
+
+def run_pipeline(rows, chunk_rows, out):
+    # Aynı çıktı, parça parça
+    manifest = prep.PREPARE.to_parquet(synthetic_chunks(rows, chunk_rows), os.path.join(out, 'pipeline'),
+                                       source_key=f'synthetic:{rows}')
+    return manifest['rows']
+
+
+def run_partitioned(rows, chunk_rows, out):
+    # Tip küçültme + kategoriye göre bölümlenmiş Parquet
+    pipe = prep.Pipeline([prep.product('total', 'price', 'quantity'), prep.downcast], chunk_rows=chunk_rows)
+    manifest = pipe.to_parquet(synthetic_chunks(rows, chunk_rows), os.path.join(out, 'partitioned'),
+                               partition_cols=['category'], source_key=f'synthetic:{rows}')
+    return manifest['rows']
+
+
+MODES = {'full': run_full, 'pipeline': run_pipeline, 'partitioned': run_partitioned}
+
+
+def measure(mode, rows, chunk_rows):
+    out = tempfile.mkdtemp(prefix='bench_prepare_')
+    try:
+        started = time.perf_counter()
+        produced = MODES[mode](rows, chunk_rows, out)
+        seconds = time.perf_counter() - started
+        size = sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(out) for f in files)
+    finally:
+        shutil.rmtree(out, ignore_errors=True)
+    return {
+        'mode': mode,
+        'rows': produced,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(produced / seconds) if seconds else None,
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'output_mb': round(size / 1024 / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--chunk-rows', type=int, default=prep.DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--mode', choices=sorted(MODES))
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(measure(args.mode, args.rows, args.chunk_rows)))
+        return
+
+    # Ölçümler birbirinin bellek kullanımını etkilemesin diye her yöntem yeni süreçte
+    results = []
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, __file__, '--mode', mode, '--rows', str(args.rows),
+             '--chunk-rows', str(args.chunk_rows)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(output))
+    print(json.dumps({'rows': args.rows, 'chunk_rows': args.chunk_rows, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
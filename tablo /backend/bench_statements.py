@@ -0,0 +1,99 @@
+# Hazır sorgu (PREPARE/EXECUTE) kaydının CRUD route'larına etkisini ölçer.
+#   python bench_statements.py --requests 2000
+# config.DB_CONFIG veritabanında bench-<etiket>-N@example.com e-postalı geçici kullanıcılar
+# oluşturulur ve sonunda silinir. Her mod (DB_PREPARED_STATEMENTS=0/1) ayrı süreçte çalışır;
+# istek/saniye değerleri JSON olarak yazdırılır.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+
+def measure(requests, warmup):
+    import app as backend
+
+    client = backend.app.test_client()
+    tag = uuid.uuid4().hex[:8]
+
+    def email(i):
+        return f'bench-{tag}-{i}@example.com'
+
+    # Bağlantılar açılsın ve (açıksa) sorgular hazırlansın
+    for i in range(warmup):
+        client.post('/users', json={'name': 'isinma', 'surname': 'bench', 'e_mail': email(f'w{i}')})
+
+    phases = {}
+    started = time.perf_counter()
+    for i in range(requests):
+        client.post('/users', json={'name': 'bench', 'surname': str(i), 'password': 'x', 'e_mail': email(i)})
+    phases['insert'] = time.perf_counter() - started
+
+    with backend.get_pool().connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT id FROM llm_platform.users WHERE e_mail LIKE %s AND name = 'bench' ORDER BY id",
+                    (f'bench-{tag}-%',))
+        ids = [row[0] for row in cur.fetchall()]
+        cur.close()
+
+    started = time.perf_counter()
+    for user_id in ids:
+        client.get(f'/users/{user_id}')
+    phases['get'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for user_id in ids:
+        client.put(f'/users/{user_id}', json={'name': 'bench', 'surname': 'guncel', 'e_mail': email(user_id)})
+    phases['update'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for user_id in ids:
+        client.delete(f'/users/{user_id}')
+    phases['delete'] = time.perf_counter() - started
+
+    with backend.get_pool().connection() as conn:
+        cur = conn.cursor()
+        cur.execute('DELETE FROM llm_platform.users WHERE e_mail LIKE %s', (f'bench-{tag}-%',))
+        conn.commit()
+        cur.close()
+
+    total = sum(phases.values())
+    return {
+        'prepared': backend.STATEMENTS.enabled,
+        'requests': len(ids) * 4,
+        'seconds': round(total, 3),
+        'requests_per_second': round(len(ids) * 4 / total) if total else None,
+        'phases': {name: round(len(ids) / seconds) if seconds else None for name, seconds in phases.items()},
+        'statements': backend.STATEMENTS.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2000, help='faz başına istek sayısı')
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--child', action='store_true')
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.requests, args.warmup)))
+        return
+
+    results = []
+    for prepared in ('0', '1'):
+        output = subprocess.run(
+            [sys.executable, __file__, '--child', '--requests', str(args.requests), '--warmup', str(args.warmup)],
+            check=True, capture_output=True, text=True,
+            env=dict(os.environ, DB_PREPARED_STATEMENTS=prepared),
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    before, after = results
+    speedup = (after['requests_per_second'] / before['requests_per_second']
+               if before['requests_per_second'] else None)
+    print(json.dumps({'results': results, 'speedup': round(speedup, 2) if speedup else None}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+import csv
+import io
+import json
+
+import psycopg2
+import psycopg2.extras
+from psycopg2 import sql
+
+from listing import TABLES, SCHEMA
+
+# execute_values ile tek seferde gönderilecek satır sayısı
+BATCH_SIZE = 1000
+# Cevapta döndürülecek en fazla satır hatası
+MAX_REPORTED_ERRORS = 1000
+
+# dict/list gelirse JSON metnine çevrilecek kolonlar
+JSON_COLUMNS = {
+    'roles': {'permissions'},
+    'assistants': {'parameters', 'trigger_time'},
+    'auto_prompt': {'trigger_time'},
+}
+
+CONFLICT_ACTIONS = ('nothing', 'update')
+
+
+class BulkError(ValueError):
+    pass
+
+
+def _parse_json_array(text):
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        raise BulkError(f'Geçersiz JSON: {e}')
+    if not isinstance(data, list):
+        raise BulkError('JSON gövdesi bir dizi olmalı')
+    return [(i, row, None) for i, row in enumerate(data)]
+
+
+def _parse_ndjson(text):
+    rows = []
+    for i, line in enumerate(l for l in text.splitlines() if l.strip()):
+        try:
+            rows.append((i, json.loads(line), None))
+        except ValueError as e:
+            rows.append((i, None, f'Geçersiz JSON satırı: {e}'))
+    return rows
+
+
+def _parse_csv(text):
+    reader = csv.DictReader(io.StringIO(text))
+    # CSV'de boş hücre NULL kabul edilir
+    return [(i, {k: (v if v != '' else None) for k, v in row.items()}, None)
+            for i, row in enumerate(reader)]
+
+
+def parse_payload(body, content_type='', filename=''):
+    # Dönen liste: (satır_no, dict, hata)
+    if isinstance(body, bytes):
+        body = body.decode('utf-8-sig')
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    filename = (filename or '').lower()
+    if content_type == 'text/csv' or filename.endswith('.csv'):
+        return _parse_csv(body)
+    if content_type in ('application/x-ndjson', 'application/jsonl') or filename.endswith(('.ndjson', '.jsonl')):
+        return _parse_ndjson(body)
+    return _parse_json_array(body)
+
+
+def _prepare_row(table, row, writable, transforms=None):
+    if not isinstance(row, dict):
+        raise BulkError('Satır bir JSON nesnesi olmalı')
+    unknown = [k for k in row if k not in writable]
+    if unknown:
+        raise BulkError('Bilinmeyen kolon(lar): ' + ', '.join(unknown))
+    json_columns = JSON_COLUMNS.get(table, set())
+    prepared = {}
+    for key, value in row.items():
+        if key in json_columns and isinstance(value, (dict, list)):
+            value = json.dumps(value)
+        if transforms and key in transforms:
+            value = transforms[key](value)
+        prepared[key] = value
+    return prepared
+
+
+def _resolve_assistant_titles(cur, items, errors):
+    # auto_prompt satırlarında asistan_id yerine assistant_title gelebilir;
+    # tüm başlıklar tek sorguyla çözülür
+    titles = {row['assistant_title'] for _, row in items if row.get('assistant_title')}
+    mapping = {}
+    if titles:
+        cur.execute('SELECT title, asistan_id FROM llm_platform.assistants WHERE title = ANY(%s)', (list(titles),))
+        mapping = dict(cur.fetchall())
+    resolved = []
+    for index, row in items:
+        if 'assistant_title' in row:
+            title = row.pop('assistant_title')
+            if title is not None and 'asistan_id' not in row:
+                if title not in mapping:
+                    errors.append({'row': index, 'error': f'assistant_title bulunamadı: {title}'})
+                    continue
+                row['asistan_id'] = mapping[title]
+        resolved.append((index, row))
+    return resolved
+
+
+def _copy_literal(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        value = 'true' if value else 'false'
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _insert_sql(table, columns, on_conflict, conflict_target):
+    query = sql.SQL('INSERT INTO {} ({}) VALUES %s').format(
+        sql.Identifier(SCHEMA, table),
+        sql.SQL(', ').join(map(sql.Identifier, columns)),
+    )
+    if on_conflict == 'nothing':
+        query += sql.SQL(' ON CONFLICT DO NOTHING')
+    elif on_conflict == 'update':
+        updates = [c for c in columns if c != conflict_target]
+        if updates:
+            query += sql.SQL(' ON CONFLICT ({}) DO UPDATE SET {}').format(
+                sql.Identifier(conflict_target),
+                sql.SQL(', ').join(
+                    sql.SQL('{0} = EXCLUDED.{0}').format(sql.Identifier(c)) for c in updates
+                ),
+            )
+        else:
+            query += sql.SQL(' ON CONFLICT ({}) DO NOTHING').format(sql.Identifier(conflict_target))
+    return query + sql.SQL(' RETURNING 1')
+
+
+class BulkLoader:
+    def __init__(self, cur, table, on_conflict=None, conflict_target=None, transforms=None, column_transforms=None):
+        spec = TABLES[table]
+        if on_conflict is not None and on_conflict not in CONFLICT_ACTIONS:
+            raise BulkError(f'Geçersiz on_conflict: {on_conflict}')
+        conflict_target = conflict_target or spec['pk']
+        if conflict_target not in spec['columns']:
+            raise BulkError(f'Geçersiz conflict_target: {conflict_target}')
+        self.cur = cur
+        self.table = table
+        self.on_conflict = on_conflict
+        self.conflict_target = conflict_target
+        # kolon -> fonksiyon; değer yazılmadan önce dönüştürülür (ör. users.password özetlenir)
+        self.transforms = transforms or {}
+        # kolon -> fonksiyon(değerler) -> değerler; geçerli satırların kolonu tek çağrıyla dönüştürülür
+        # (ör. users.password özetleri paralel hesaplanır)
+        self.column_transforms = column_transforms or {}
+        self.writable = set(spec['columns'])
+        if table == 'auto_prompt':
+            self.writable.add('assistant_title')
+        self.loaded = 0
+        self.errors = []
+
+    def _error(self, index, message):
+        self.errors.append({'row': index, 'error': message})
+
+    def _copy(self, columns, rows):
+        buf = io.StringIO()
+        for _, values in rows:
+            buf.write(','.join(_copy_literal(v) for v in values))
+            buf.write('\n')
+        buf.seek(0)
+        query = sql.SQL('COPY {} ({}) FROM STDIN WITH (FORMAT csv)').format(
+            sql.Identifier(SCHEMA, self.table),
+            sql.SQL(', ').join(map(sql.Identifier, columns)),
+        )
+        self.cur.copy_expert(query.as_string(self.cur), buf)
+        return len(rows)
+
+    def _execute_values(self, query, rows):
+        result = psycopg2.extras.execute_values(
+            self.cur, query, [values for _, values in rows], page_size=BATCH_SIZE, fetch=True
+        )
+        return len(result)
+
+    def _insert_batch(self, query, batch):
+        # Parti hata verirse savepoint'e dönülür ve satırlar tek tek denenerek
+        # hatalı olanlar raporlanır; diğerleri aynı transaction'da kalır
+        self.cur.execute('SAVEPOINT bulk_batch')
+        try:
+            self.loaded += self._execute_values(query, batch)
+            self.cur.execute('RELEASE SAVEPOINT bulk_batch')
+            return
+        except psycopg2.Error:
+            self.cur.execute('ROLLBACK TO SAVEPOINT bulk_batch')
+        for row in batch:
+            self.cur.execute('SAVEPOINT bulk_row')
+            try:
+                self.loaded += self._execute_values(query, [row])
+                self.cur.execute('RELEASE SAVEPOINT bulk_row')
+            except psycopg2.Error as e:
+                self.cur.execute('ROLLBACK TO SAVEPOINT bulk_row')
+                self._error(row[0], (e.pgerror or str(e)).strip())
+        self.cur.execute('RELEASE SAVEPOINT bulk_batch')
+
+    def _load_group(self, columns, rows):
+        if self.on_conflict is None:
+            # Çakışma kuralı yoksa en hızlı yol COPY; hata olursa satır bazlı yola düş
+            self.cur.execute('SAVEPOINT bulk_copy')
+            try:
+                self.loaded += self._copy(columns, rows)
+                self.cur.execute('RELEASE SAVEPOINT bulk_copy')
+                return
+            except psycopg2.Error:
+                self.cur.execute('ROLLBACK TO SAVEPOINT bulk_copy')
+        query = _insert_sql(self.table, columns, self.on_conflict, self.conflict_target)
+        for start in range(0, len(rows), BATCH_SIZE):
+            self._insert_batch(query, rows[start:start + BATCH_SIZE])
+
+    def load(self, parsed):
+        items = []
+        for index, row, error in parsed:
+            if error:
+                self._error(index, error)
+                continue
+            try:
+                items.append((index, _prepare_row(self.table, row, self.writable, self.transforms)))
+            except BulkError as e:
+                self._error(index, str(e))
+        if self.table == 'auto_prompt':
+            items = _resolve_assistant_titles(self.cur, items, self.errors)
+        for column, transform in self.column_transforms.items():
+            rows = [row for _, row in items if column in row]
+            for row, value in zip(rows, transform([row[column] for row in rows])):
+                row[column] = value
+
+        # Aynı kolon kümesine sahip satırlar birlikte yüklenir; eksik kolonlar
+        # NULL yerine tablonun DEFAULT değerini alır
+        groups = {}
+        for index, row in items:
+            columns = tuple(sorted(row))
+            groups.setdefault(columns, []).append((index, [row[c] for c in columns]))
+        for columns, rows in groups.items():
+            if not columns:
+                for index, _ in rows:
+                    self._error(index, 'Boş satır')
+                continue
+            self._load_group(list(columns), rows)
+        self.errors.sort(key=lambda e: e['row'])
+        return self.report(len(parsed))
+
+    def report(self, total):
+        return {
+            'status': 'success' if not self.errors else 'partial',
+            'total': total,
+            'loaded': self.loaded,
+            'failed': len(self.errors),
+            'errors': self.errors[:MAX_REPORTED_ERRORS],
+        }
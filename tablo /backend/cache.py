@@ -0,0 +1,194 @@
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoryBackend:
+    # Süreç içi TTL + LRU önbellek
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()  # key -> (bitiş zamanı, değer)
+        # Sürüm sayaçları LRU'dan ayrı tutulur; silinirlerse eski girdiler geri dönerdi
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires is not None and expires <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def counter(self, key):
+        return self._counters.get(key, 0)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SharedBackend:
+    # Redis benzeri bir istemci üzerinden tüm worker'ların paylaştığı önbellek.
+    # İstemcinin get/set(ex=)/delete/incr desteklemesi yeterli.
+
+    def __init__(self, client, prefix='tablo:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return None if raw is None else pickle.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=int(ttl) if ttl else None)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+    def counter(self, key):
+        return int(self.client.get(self.prefix + key) or 0)
+
+
+class LocalSharedClient:
+    # Redis yokken (yerel geliştirme/test) SharedBackend'e verilebilecek bellek içi istemci
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires is not None and expires <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ex if ex else None)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            value, expires = self._data.get(key, (b'0', None))
+            value = int(value) + 1
+            self._data[key] = (str(value).encode(), expires)
+            return value
+
+
+class TableCache:
+    # Liste ve başlık aramaları tablonun sürüm numarasını anahtarda taşır; tabloya
+    # yazılınca sürüm artar ve eski girdiler kendiliğinden geçersiz olur.
+    # Tek kayıt (get-by-id) girdileri sadece o kayıt değişince silinir.
+
+    def __init__(self, backend, ttl=60):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, table):
+        return self.backend.counter(f'ver:{table}')
+
+    def _epoch(self, table):
+        return self.backend.counter(f'epoch:{table}')
+
+    def list_key(self, table, query_string=''):
+        return f'{table}:v{self.version(table)}:list:{query_string}'
+
+    def lookup_key(self, table, name, value):
+        return f'{table}:v{self.version(table)}:{name}:{value}'
+
+    def record_key(self, table, record_id):
+        return f'{table}:e{self._epoch(table)}:id:{record_id}'
+
+    def get_or_load(self, key, loader, ttl=None):
+        value = self.backend.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = loader()
+        if value is not None:
+            self.backend.set(key, value, ttl or self.ttl)
+        return value
+
+    async def aget_or_load(self, key, loader, ttl=None):
+        # get_or_load'un asyncio sürümü; loader bir coroutine fonksiyonudur
+        value = self.backend.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = await loader()
+        if value is not None:
+            self.backend.set(key, value, ttl or self.ttl)
+        return value
+
+    def invalidate(self, table, record_id=None, bulk=False):
+        self.backend.incr(f'ver:{table}')
+        if record_id is not None:
+            self.backend.delete(self.record_key(table, record_id))
+        if bulk:
+            # Toplu yükleme hangi kayıtlara dokunduğunu bilmez; tüm tek kayıt girdileri düşer
+            self.backend.incr(f'epoch:{table}')
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': (self.hits / total) if total else 0.0,
+        }
+
+
+def json_entry(body, **extra):
+    # Önbelleğe konan cevap: JSON baytları + içerikten hesaplanan ETag
+    if isinstance(body, str):
+        body = body.encode()
+    entry = {'body': body, 'etag': hashlib.md5(body).hexdigest()}
+    entry.update(extra)
+    return entry
+
+
+def create_cache(backend='memory', ttl=60, maxsize=1024, redis_url=None):
+    if backend == 'redis':
+        import redis
+        return TableCache(SharedBackend(redis.Redis.from_url(redis_url)), ttl)
+    if backend == 'local-shared':
+        return TableCache(SharedBackend(LocalSharedClient()), ttl)
+    return TableCache(MemoryBackend(maxsize), ttl)
@@ -0,0 +1,243 @@
+# Tablo değişiklik akışı (schema.sql: change_log ve log_row_changes tetikleyicileri).
+# Süreç başına tek bir dinleyici bağlantısı 'table_changes' kanalını LISTEN eder; bildirim gelince
+# change_log son görülen seq'ten itibaren okunur ve olaylar bellekteki halka tampona eklenir.
+# Olaylar küçüktür: {'seq', 'table', 'op' (I/U/D/T), 'id', 'at'}; kaydın kendisi gerekiyorsa id
+# ile okunur. Abonelikler (önbellek, zamanlayıcı) dinleyici iş parçacığında çağrılır; HTTP
+# istemcileri since() / wait() ile kaldıkları seq'ten devam eder.
+#   feed = ChangeFeed(lambda: psycopg2.connect(**config.DB_CONFIG))
+#   feed.subscribe(lambda events: ...)
+#   feed.start()
+# seq'ler INSERT sırasında alınır, commit sırası farklı olabilir: 11 commit edilmeden 12
+# görünürse 12 bekletilir (olaylar hep artan seq ile ve boşluksuz verilir). Boşluk gap_timeout
+# saniye içinde dolmazsa geri alınmış transaction sayılıp geçilir; o seq sonradan görünürse
+# (uzun transaction) bağlı aboneliklere yine iletilir ama resume ile okunamayabilir.
+import logging
+import select
+import threading
+import time
+from collections import deque
+
+import psycopg2
+import psycopg2.errors
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'table_changes'
+READ_SQL = ('SELECT seq, table_name, op, row_id, changed_at FROM llm_platform.change_log '
+            'WHERE seq > %s ORDER BY seq LIMIT %s')
+LATE_SQL = ('SELECT seq, table_name, op, row_id, changed_at FROM llm_platform.change_log '
+            'WHERE seq = ANY(%s) ORDER BY seq')
+HISTORY_SQL = ('SELECT seq, table_name, op, row_id, changed_at FROM llm_platform.change_log '
+               'WHERE seq > %s AND seq <= %s ORDER BY seq LIMIT %s')
+HEAD_SQL = 'SELECT coalesce(max(seq), 0) FROM llm_platform.change_log'
+FIRST_SQL = 'SELECT min(seq) FROM llm_platform.change_log'
+# Geçilen boşluklarda geç görünmesi beklenen en fazla seq sayısı
+MAX_LATE = 1000
+PURGE_SQL = "DELETE FROM llm_platform.change_log WHERE changed_at < now() - %s * interval '1 second'"
+
+
+class ResumeError(Exception):
+    # İstenen seq artık change_log'da yok (silinmiş); istemci tabloları baştan okumalı
+    pass
+
+
+def to_event(row):
+    seq, table, op, row_id, changed_at = row
+    return {'seq': seq, 'table': table, 'op': op, 'id': row_id, 'at': changed_at.isoformat()}
+
+
+def history(cur, after, upto, limit=1000):
+    # Tampondan eski olaylar için change_log'dan okuma (istek bağlantısıyla). upto: akışın
+    # boşluksuz teslim ettiği son seq; daha yenileri henüz commit edilmemiş bir boşluğun arkasında olabilir
+    cur.execute(FIRST_SQL)
+    first = cur.fetchone()[0]
+    if first is not None and first > after + 1:
+        raise ResumeError(f'{after} sonrası değişiklikler artık tutulmuyor')
+    cur.execute(HISTORY_SQL, (after, upto, limit))
+    return [to_event(row) for row in cur.fetchall()]
+
+
+class ChangeFeed:
+    def __init__(self, connect, buffer_size=10000, batch=1000, gap_timeout=5.0, retention=86400,
+                 poll_interval=1.0):
+        # connect(): dinleyici için yeni psycopg2 bağlantısı; retention: change_log'da tutulma süresi (sn)
+        self._connect = connect
+        self.buffer_size = buffer_size
+        self.batch = batch
+        self.gap_timeout = gap_timeout
+        self.retention = retention
+        self.poll_interval = poll_interval
+        self.enabled = True
+        self.last_seq = None  # boşluksuz teslim edilen en büyük seq
+        self._events = deque()
+        self._covered_from = None  # bu seq'ten sonraki tüm olaylar tamponda
+        self._gap_since = None  # (beklenen seq, ilk görülme zamanı)
+        self._late = {}  # geçilen seq -> geçilme zamanı
+        self._subscribers = []
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+        self._purged_at = 0.0
+        self._metrics = {'events': 0, 'batches': 0, 'reconnects': 0, 'gaps_skipped': 0, 'late': 0}
+
+    def subscribe(self, callback):
+        # callback(olaylar); dinleyici iş parçacığında çağrılır, uzun iş yapmamalı
+        self._subscribers.append(callback)
+
+    def start(self):
+        # İlk istekte çağrılır (fork'tan sonra her worker'da kendi bağlantısı)
+        if self._thread is not None or not self.enabled:
+            return
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='change-feed', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    # --- dinleyici ---
+
+    def _run(self):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                conn.autocommit = True
+                cur = conn.cursor()
+                cur.execute(f'LISTEN {CHANNEL}')
+                if self.last_seq is None:
+                    # İlk bağlantı: akış şimdiden başlar; öncesi history() ile okunur
+                    cur.execute(HEAD_SQL)
+                    with self._cond:
+                        self.last_seq = self._covered_from = cur.fetchone()[0]
+                        self._cond.notify_all()
+                # Yeniden bağlanınca kopukluk sırasında yazılanlar da buradan okunur
+                self._read(cur)
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], self.poll_interval) != ([], [], []):
+                        conn.poll()
+                        conn.notifies.clear()
+                        self._read(cur)
+                    elif self._gap_since is not None or self._late:
+                        self._read(cur)
+                    self._purge(cur)
+            except psycopg2.errors.UndefinedTable:
+                self.enabled = False
+                logger.warning('llm_platform.change_log yok; değişiklik akışı kapatıldı')
+                return
+            except Exception:
+                self._metrics['reconnects'] += 1
+                logger.exception('Değişiklik akışı bağlantısı koptu, yeniden bağlanılıyor')
+                if self._stop.wait(5):
+                    return
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def _read(self, cur):
+        while True:
+            cur.execute(READ_SQL, (self.last_seq, self.batch))
+            rows = cur.fetchall()
+            events = self._accept(rows)
+            if events:
+                self._publish(events)
+            if self._late:
+                late = self._read_late(cur)
+                if late:
+                    self._notify(late)
+            # Tam parti geldiyse ve boşlukta durulmadıysa devamı okunur
+            if len(rows) < self.batch or self._gap_since is not None:
+                return
+
+    def _accept(self, rows):
+        events = []
+        expected = self.last_seq + 1
+        for row in rows:
+            seq = row[0]
+            if seq != expected:
+                now = time.monotonic()
+                if self._gap_since is None or self._gap_since[0] != expected:
+                    self._gap_since = (expected, now)
+                if now - self._gap_since[1] < self.gap_timeout:
+                    break
+                # Geri alınmış transaction; seq'ler geç görünürse ayrıca iletilir (büyük
+                # boşluklar, ör. geri alınan toplu yükleme, izlenmez)
+                if seq - expected <= MAX_LATE:
+                    for missing in range(expected, seq):
+                        self._late[missing] = now
+                self._metrics['gaps_skipped'] += seq - expected
+            self._gap_since = None
+            events.append(to_event(row))
+            self.last_seq = seq
+            expected = seq + 1
+        return events
+
+    def _read_late(self, cur):
+        now = time.monotonic()
+        for seq, skipped_at in list(self._late.items()):
+            if now - skipped_at > self.gap_timeout * 60:
+                del self._late[seq]
+        if not self._late:
+            return []
+        cur.execute(LATE_SQL, (list(self._late),))
+        rows = cur.fetchall()
+        for row in rows:
+            del self._late[row[0]]
+        self._metrics['late'] += len(rows)
+        return [to_event(row) for row in rows]
+
+    def _publish(self, events):
+        with self._cond:
+            self._events.extend(events)
+            while len(self._events) > self.buffer_size:
+                self._covered_from = self._events.popleft()['seq']
+            self._metrics['events'] += len(events)
+            self._metrics['batches'] += 1
+            self._cond.notify_all()
+        self._notify(events)
+
+    def _notify(self, events):
+        for callback in self._subscribers:
+            try:
+                callback(events)
+            except Exception:
+                logger.exception('Değişiklik aboneliği başarısız')
+
+    def _purge(self, cur):
+        # Tutulma süresi geçen kayıtlar saatte bir silinir (her worker dener; iş tekrarlanmaz)
+        if not self.retention or time.monotonic() - self._purged_at < 3600:
+            return
+        self._purged_at = time.monotonic()
+        cur.execute(PURGE_SQL, (self.retention,))
+
+    # --- okuyucular ---
+
+    def since(self, after, tables=None):
+        # (after'dan sonraki olaylar, yeni konum); tampon yetmiyorsa None (history() ile okunmalı).
+        # Geç görünen seq'ler tampona girmez (sadece aboneliklere iletilir)
+        with self._cond:
+            if self._covered_from is None or after < self._covered_from:
+                return None
+            events = [e for e in self._events if e['seq'] > after and (tables is None or e['table'] in tables)]
+            return events, max(after, self.last_seq)
+
+    def wait(self, after, timeout):
+        # after'dan büyük bir olay gelene (veya süre dolana) kadar bekler
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self.last_seq is None or self.last_seq <= after:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.enabled:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def stats(self):
+        with self._cond:
+            return dict(self._metrics, enabled=self.enabled, last_seq=self.last_seq, buffered=len(self._events),
+                        covered_from=self._covered_from, pending_gap=self._gap_since is not None,
+                        late_pending=len(self._late))
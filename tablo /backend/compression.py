@@ -0,0 +1,171 @@
+# Cevap sıkıştırma: Accept-Encoding'e göre zstd, br veya gzip (sunucu tercih sırasıyla).
+# gzip stdlib'dedir; brotli ve zstandard paketleri kuruluysa kullanılır.
+#   compressor = ResponseCompressor(['zstd', 'br', 'gzip'], min_size=1024)
+#   app.after_request(compressor)
+# JSON/NDJSON/metin cevapları min_size bayttan büyükse tek seferde sıkıştırılır; akan (export)
+# cevaplarda her parça sıkıştırıcıdan geçirilip flush edilir, istemci veriyi beklemeden alır.
+# Sıkıştırılan cevabın güçlü ETag'i zayıf yapılır (gövde baytları kodlamaya göre değişir);
+# If-None-Match zayıf karşılaştırma kullandığı için 304'ler etkilenmez.
+# Önbellekten gelen cevaplarda response.compressed bir dict ise ({kodlama: gövde}) sıkıştırılmış
+# gövde oraya yazılır ve sonraki isteklerde yeniden sıkıştırılmaz.
+import zlib
+
+from flask import request
+
+import metrics
+
+try:
+    import brotli
+except ImportError:  # br sadece paket kuruluysa sunulur
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # zstd sadece paket kuruluysa sunulur
+    zstandard = None
+
+DEFAULT_LEVELS = {'gzip': 6, 'br': 4, 'zstd': 3}
+COMPRESSIBLE_TYPES = {'application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html'}
+
+
+def available_encodings():
+    encodings = ['gzip']
+    if brotli is not None:
+        encodings.append('br')
+    if zstandard is not None:
+        encodings.append('zstd')
+    return encodings
+
+
+class _Gzip:
+    def __init__(self, level):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._obj.flush()
+
+
+class _Brotli:
+    def __init__(self, level):
+        self._obj = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._obj.process(data)
+
+    def flush(self):
+        return self._obj.flush()
+
+    def finish(self):
+        return self._obj.finish()
+
+
+class _Zstd:
+    def __init__(self, level):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._obj.flush()
+
+
+STREAM_COMPRESSORS = {'gzip': _Gzip, 'br': _Brotli, 'zstd': _Zstd}
+
+
+def compress(data, encoding, level=None):
+    level = DEFAULT_LEVELS[encoding] if level is None else level
+    if encoding == 'gzip':
+        obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+        return obj.compress(data) + obj.flush()
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def compress_stream(chunks, encoding, level=None):
+    # Her parça sıkıştırılıp flush edilir; boş çıktı üretilmez
+    level = DEFAULT_LEVELS[encoding] if level is None else level
+    obj = STREAM_COMPRESSORS[encoding](level)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            with metrics.timed('compress'):
+                out = obj.compress(chunk) + obj.flush()
+            if out:
+                yield out
+        yield obj.finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+class ResponseCompressor:
+    def __init__(self, encodings=('zstd', 'br', 'gzip'), min_size=1024, levels=None):
+        # Kurulu olmayan kodlamalar listeden düşer
+        available = available_encodings()
+        self.encodings = [e for e in encodings if e in available]
+        self.min_size = min_size
+        self.levels = dict(DEFAULT_LEVELS, **(levels or {}))
+        self._metrics = {'compressed': 0, 'streamed': 0, 'skipped_small': 0, 'bytes_in': 0, 'bytes_out': 0}
+
+    def negotiate(self, accept_encodings):
+        # werkzeug Accept nesnesi; q=0 olanlar seçilmez, eşitlikte sunucu sırası geçerli
+        if not self.encodings:
+            return None
+        return accept_encodings.best_match(self.encodings)
+
+    def __call__(self, response):
+        # after_request; request bağlamında çalışır
+        if response.mimetype not in COMPRESSIBLE_TYPES:
+            return response
+        response.vary.add('Accept-Encoding')
+        if (response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.direct_passthrough or 'Content-Encoding' in response.headers
+                or 'no-transform' in response.headers.get('Cache-Control', '')):
+            return response
+        encoding = self.negotiate(request.accept_encodings)
+        if encoding is None:
+            return response
+        level = self.levels[encoding]
+        if response.is_streamed:
+            response.response = compress_stream(response.response, encoding, level)
+            response.headers.pop('Content-Length', None)
+            self._metrics['streamed'] += 1
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                self._metrics['skipped_small'] += 1
+                return response
+            memo = getattr(response, 'compressed', None)
+            body = memo.get(encoding) if memo is not None else None
+            if body is None:
+                with metrics.timed('compress'):
+                    body = compress(data, encoding, level)
+                if memo is not None:
+                    memo[encoding] = body
+            if len(body) >= len(data):
+                return response
+            response.set_data(body)
+            self._metrics['compressed'] += 1
+            self._metrics['bytes_in'] += len(data)
+            self._metrics['bytes_out'] += len(body)
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def stats(self):
+        return dict(self._metrics, encodings=self.encodings, min_size=self.min_size)
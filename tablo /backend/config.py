@@ -0,0 +1,143 @@
+import os
+
+# Veritabanı bağlantı ayarları (ortam değişkenleriyle değiştirilebilir)
+DB_CONFIG = {
+    'host': os.environ.get('DB_HOST', 'localhost'),
+    'port': int(os.environ.get('DB_PORT', '5432')),
+    'database': os.environ.get('DB_NAME', 'tablo_db'),
+    'user': os.environ.get('DB_USER', 'postgres'),
+    'password': os.environ.get('DB_PASSWORD', 'Betul1103'),
+}
+
+# Bağlantı havuzu ayarları
+DB_POOL_MIN = int(os.environ.get('DB_POOL_MIN', '2'))
+DB_POOL_MAX = int(os.environ.get('DB_POOL_MAX', '20'))
+# Boş bağlantı beklerken en fazla kaç saniye beklenecek
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '5'))
+# Aynı anda en fazla kaç istek bağlantı bekleyebilir (0 = sınırsız)
+DB_POOL_MAX_WAITERS = int(os.environ.get('DB_POOL_MAX_WAITERS', '100'))
+# Bu kadar saniye boşta kalan bağlantı verilmeden önce SELECT 1 ile kontrol edilir
+DB_POOL_CHECK_AFTER = float(os.environ.get('DB_POOL_CHECK_AFTER', '30'))
+# Sabit CRUD sorguları bağlantı başına bir kez PREPARE edilir (statements.py). pgbouncer
+# transaction modu gibi oturumu paylaşan bir havuzlayıcı arkasında 0 yapılmalı
+DB_PREPARED_STATEMENTS = os.environ.get('DB_PREPARED_STATEMENTS', '1') == '1'
+
+# database_info kaynaklarına açılan havuzlar (connectors.py): kaynak başına en fazla bağlantı
+# ve bu kadar saniye kullanılmayan havuzun kapatılması
+CONNECTOR_POOL_MAX = int(os.environ.get('CONNECTOR_POOL_MAX', '5'))
+CONNECTOR_IDLE_TIMEOUT = float(os.environ.get('CONNECTOR_IDLE_TIMEOUT', '300'))
+
+# Giriş (auth.py): scrypt maliyeti (n = 2**PASSWORD_HASH_COST) ve aynı anda en fazla kaç özet
+# hesaplanacağı. Maliyet değişince mevcut şifreler ilk başarılı girişte yeniden özetlenir
+PASSWORD_HASH_COST = int(os.environ.get('PASSWORD_HASH_COST', '14'))
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '4'))
+# Toplu kullanıcı yüklemesinde en fazla kaç düz şifre istek içinde özetlenir; fazlası 400 ile
+# reddedilir ve şifreler önceden özetlenmiş (scrypt$n$r$p$tuz$özet) gönderilmelidir
+BULK_PLAINTEXT_PASSWORD_LIMIT = int(os.environ.get('BULK_PLAINTEXT_PASSWORD_LIMIT', '100'))
+# Yanlış e-posta/şifre bu kadar saniye veritabanına gitmeden reddedilir (0 = kapalı)
+LOGIN_NEGATIVE_TTL = float(os.environ.get('LOGIN_NEGATIVE_TTL', '60'))
+# e-posta -> şifre özeti önbelleği; başarılı giriş tek UPDATE ... RETURNING ile yapılır (0 = kapalı)
+LOGIN_CREDENTIAL_TTL = float(os.environ.get('LOGIN_CREDENTIAL_TTL', '300'))
+LOGIN_CACHE_MAX_ENTRIES = int(os.environ.get('LOGIN_CACHE_MAX_ENTRIES', '100000'))
+
+# Erişim/yenileme token'ları (tokens.py). TOKEN_SECRET tüm worker'larda aynı olmalı; boşsa
+# süreç başına rastgele anahtar kullanılır (yeniden başlatınca token'lar geçersiz olur)
+TOKEN_SECRET = os.environ.get('TOKEN_SECRET', '')
+ACCESS_TOKEN_TTL = int(os.environ.get('ACCESS_TOKEN_TTL', '900'))
+REFRESH_TOKEN_TTL = int(os.environ.get('REFRESH_TOKEN_TTL', str(7 * 24 * 3600)))
+# İptal listesi bu kadar saniyede bir veritabanından arka planda tazelenir
+TOKEN_REVOCATION_REFRESH = float(os.environ.get('TOKEN_REVOCATION_REFRESH', '30'))
+# 1 ise token'sız istekler reddedilir; 0 iken token gönderilirse yine doğrulanır ve izinler uygulanır
+AUTH_REQUIRED = os.environ.get('AUTH_REQUIRED', '0') == '1'
+# last_login yazımı: 0 ise her giriş kendi UPDATE'ini yapar; > 0 ise zamanlar bellekte toplanıp
+# bu kadar milisaniyede bir (veya LAST_LOGIN_FLUSH_MAX kullanıcı birikince) tek UPDATE ile yazılır
+LAST_LOGIN_FLUSH_MS = int(os.environ.get('LAST_LOGIN_FLUSH_MS', '0'))
+LAST_LOGIN_FLUSH_MAX = int(os.environ.get('LAST_LOGIN_FLUSH_MAX', '500'))
+# İstek ölçümü (metrics.py): route başına aşama histogramları, /metrics (Prometheus metni).
+# Eşiği aşan sorgular/istekler loglanır (0 = kapalı)
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '200'))
+SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', '1000'))
+# X-Profile: <PROFILE_TOKEN> başlıklı istekler örneklenerek profillenir (boşsa kapalı)
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', '5'))
+PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', '20'))
+# JSON cevapları: fast (json_provider.py, orjson varsa) veya flask (varsayılan sağlayıcı).
+# JSON_DATETIME_FORMAT=iso tarih/saatleri http_date yerine ISO 8601 yazar (daha hızlı, biçim değişir)
+JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'fast')
+JSON_DATETIME_FORMAT = os.environ.get('JSON_DATETIME_FORMAT', 'http')
+# Liste cevaplarının kaynağı: python (satırlar Python'da kodlanır) veya db (Postgres json_agg ile
+# üretir, metin olduğu gibi gönderilir). İstek başına ?json=db|python ile değiştirilebilir
+LIST_JSON_SOURCE = os.environ.get('LIST_JSON_SOURCE', 'python')
+# Cevap sıkıştırma (compression.py): Accept-Encoding'e göre bu sırayla tercih edilir (boş = kapalı).
+# br ve zstd sadece brotli / zstandard paketleri kuruluysa sunulur. Bu boyuttan küçük cevaplar
+# sıkıştırılmaz; export akışları boyuttan bağımsız sıkıştırılır
+COMPRESSION = [e.strip() for e in os.environ.get('COMPRESSION', 'zstd,br,gzip').split(',') if e.strip()]
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', '1024'))
+COMPRESS_LEVELS = {
+    'gzip': int(os.environ.get('COMPRESS_GZIP_LEVEL', '6')),
+    'br': int(os.environ.get('COMPRESS_BROTLI_LEVEL', '4')),
+    'zstd': int(os.environ.get('COMPRESS_ZSTD_LEVEL', '3')),
+}
+# Liste/kayıt/lookup cevaplarının ETag ve Last-Modified'ı tablo değişiklik sayaçlarından
+# (schema.sql: table_versions) hesaplanır; değişmeyen tablo için veri sorgusu çalışmadan 304 döner
+TABLE_VERSIONS = os.environ.get('TABLE_VERSIONS', '1') == '1'
+# Değişiklik akışı (changes.py, schema.sql: change_log). Worker başına tek LISTEN bağlantısı;
+# olaylar /changes'ten (SSE veya JSON) yayınlanır, süreç içi önbellek ve rol izinleri güncellenir
+CHANGE_FEED = os.environ.get('CHANGE_FEED', '1') == '1'
+# Bellekte tutulan son olay sayısı; daha eski seq'ten devam eden istemciler change_log'dan okunur
+CHANGE_FEED_BUFFER = int(os.environ.get('CHANGE_FEED_BUFFER', '10000'))
+# Commit edilmemiş bir seq boşluğu bu kadar saniye beklenir, sonra geri alınmış sayılır
+CHANGE_FEED_GAP_TIMEOUT = float(os.environ.get('CHANGE_FEED_GAP_TIMEOUT', '5'))
+# change_log kayıtları bu kadar saniye tutulur; daha eskisinden devam eden istemci reset alır
+CHANGE_LOG_RETENTION = int(os.environ.get('CHANGE_LOG_RETENTION', str(24 * 3600)))
+# SSE bağlantısı bu kadar saniye sonra kapatılır (istemci Last-Event-ID ile yeniden bağlanır);
+# bağlantı boştayken CHANGE_STREAM_PING saniyede bir yorum satırı gönderilir
+CHANGE_STREAM_MAX_SECONDS = float(os.environ.get('CHANGE_STREAM_MAX_SECONDS', '300'))
+CHANGE_STREAM_PING = float(os.environ.get('CHANGE_STREAM_PING', '15'))
+# Derlenmiş rol izinleri bu kadar saniye sonra yeniden okunur (başka worker'daki rol değişiklikleri için)
+PERMISSION_CACHE_TTL = float(os.environ.get('PERMISSION_CACHE_TTL', '60'))
+
+# Referans tablo önbelleği: memory (süreç içi), redis (paylaşımlı) veya local-shared
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+CACHE_TTL = float(os.environ.get('CACHE_TTL', '60'))
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', '1024'))
+
+# auto_prompt zamanlayıcısı (scheduler.py)
+SCHEDULER_WORKERS = int(os.environ.get('SCHEDULER_WORKERS', '8'))
+# Aynı asistan için aynı anda en fazla kaç prompt çalışabilir
+SCHEDULER_PER_ASSISTANT = int(os.environ.get('SCHEDULER_PER_ASSISTANT', '2'))
+SCHEDULER_MAX_PENDING = int(os.environ.get('SCHEDULER_MAX_PENDING', '10000'))
+
+# auto_prompt sonuçlarının e-posta ile gönderimi (mailer.py); SMTP_HOST boşsa kapalı
+SMTP_HOST = os.environ.get('SMTP_HOST', '')
+SMTP_PORT = int(os.environ.get('SMTP_PORT', '25'))
+SMTP_USER = os.environ.get('SMTP_USER') or None
+SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD') or None
+SMTP_STARTTLS = os.environ.get('SMTP_STARTTLS', '0') == '1'
+SMTP_FROM = os.environ.get('SMTP_FROM', 'noreply@localhost')
+SMTP_POOL_SIZE = int(os.environ.get('SMTP_POOL_SIZE', '2'))
+# Aynı alıcıya giden sonuçlar bu kadar saniye biriktirilip tek e-postada gönderilir
+MAIL_BATCH_WINDOW = float(os.environ.get('MAIL_BATCH_WINDOW', '30'))
+MAIL_BATCH_MAX = int(os.environ.get('MAIL_BATCH_MAX', '20'))
+
+# data_prepare_modules çalıştırma motoru (prep_executor.py)
+PREP_CACHE_DIR = os.environ.get('PREP_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'prep_cache'))
+PREP_WORKERS = int(os.environ.get('PREP_WORKERS', '0')) or None  # None = tüm çekirdekler
+PREP_CHUNK_ROWS = int(os.environ.get('PREP_CHUNK_ROWS', '50000'))
+# İşçi süreç başına bellek (MB) ve CPU (saniye) sınırı
+PREP_MEMORY_MB = int(os.environ.get('PREP_MEMORY_MB', '2048'))
+PREP_CPU_SECONDS = int(os.environ.get('PREP_CPU_SECONDS', '600'))
+PREP_TASK_TIMEOUT = float(os.environ.get('PREP_TASK_TIMEOUT', '600'))
+
+# data_prepare_modules.query sonuç önbelleği (query_cache.py)
+QUERY_CACHE_DIR = os.environ.get('QUERY_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'query_cache'))
+QUERY_CACHE_MAX_MB = int(os.environ.get('QUERY_CACHE_MAX_MB', '1024'))
+# Modülde query_cache_ttl boşsa kullanılan süre (saniye)
+QUERY_CACHE_TTL = float(os.environ.get('QUERY_CACHE_TTL', '3600'))
+
+# database_info kaynaklarının şema özetleri (schema_cache.py); bu kadar saniyeden eski özet
+# istendiğinde katalog değişiklik işaretleri kontrol edilir
+SCHEMA_CACHE_DIR = os.environ.get('SCHEMA_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema_snapshots'))
+SCHEMA_CACHE_MAX_AGE = float(os.environ.get('SCHEMA_CACHE_MAX_AGE', '300'))
@@ -0,0 +1,194 @@
+# llm_platform.database_info kayıtlarındaki dış kaynaklara bağlantı yöneticisi.
+# Her database_id için ilk kullanımda bir bağlantı havuzu açılır ve istekler arasında
+# paylaşılır; uzun süre kullanılmayan havuzlar kapatılır, kayıt değişince havuz yeniden kurulur.
+#   with connectors.connection(database_id) as conn: ...
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+
+from db_pool import ConnectionPool, reset_psycopg2, reset_dbapi
+
+
+class ConnectorError(Exception):
+    pass
+
+
+# --- sürücüler ---
+
+class Driver:
+    def __init__(self, name, connect, reset=reset_dbapi):
+        self.name = name
+        self.connect = connect  # connect(info) -> DB-API bağlantısı
+        self.reset = reset
+
+
+DRIVERS = {}
+
+
+def register_driver(names, connect, reset=reset_dbapi):
+    driver = Driver(names[0], connect, reset)
+    for name in names:
+        DRIVERS[name] = driver
+    return driver
+
+
+def get_driver(info):
+    kind = (info.get('database_type') or '').strip().lower()
+    driver = DRIVERS.get(kind)
+    if driver is None:
+        raise ConnectorError(f'Desteklenmeyen database_type: {kind}')
+    return driver
+
+
+def _connect_postgres(info):
+    return psycopg2.connect(
+        host=info.get('database_ip'),
+        port=info.get('database_port') or 5432,
+        user=info.get('database_user'),
+        password=info.get('database_password'),
+        dbname=info.get('database_name'),
+    )
+
+
+def _connect_sqlite(info):
+    # Havuzdaki bağlantı farklı iş parçacıklarında (sırayla) kullanılır
+    return sqlite3.connect(info.get('database_name'), check_same_thread=False)
+
+
+register_driver(['postgres', 'postgresql', 'psql'], _connect_postgres, reset_psycopg2)
+register_driver(['sqlite', 'sqlite3'], _connect_sqlite)
+
+
+def connect(info):
+    # Havuzsuz tek bağlantı
+    return get_driver(info).connect(info)
+
+
+# Bağlantıyı etkileyen alanlar; bunlardan biri değişirse havuz yeniden kurulur
+CONNECTION_FIELDS = ('database_type', 'database_ip', 'database_port', 'database_user',
+                     'database_password', 'database_name')
+
+
+def info_signature(info):
+    return json.dumps([str(info.get(f)) if info.get(f) is not None else None for f in CONNECTION_FIELDS])
+
+
+# --- havuz yöneticisi ---
+
+class _Entry:
+    def __init__(self, pool, signature, driver):
+        self.pool = pool
+        self.signature = signature
+        self.driver = driver
+
+
+class ConnectorManager:
+    def __init__(self, load_info, minconn=0, maxconn=5, timeout=5.0, check_after=30.0, idle_timeout=300.0):
+        # load_info(database_id) -> database_info satırı (dict) veya None
+        self.load_info = load_info
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.check_after = check_after
+        self.idle_timeout = idle_timeout
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self._metrics = {'created': 0, 'rebuilt': 0, 'evicted': 0, 'invalidated': 0}
+
+    def _create(self, info):
+        driver = get_driver(info)
+        pool = ConnectionPool(
+            self.minconn, self.maxconn,
+            timeout=self.timeout,
+            check_after=self.check_after,
+            connect=lambda: driver.connect(info),
+            reset=driver.reset,
+        )
+        return _Entry(pool, info_signature(info), driver)
+
+    def pool(self, database_id, info=None):
+        # info verilirse (çağıran kaydı zaten okuduysa) kayıt tekrar okunmaz; imza farklıysa
+        # (başka bir süreç kaydı güncellediyse) havuz yeniden kurulur
+        self.evict_idle()
+        with self._lock:
+            entry = self._entries.get(database_id)
+            if entry is not None and (info is None or entry.signature == info_signature(info)):
+                return entry.pool
+        if info is None:
+            info = self.load_info(database_id)
+            if info is None:
+                raise ConnectorError(f'database_info kaydı bulunamadı: {database_id}')
+        new = self._create(info)
+        with self._lock:
+            entry = self._entries.get(database_id)
+            if entry is not None and entry.signature == new.signature:
+                # Aynı anda başka bir istek kurmuş
+                new.pool.closeall()
+                return entry.pool
+            if entry is not None:
+                self._metrics['rebuilt'] += 1
+                entry.pool.closeall()
+            self._metrics['created'] += 1
+            self._entries[database_id] = new
+            return new.pool
+
+    def driver_for(self, database_id):
+        with self._lock:
+            entry = self._entries.get(database_id)
+        if entry is None:
+            raise ConnectorError(f'Havuz açılmamış: {database_id}')
+        return entry.driver
+
+    def get(self, database_id, info=None, timeout=None):
+        # close() ile havuza geri dönen bağlantı
+        return self.pool(database_id, info).get(timeout)
+
+    @contextmanager
+    def connection(self, database_id, info=None, timeout=None):
+        with self.pool(database_id, info).connection(timeout) as conn:
+            yield conn
+
+    def invalidate(self, database_id=None):
+        # PUT/DELETE /database_info/<id> sonrası; kullanımdaki bağlantılar iade edilince kapanır
+        with self._lock:
+            if database_id is None:
+                entries, self._entries = list(self._entries.values()), {}
+            else:
+                entry = self._entries.pop(database_id, None)
+                entries = [entry] if entry else []
+            self._metrics['invalidated'] += len(entries)
+        for entry in entries:
+            entry.pool.closeall()
+
+    def evict_idle(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_sweep < self.idle_timeout / 4:
+            return 0
+        self._last_sweep = now
+        evicted = []
+        with self._lock:
+            for database_id, entry in list(self._entries.items()):
+                if now - entry.pool.last_used >= self.idle_timeout and entry.pool.stats()['in_use'] == 0:
+                    evicted.append(self._entries.pop(database_id))
+            self._metrics['evicted'] += len(evicted)
+        for entry in evicted:
+            entry.pool.closeall()
+        return len(evicted)
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            pools = {
+                str(database_id): dict(entry.pool.stats(), driver=entry.driver.name,
+                                       idle_seconds=round(now - entry.pool.last_used, 3))
+                for database_id, entry in self._entries.items()
+            }
+            return dict(self._metrics, pools=pools)
+
+    def closeall(self):
+        self.invalidate()
@@ -0,0 +1,257 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+
+
+class PoolError(Exception):
+    pass
+
+
+class PoolTimeout(PoolError):
+    pass
+
+
+class PoolExhausted(PoolError):
+    pass
+
+
+def is_closed(conn):
+    # psycopg2 bağlantılarında closed özelliği var; diğer DB-API sürücülerinde yok
+    return bool(getattr(conn, 'closed', False))
+
+
+def reset_psycopg2(conn):
+    # Açık kalmış transaction'ı geri al; bozuk bağlantı için False (havuza konmaz)
+    status = conn.get_transaction_status()
+    if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+    if status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+        conn.rollback()
+    return True
+
+
+def reset_dbapi(conn):
+    conn.rollback()
+    return True
+
+
+class PooledConnection:
+    # Gerçek bağlantıyı sarar; close() bağlantıyı kapatmak yerine havuza geri verir.
+    # Böylece route'lardaki conn.close() çağrıları aynen çalışmaya devam eder.
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    @property
+    def raw(self):
+        return self._conn
+
+    @property
+    def released(self):
+        return self._conn is None
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.putconn(conn)
+
+    def discard(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.putconn(conn, discard=True)
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise PoolError('Bağlantı havuza geri verilmiş')
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self._conn is not None and not is_closed(self._conn):
+            self._conn.rollback()
+        self.close()
+
+
+class ConnectionPool:
+    def __init__(self, minconn, maxconn, timeout=5.0, max_waiters=0,
+                 check_after=30.0, connect=None, reset=reset_psycopg2, **conn_kwargs):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError('Geçersiz havuz boyutu')
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.max_waiters = max_waiters
+        self.check_after = check_after
+        self._connect = connect or psycopg2.connect
+        self._reset = reset
+        self._conn_kwargs = conn_kwargs
+        self._cond = threading.Condition()
+        self._idle = []  # (conn, boşa çıkma zamanı)
+        self._in_use = set()
+        self._opening = 0
+        self._waiting = 0
+        self._closed = False
+        self.last_used = time.monotonic()  # son verme/iade zamanı
+        self._metrics = {
+            'checkouts': 0,
+            'checkout_failures': 0,
+            'timeouts': 0,
+            'rejected': 0,
+            'created': 0,
+            'discarded': 0,
+            'health_check_failures': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+        }
+        for _ in range(minconn):
+            conn = self._new_connection()
+            self._idle.append((conn, time.monotonic()))
+
+    def _new_connection(self):
+        conn = self._connect(**self._conn_kwargs)
+        self._metrics['created'] += 1
+        return conn
+
+    def _close_quietly(self, conn):
+        self._metrics['discarded'] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn, idle_since):
+        if is_closed(conn):
+            return False
+        if time.monotonic() - idle_since < self.check_after:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute('SELECT 1')
+            cur.fetchone()
+            cur.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def getconn(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        with self._cond:
+            if self._closed:
+                raise PoolError('Havuz kapatılmış')
+            if (not self._idle and len(self._in_use) + self._opening >= self.maxconn
+                    and self.max_waiters and self._waiting >= self.max_waiters):
+                self._metrics['rejected'] += 1
+                self._metrics['checkout_failures'] += 1
+                raise PoolExhausted('Bağlantı bekleme kuyruğu dolu')
+            self._waiting += 1
+            try:
+                while True:
+                    if self._idle:
+                        conn, idle_since = self._idle.pop()
+                        break
+                    if len(self._in_use) + self._opening < self.maxconn:
+                        conn, idle_since = None, None
+                        self._opening += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._metrics['timeouts'] += 1
+                        self._metrics['checkout_failures'] += 1
+                        raise PoolTimeout('Veritabanı bağlantısı beklenirken zaman aşımı')
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+
+        # Bağlantı açma ve sağlık kontrolü kilit dışında yapılır
+        try:
+            if conn is not None and not self._is_healthy(conn, idle_since):
+                with self._cond:
+                    self._metrics['health_check_failures'] += 1
+                    self._close_quietly(conn)
+                conn = None
+                with self._cond:
+                    self._opening += 1
+            if conn is None:
+                try:
+                    conn = self._new_connection()
+                finally:
+                    with self._cond:
+                        self._opening -= 1
+        except Exception:
+            with self._cond:
+                self._metrics['checkout_failures'] += 1
+                self._cond.notify()
+            raise
+
+        waited = time.monotonic() - started
+        with self._cond:
+            self._in_use.add(conn)
+            self.last_used = time.monotonic()
+            self._metrics['checkouts'] += 1
+            self._metrics['wait_time_total'] += waited
+            if waited > self._metrics['wait_time_max']:
+                self._metrics['wait_time_max'] = waited
+        return conn
+
+    def putconn(self, conn, discard=False):
+        if not discard and not is_closed(conn):
+            # Açık kalmış transaction'ı geri al, bozuk bağlantıyı havuza koyma
+            try:
+                discard = not self._reset(conn)
+            except Exception:
+                discard = True
+        with self._cond:
+            self._in_use.discard(conn)
+            self.last_used = time.monotonic()
+            if discard or is_closed(conn) or self._closed or len(self._idle) >= self.maxconn:
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        return PooledConnection(self, self.getconn(timeout))
+
+    @contextmanager
+    def connection(self, timeout=None):
+        pooled = self.get(timeout)
+        try:
+            yield pooled
+        except Exception:
+            if not pooled.released and not is_closed(pooled.raw):
+                pooled.raw.rollback()
+            raise
+        finally:
+            pooled.close()
+
+    def stats(self):
+        with self._cond:
+            m = dict(self._metrics)
+            checkouts = m['checkouts']
+            m.update({
+                'min_size': self.minconn,
+                'max_size': self.maxconn,
+                'size': len(self._idle) + len(self._in_use),
+                'in_use': len(self._in_use),
+                'idle': len(self._idle),
+                'waiting': self._waiting,
+                'wait_time_avg': (m['wait_time_total'] / checkouts) if checkouts else 0.0,
+            })
+            return m
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            for conn, _ in self._idle:
+                self._close_quietly(conn)
+            self._idle = []
+            self._cond.notify_all()
@@ -0,0 +1,88 @@
+# Hızlı JSON kodlama. orjson kuruluysa kullanılır, değilse Flask'ın varsayılan kodlayıcısıyla
+# aynı stdlib yoluna düşülür. Çıktı varsayılan olarak Flask ile aynı anlamdadır: datetime/date
+# http_date (RFC 822), Decimal ve UUID metin, anahtarlar sıralı. (orjson ASCII dışı karakterleri
+# \uXXXX yerine UTF-8 olarak yazar; JSON olarak aynıdır.)
+# datetime_format='iso' ile tarih/saatler orjson'un yerel ISO 8601 biçiminde yazılır; Python'a
+# hiç geri çağrı yapılmadığı için en hızlı yol budur.
+# JSONB: raw_jsonb(cur) cursor'daki JSON/JSONB kolonlarını çözmeden orjson.Fragment olarak
+# bırakır, metin cevaba olduğu gibi kopyalanır (orjson >= 3.9; yoksa değişiklik yapmaz).
+import json
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import psycopg2.extras
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # hızlı yol için gerekli; yoksa stdlib json
+    orjson = None
+
+Fragment = getattr(orjson, 'Fragment', None)
+
+
+def _default_http(o):
+    # Flask DefaultJSONProvider.default ile aynı dönüşümler
+    if isinstance(o, date):
+        return http_date(o)
+    if isinstance(o, (Decimal, uuid.UUID)):
+        return str(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+def _default_iso(o):
+    if isinstance(o, Decimal):
+        return str(o)
+    return _default_http(o)
+
+
+def encode(obj, sort_keys=True, datetime_format='http', indent=False):
+    # bytes döner
+    if orjson is None:
+        return json.dumps(obj, default=_default_http, sort_keys=sort_keys, ensure_ascii=True,
+                          indent=2 if indent else None,
+                          separators=None if indent else (',', ':')).encode()
+    option = orjson.OPT_NON_STR_KEYS
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    if datetime_format == 'iso':
+        return orjson.dumps(obj, default=_default_iso, option=option)
+    return orjson.dumps(obj, default=_default_http, option=option | orjson.OPT_PASSTHROUGH_DATETIME)
+
+
+def raw_jsonb(cur):
+    # Sadece bu cursor için: JSON/JSONB değerleri Fragment olarak gelir (cevaba doğrudan yazılacak
+    # sonuçlarda kullanılmalı; değeri Python'da okuyan kod dict bekler)
+    if Fragment is not None:
+        psycopg2.extras.register_default_json(cur, loads=Fragment)
+        psycopg2.extras.register_default_jsonb(cur, loads=Fragment)
+    return cur
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    datetime_format = 'http'
+
+    def dumps(self, obj, **kwargs):
+        # Ek json.dumps argümanı verilirse (indent, cls ...) Flask'ın yolu kullanılır
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return encode(obj, self.sort_keys, self.datetime_format).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        body = encode(obj, self.sort_keys, self.datetime_format, indent)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
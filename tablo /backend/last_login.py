@@ -0,0 +1,132 @@
+# users.last_login için write-behind tampon. Başarılı girişler kullanıcı başına son zamanı
+# bellekte toplar; tampon `interval` saniyede bir veya `max_entries` kullanıcıya ulaşınca tek bir
+# UPDATE ... FROM unnest(...) ile yazılır. Aynı kullanıcının aralıktaki girişleri tek satıra iner.
+# Yazma başarısız olursa kayıtlar tampona geri konur (daha yeni zaman korunur) ve sonraki turda
+# tekrar denenir. Kapanışta close() kalanları yazar.
+#   buffer = LastLoginBuffer(flush, interval=0.5, max_entries=500)
+#   buffer.start()            # Flask: arka plan iş parçacığı
+#   buffer.record(user_id)    # giriş başına; dönen zaman yanıtta kullanılır
+import logging
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Daha yeni bir değer (ör. başka worker'ın yazdığı) varsa geri alınmaz
+FLUSH_SQL = (
+    'UPDATE llm_platform.users AS u SET last_login = v.last_login '
+    'FROM unnest(%s::integer[], %s::timestamp[]) AS v(id, last_login) '
+    'WHERE u.id = v.id AND (u.last_login IS NULL OR u.last_login < v.last_login)'
+)
+
+
+class LastLoginBuffer:
+    def __init__(self, flush, interval=0.5, max_entries=500, on_full=None):
+        # flush(ids, zamanlar): toplu UPDATE'i çalıştırır; on_full: tampon dolunca çağrılır
+        self._flush = flush
+        self.interval = interval
+        self.max_entries = max_entries
+        self.on_full = on_full
+        self._pending = {}  # user_id -> son giriş zamanı
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+        self._metrics = {'recorded': 0, 'coalesced': 0, 'flushes': 0, 'rows_flushed': 0,
+                         'failures': 0, 'last_flush_ms': None}
+
+    def record(self, user_id, when=None):
+        when = when or datetime.now()
+        with self._lock:
+            previous = self._pending.get(user_id)
+            if previous is not None:
+                self._metrics['coalesced'] += 1
+            if previous is None or previous < when:
+                self._pending[user_id] = when
+            self._metrics['recorded'] += 1
+            full = len(self._pending) >= self.max_entries
+        if full:
+            self._wake.set()
+            if self.on_full:
+                self.on_full()
+        return when
+
+    def drain(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def restore(self, pending):
+        with self._lock:
+            for user_id, when in pending.items():
+                current = self._pending.get(user_id)
+                if current is None or current < when:
+                    self._pending[user_id] = when
+
+    def flush(self):
+        # Senkron yazma (Flask iş parçacığı ve kapanış); yazılan satır sayısını döner
+        pending = self.drain()
+        if not pending:
+            return 0
+        started = time.perf_counter()
+        try:
+            self._flush(list(pending), list(pending.values()))
+        except Exception:
+            self.restore(pending)
+            self._metrics['failures'] += 1
+            logger.exception('last_login yazılamadı; %d kayıt sonraki turda denenecek', len(pending))
+            return 0
+        self._done(len(pending), started)
+        return len(pending)
+
+    async def aflush(self):
+        # flush'ın asyncio karşılığı; self._flush bir coroutine fonksiyonu olmalı
+        pending = self.drain()
+        if not pending:
+            return 0
+        started = time.perf_counter()
+        try:
+            await self._flush(list(pending), list(pending.values()))
+        except Exception:
+            self.restore(pending)
+            self._metrics['failures'] += 1
+            logger.exception('last_login yazılamadı; %d kayıt sonraki turda denenecek', len(pending))
+            return 0
+        self._done(len(pending), started)
+        return len(pending)
+
+    def _done(self, rows, started):
+        with self._lock:
+            self._metrics['flushes'] += 1
+            self._metrics['rows_flushed'] += rows
+            self._metrics['last_flush_ms'] = round((time.perf_counter() - started) * 1000, 2)
+
+    def start(self):
+        # İlk girişte çağrılır (fork'tan sonra her worker'da kendi iş parçacığı)
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='last-login-flush', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        # Kapanışta bekleyen kayıtlar yazılır (atexit / lifespan)
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        return self.flush()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._metrics, pending=len(self._pending), interval_ms=round(self.interval * 1000),
+                        max_entries=self.max_entries)
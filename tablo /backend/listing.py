@@ -0,0 +1,341 @@
+import base64
+import json
+
+from psycopg2 import sql
+
+# Liste endpoint'lerinin okuyabildiği tablolar.
+# pk: keyset sayfalama için kullanılan birincil anahtar
+# alias/joins/extra: auto_prompt gibi join yapan listeler için
+# label: /lookup?mode=labels için id -> etiket ifadesi
+# expand: ?expand=ad ile ilişkili kaydı iç içe nesne olarak ekleyen join'ler (table: okunan tablo)
+# depends: joins ile okunan diğer tablolar (cevabın ETag'i bu tabloların değişikliğini de izler)
+# hidden: yazılabilen ama hiçbir listede/filtrede dönmeyen kolonlar (ör. parola özeti)
+TABLES = {
+    'roles': {
+        'table': 'roles',
+        'pk': 'role_id',
+        'columns': ['role_id', 'role_name', 'permissions', 'admin_or_not'],
+        'label': 'role_name',
+    },
+    'users': {
+        'table': 'users',
+        'alias': 'u',
+        'pk': 'id',
+        'columns': ['id', 'role_id', 'name', 'surname', 'password', 'e_mail', 'institution_working',
+                    'status', 'create_date', 'change_date', 'last_login'],
+        'hidden': ['password'],
+        'label': "concat_ws(' ', name, surname) || coalesce(' (' || e_mail || ')', '')",
+        'expand': {
+            'role': {'join': 'LEFT JOIN llm_platform.roles r ON u.role_id = r.role_id', 'value': 'to_jsonb(r)',
+                     'table': 'roles'},
+        },
+    },
+    'database_info': {
+        'table': 'database_info',
+        'pk': 'database_id',
+        'columns': ['database_id', 'database_ip', 'database_port', 'database_user', 'database_password',
+                    'database_type', 'database_name', 'user_id'],
+        'label': "coalesce(database_name, '') || coalesce(' (' || database_ip || ':' || database_port || ')', '')",
+    },
+    'data_prepare_modules': {
+        'table': 'data_prepare_modules',
+        'pk': 'module_id',
+        'columns': ['module_id', 'module_name', 'description', 'user_id', 'asistan_id', 'database_id',
+                    'query', 'create_date', 'change_date', 'working_platform', 'query_name', 'db_schema',
+                    'documents_id', 'csv_db_schema', 'csv_database_id', 'data_prep_code', 'query_cache_ttl'],
+        'label': "coalesce(query_name, module_id::text)",
+    },
+    'assistants': {
+        'table': 'assistants',
+        'alias': 'a',
+        'pk': 'asistan_id',
+        'columns': ['asistan_id', 'title', 'explanation', 'parameters', 'user_id', 'create_date',
+                    'change_date', 'working_place', 'default_instructions', 'data_instructions',
+                    'file_path', 'trigger_time'],
+        'label': 'title',
+        'expand': {
+            'user': {'join': 'LEFT JOIN llm_platform.users u ON a.user_id = u.id',
+                     'value': "to_jsonb(u) - 'password'", 'table': 'users'},
+        },
+    },
+    'auto_prompt': {
+        'table': 'auto_prompt',
+        'alias': 'ap',
+        'pk': 'prompt_id',
+        'columns': ['prompt_id', 'asistan_id', 'question', 'trigger_time', 'option_code', 'mcrisactive',
+                    'receiver_emails'],
+        'joins': 'LEFT JOIN llm_platform.assistants a ON ap.asistan_id = a.asistan_id',
+        'extra': {'assistant_title': 'a.title'},
+        'depends': ['assistants'],
+        'label': 'ap.question',
+        'expand': {
+            # assistants zaten join'li
+            'assistant': {'join': None, 'value': 'to_jsonb(a)', 'table': 'assistants'},
+        },
+    },
+}
+
+# Kolon tipleri (schema.sql); parametreleri tipli gönderen sürücüler (asyncpg) için
+COLUMN_TYPES = {
+    'roles': {'role_id': 'int', 'admin_or_not': 'bool'},
+    'users': {'id': 'int', 'role_id': 'int', 'create_date': 'timestamp', 'change_date': 'timestamp',
+              'last_login': 'timestamp'},
+    'database_info': {'database_id': 'int', 'database_port': 'int', 'user_id': 'int'},
+    'data_prepare_modules': {'module_id': 'int', 'user_id': 'int', 'asistan_id': 'int', 'database_id': 'int',
+                             'create_date': 'timestamp', 'change_date': 'timestamp', 'documents_id': 'int',
+                             'csv_database_id': 'int', 'query_cache_ttl': 'int'},
+    'assistants': {'asistan_id': 'int', 'parameters': 'json', 'user_id': 'int', 'create_date': 'timestamp',
+                   'change_date': 'timestamp', 'trigger_time': 'json'},
+    'auto_prompt': {'prompt_id': 'int', 'asistan_id': 'int', 'trigger_time': 'json', 'mcrisactive': 'bool'},
+}
+
+SCHEMA = 'llm_platform'
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Filtre son ekleri: ?create_date__gte=2024-01-01
+OPERATORS = {
+    'eq': '=',
+    'ne': '<>',
+    'gt': '>',
+    'gte': '>=',
+    'lt': '<',
+    'lte': '<=',
+}
+
+# Filtre olarak yorumlanmayacak sorgu parametreleri
+RESERVED_PARAMS = {'limit', 'cursor', 'fields', 'export', 'expand', 'json'}
+
+
+class ListQueryError(ValueError):
+    pass
+
+
+def encode_cursor(value):
+    raw = json.dumps({'after': value}, default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))['after']
+    except Exception:
+        raise ListQueryError('Geçersiz cursor')
+
+
+class ListQuery:
+    def __init__(self, query, params, limit, pk, param_columns=None):
+        self.query = query
+        self.params = params
+        self.limit = limit
+        self.pk = pk
+        # params ile aynı sırada: her parametrenin ait olduğu kolon (LIMIT için None)
+        self.param_columns = param_columns or []
+
+    def page(self, rows):
+        # limit+1 satır istendi; fazlası varsa bir sonraki sayfa vardır
+        if self.limit is None or len(rows) <= self.limit:
+            return rows, None
+        rows = rows[:self.limit]
+        return rows, encode_cursor(rows[-1][self.pk])
+
+    def json_query(self):
+        # Sayfa Postgres'te JSON dizisine çevrilir: (json metni, sonraki sayfa varsa son anahtar).
+        # Tarih/saatler ISO 8601, numeric'ler sayı olarak yazılır (Python yolundan farklı)
+        pk = sql.Identifier(self.pk)
+        if self.limit is None:
+            query = sql.SQL("SELECT coalesce(json_agg(t ORDER BY t.{}), '[]')::text, NULL FROM ({}) t")
+            return query.format(pk, self.query), self.params
+        query = sql.SQL(
+            "SELECT coalesce(json_agg(s.t ORDER BY s.n) FILTER (WHERE s.n <= %s), '[]')::text, "
+            "CASE WHEN count(*) > %s THEN max(s.pk) FILTER (WHERE s.n <= %s) END "
+            "FROM (SELECT t, t.{} AS pk, row_number() OVER (ORDER BY t.{}) AS n FROM ({}) t) s"
+        ).format(pk, pk, self.query)
+        return query, [self.limit] * 3 + list(self.params)
+
+
+def _column_ref(spec, name):
+    if name in spec.get('extra', {}):
+        return sql.SQL(spec['extra'][name])
+    if 'alias' in spec:
+        return sql.Identifier(spec['alias'], name)
+    return sql.Identifier(name)
+
+
+def readable_columns(spec):
+    hidden = set(spec.get('hidden', ()))
+    return [c for c in spec['columns'] if c not in hidden]
+
+
+def _parse_limit(args, has_cursor):
+    value = args.get('limit')
+    if value is None:
+        # Parametresiz istekler eskisi gibi tüm tabloyu döner
+        return DEFAULT_PAGE_SIZE if has_cursor else None
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ListQueryError('limit bir sayı olmalı')
+    if limit < 1:
+        raise ListQueryError('limit 0 dan büyük olmalı')
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def parse_fields(spec, value):
+    if not value:
+        return None
+    known = set(readable_columns(spec)) | set(spec.get('extra', {}))
+    fields = []
+    for name in value.split(','):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in known:
+            raise ListQueryError(f'Bilinmeyen alan: {name}')
+        if name not in fields:
+            fields.append(name)
+    # Cursor üretebilmek için birincil anahtar her zaman döner
+    if spec['pk'] not in fields:
+        fields.insert(0, spec['pk'])
+    return fields
+
+
+def parse_filters(spec, args, reserved=RESERVED_PARAMS):
+    known = set(readable_columns(spec)) | set(spec.get('extra', {}))
+    filters = []
+    for key in args:
+        if key in reserved:
+            continue
+        column, _, op = key.partition('__')
+        op = op or 'eq'
+        if column not in known:
+            raise ListQueryError(f'Bilinmeyen filtre alanı: {column}')
+        if op not in OPERATORS:
+            raise ListQueryError(f'Bilinmeyen filtre operatörü: {op}')
+        for value in args.getlist(key):
+            filters.append((column, OPERATORS[op], value))
+    return filters
+
+
+def parse_expand(spec, value):
+    if not value:
+        return []
+    known = spec.get('expand', {})
+    names = []
+    for name in value.split(','):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in known:
+            raise ListQueryError(f'Bilinmeyen expand: {name}')
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def dependencies(name, expand=None):
+    # Cevabı etkileyen tablolar: tablonun kendisi, sabit join'ler ve istenen expand'ler
+    spec = TABLES[name]
+    tables = [spec['table']] + spec.get('depends', [])
+    tables += [spec['expand'][e]['table'] for e in parse_expand(spec, expand)]
+    return list(dict.fromkeys(tables))
+
+
+def select_clause(spec, fields, expand=()):
+    if fields is None:
+        if spec.get('hidden'):
+            parts = [_column_ref(spec, name) for name in readable_columns(spec)]
+        elif 'alias' in spec:
+            parts = [sql.SQL('{}.*').format(sql.Identifier(spec['alias']))]
+        else:
+            parts = [sql.SQL('*')]
+        for name, expr in spec.get('extra', {}).items():
+            parts.append(sql.SQL('{} AS {}').format(sql.SQL(expr), sql.Identifier(name)))
+    else:
+        parts = []
+        for name in fields:
+            ref = _column_ref(spec, name)
+            if name in spec.get('extra', {}):
+                ref = sql.SQL('{} AS {}').format(ref, sql.Identifier(name))
+            parts.append(ref)
+    for name in expand:
+        parts.append(sql.SQL('{} AS {}').format(sql.SQL(spec['expand'][name]['value']), sql.Identifier(name)))
+    return sql.SQL(', ').join(parts)
+
+
+def from_clause(spec, expand=()):
+    table = sql.Identifier(SCHEMA, spec['table'])
+    if 'alias' in spec:
+        table = sql.SQL('{} {}').format(table, sql.Identifier(spec['alias']))
+    if spec.get('joins'):
+        table = sql.SQL('{} {}').format(table, sql.SQL(spec['joins']))
+    for name in expand:
+        join = spec['expand'][name]['join']
+        if join:
+            table = sql.SQL('{} {}').format(table, sql.SQL(join))
+    return table
+
+
+def where_clause(spec, filters, after=None):
+    conditions = []
+    params = []
+    for column, op, value in filters:
+        conditions.append(sql.SQL('{} {} %s').format(_column_ref(spec, column), sql.SQL(op)))
+        params.append(value)
+    if after is not None:
+        conditions.append(sql.SQL('{} > %s').format(_column_ref(spec, spec['pk'])))
+        params.append(after)
+    if not conditions:
+        return sql.SQL(''), params
+    return sql.SQL(' WHERE ') + sql.SQL(' AND ').join(conditions), params
+
+
+def build_list_query(name, args, paginate=True):
+    # paginate=False: export gibi tüm sonucu akıtan istekler için LIMIT eklenmez,
+    # cursor verilmişse yine o anahtardan sonrası döner
+    spec = TABLES[name]
+    cursor = args.get('cursor')
+    after = decode_cursor(cursor) if cursor else None
+    limit = _parse_limit(args, cursor is not None) if paginate else None
+    fields = parse_fields(spec, args.get('fields'))
+    expand = parse_expand(spec, args.get('expand'))
+    filters = parse_filters(spec, args)
+
+    where, params = where_clause(spec, filters, after)
+    param_columns = [column for column, _, _ in filters]
+    if after is not None:
+        param_columns.append(spec['pk'])
+    query = sql.SQL('SELECT {} FROM {}{} ORDER BY {}').format(
+        select_clause(spec, fields, expand),
+        from_clause(spec, expand),
+        where,
+        _column_ref(spec, spec['pk']),
+    )
+    if limit is not None:
+        query += sql.SQL(' LIMIT %s')
+        params.append(limit + 1)
+        param_columns.append(None)
+    return ListQuery(query, params, limit, spec['pk'], param_columns)
+
+
+def build_get_query(name, fields=None, expand=None):
+    spec = TABLES[name]
+    expand = parse_expand(spec, expand)
+    return sql.SQL('SELECT {} FROM {} WHERE {} = %s').format(
+        select_clause(spec, fields, expand),
+        from_clause(spec, expand),
+        _column_ref(spec, spec['pk']),
+    )
+
+
+def build_label_query(name):
+    # Seçim kutuları için sadece id ve etiket
+    spec = TABLES[name]
+    pk = _column_ref(spec, spec['pk'])
+    return sql.SQL('SELECT {} AS id, {} AS label FROM {} ORDER BY {}').format(
+        pk,
+        sql.SQL(spec['label']),
+        from_clause(spec),
+        pk,
+    )
@@ -0,0 +1,292 @@
+# auto_prompt sonuçlarını receiver_emails adreslerine toplu gönderen teslimat kuyruğu.
+# Aynı alıcıya bir zaman penceresi içinde düşen sonuçlar tek e-postada birleştirilir ve
+# kalıcı (havuzlanmış) SMTP bağlantıları üzerinden, geçici hatalarda yeniden denenerek gönderilir.
+import logging
+import random
+import re
+import smtplib
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from functools import lru_cache
+from queue import LifoQueue, Empty
+
+log = logging.getLogger('mailer')
+
+# Frontend'deki is_valid_email ile aynı kural
+_EMAIL_RE = re.compile(r'[^@]+@[^@]+\.[^@]+')
+
+
+@lru_cache(maxsize=4096)
+def parse_recipients(receiver_emails):
+    # Virgül/noktalı virgül ile ayrılmış listeyi bir kez ayrıştırır; tekrarları ve geçersizleri atar
+    if not receiver_emails:
+        return ()
+    seen = []
+    for part in re.split(r'[,;\s]+', receiver_emails):
+        address = part.strip().lower()
+        if address and _EMAIL_RE.match(address) and address not in seen:
+            seen.append(address)
+    return tuple(seen)
+
+
+class MailMetrics:
+    def __init__(self, window=60):
+        self.window = window
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.batches = 0
+        self.messages_batched = 0
+        self.bytes = 0
+        self.send_time_total = 0.0
+        self._recent = deque()  # son gönderim zamanları (throughput için)
+        self._lock = threading.Lock()
+
+    def record_send(self, size, seconds, merged):
+        now = time.monotonic()
+        with self._lock:
+            self.sent += 1
+            self.batches += 1
+            self.messages_batched += merged
+            self.bytes += size
+            self.send_time_total += seconds
+            self._recent.append(now)
+            while self._recent and self._recent[0] < now - self.window:
+                self._recent.popleft()
+
+    def record_failure(self):
+        with self._lock:
+            self.failed += 1
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def snapshot(self):
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and self._recent[0] < now - self.window:
+                self._recent.popleft()
+            return {
+                'sent': self.sent,
+                'failed': self.failed,
+                'retries': self.retries,
+                'messages_batched': self.messages_batched,
+                'bytes': self.bytes,
+                'avg_send_seconds': (self.send_time_total / self.sent) if self.sent else 0.0,
+                'avg_messages_per_email': (self.messages_batched / self.batches) if self.batches else 0.0,
+                'emails_per_second': len(self._recent) / self.window,
+            }
+
+
+def _is_transient(exc):
+    # 4xx cevaplar, kopan bağlantılar ve ağ hataları geçicidir; diğer SMTP hataları kalıcı
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 400 <= exc.smtp_code < 500
+    if isinstance(exc, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(exc, smtplib.SMTPException):
+        return False
+    return isinstance(exc, OSError)
+
+
+class SMTPPool:
+    def __init__(self, host, port=25, size=2, user=None, password=None, starttls=False, timeout=30,
+                 max_retries=3, backoff=1.0, max_idle=60, factory=smtplib.SMTP, metrics=None):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_idle = max_idle
+        self.factory = factory
+        self.metrics = metrics or MailMetrics()
+        self._idle = LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self):
+        smtp = self.factory(self.host, self.port, timeout=self.timeout)
+        smtp.ehlo()
+        if self.starttls:
+            smtp.starttls()
+            smtp.ehlo()
+        if self.user:
+            smtp.login(self.user, self.password)
+        return smtp
+
+    def _checkout(self):
+        while True:
+            try:
+                smtp, idle_since = self._idle.get_nowait()
+            except Empty:
+                return self._connect()
+            if time.monotonic() - idle_since < self.max_idle:
+                return smtp
+            # Uzun süre boşta kalan bağlantı sunucu tarafından kapatılmış olabilir
+            try:
+                if smtp.noop()[0] == 250:
+                    return smtp
+            except smtplib.SMTPException:
+                pass
+            self._close(smtp)
+
+    def _close(self, smtp):
+        try:
+            smtp.quit()
+        except Exception:
+            try:
+                smtp.close()
+            except Exception:
+                pass
+
+    def send(self, message):
+        # Geçici hatalarda üstel bekleme ile yeniden dener; kalıcı hatayı (5xx) hemen yükseltir
+        attempt = 0
+        with self._slots:
+            while True:
+                smtp = None
+                try:
+                    smtp = self._checkout()
+                    started = time.monotonic()
+                    refused = smtp.send_message(message)
+                    self._idle.put((smtp, time.monotonic()))
+                    return refused, time.monotonic() - started
+                except Exception as e:
+                    if smtp is not None:
+                        if isinstance(e, smtplib.SMTPResponseException) and not isinstance(
+                                e, smtplib.SMTPServerDisconnected):
+                            # Sunucu cevap verdi, bağlantı sağlam; oturumu sıfırla
+                            try:
+                                smtp.rset()
+                                self._idle.put((smtp, time.monotonic()))
+                            except Exception:
+                                self._close(smtp)
+                        else:
+                            self._close(smtp)
+                    attempt += 1
+                    if not _is_transient(e) or attempt > self.max_retries:
+                        raise
+                    self.metrics.record_retry()
+                    delay = self.backoff * (2 ** (attempt - 1))
+                    time.sleep(delay + random.uniform(0, delay / 2))
+
+    def close(self):
+        while True:
+            try:
+                smtp, _ = self._idle.get_nowait()
+            except Empty:
+                return
+            self._close(smtp)
+
+
+class DeliveryQueue:
+    # enqueue() sonuçları alıcı başına biriktirir. Bir alıcının ilk mesajından window saniye
+    # geçtiğinde veya max_batch mesaj biriktiğinde hepsi tek e-postada gönderilir.
+
+    def __init__(self, smtp_pool, from_addr, window=30.0, max_batch=20, workers=None):
+        self.smtp = smtp_pool
+        self.metrics = smtp_pool.metrics
+        self.from_addr = from_addr
+        self.window = window
+        self.max_batch = max_batch
+        self._buckets = {}  # alıcı -> {'first': zaman, 'items': [(konu, gövde)]}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers or smtp_pool.size,
+                                            thread_name_prefix='mailer')
+        self._stop = threading.Event()
+        self._thread = None
+
+    def enqueue(self, receiver_emails, subject, body):
+        recipients = parse_recipients(receiver_emails) if isinstance(receiver_emails, str) \
+            else tuple(dict.fromkeys(a.strip().lower() for a in receiver_emails))
+        full = []
+        now = time.monotonic()
+        with self._lock:
+            for address in recipients:
+                bucket = self._buckets.setdefault(address, {'first': now, 'items': []})
+                bucket['items'].append((subject, body))
+                if len(bucket['items']) >= self.max_batch:
+                    full.append((address, self._buckets.pop(address)['items']))
+        for address, items in full:
+            self._executor.submit(self._deliver, address, items)
+        return len(recipients)
+
+    def _build(self, address, items):
+        message = EmailMessage()
+        message['From'] = self.from_addr
+        message['To'] = address
+        if len(items) == 1:
+            subject, body = items[0]
+            message['Subject'] = subject
+            message.set_content(body)
+        else:
+            message['Subject'] = f'{len(items)} yeni otomatik prompt sonucu'
+            parts = [f'== {subject} ==\n{body}' for subject, body in items]
+            message.set_content('\n\n'.join(parts))
+        return message
+
+    def _deliver(self, address, items):
+        message = self._build(address, items)
+        try:
+            refused, seconds = self.smtp.send(message)
+            self.metrics.record_send(len(message.as_bytes()), seconds, len(items))
+            if refused:
+                log.warning('Alıcı reddetti: %s', refused)
+        except Exception:
+            self.metrics.record_failure()
+            log.exception('E-posta gönderilemedi: %s', address)
+
+    def flush(self, force=False):
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            for address in list(self._buckets):
+                if force or now - self._buckets[address]['first'] >= self.window:
+                    due.append((address, self._buckets.pop(address)['items']))
+        return [self._executor.submit(self._deliver, address, items) for address, items in due]
+
+    def _loop(self):
+        tick = max(0.05, min(1.0, self.window / 4))
+        while not self._stop.wait(tick):
+            self.flush()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, daemon=True, name='mailer-flush')
+        self._thread.start()
+        return self
+
+    def stop(self):
+        # Kapanışta bekleyen her şey gönderilir
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        for future in self.flush(force=True):
+            future.result()
+        self._executor.shutdown(wait=True)
+        self.smtp.close()
+
+    def stats(self):
+        with self._lock:
+            pending = sum(len(b['items']) for b in self._buckets.values())
+            recipients = len(self._buckets)
+        stats = self.metrics.snapshot()
+        stats.update({'pending_messages': pending, 'pending_recipients': recipients})
+        return stats
+
+
+def delivering_runner(runner, queue):
+    # Zamanlayıcı çalıştırıcısını sarar: sonucu prompt'un receiver_emails adreslerine kuyruklar
+    def run(prompt):
+        result = runner(prompt)
+        if result is not None and prompt.get('receiver_emails'):
+            subject = f"Otomatik prompt #{prompt['prompt_id']}: {(prompt.get('question') or '')[:60]}"
+            queue.enqueue(prompt['receiver_emails'], subject, str(result))
+        return result
+    return run
@@ -0,0 +1,305 @@
+# İstek düzeyinde gecikme ölçümü.
+# Her istek için aşamaların süresi toplanır ve route başına histogramlara yazılır:
+#   total      isteğin tamamı (before_request -> teardown)
+#   connect    havuzdan bağlantı alma
+#   execute    cursor.execute / executemany
+#   fetch      fetchone / fetchmany / fetchall
+#   serialize  jsonify (JSON üretimi ve Response oluşturma)
+#   compress   cevap sıkıştırma (compression.py)
+#   other      kalan süre (Python kodu, önbellek, yetki kontrolü ...)
+# Sorgu süreleri InstrumentedConnection'ın cursor'larından gelir (connection_factory olarak
+# verilir). Eşiği aşan sorgular ve istekler loglanır. render() Prometheus metin biçimini üretir.
+# SamplingProfiler tek bir isteğin iş parçacığını aralıklarla örnekler ve katlanmış yığın
+# (flamegraph.pl / speedscope) çıktısı verir.
+import contextvars
+import logging
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import psycopg2.extensions
+
+from statements import StatementConnection
+
+logger = logging.getLogger(__name__)
+
+PHASES = ('total', 'connect', 'execute', 'fetch', 'serialize', 'compress', 'other')
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current = contextvars.ContextVar('request_timer', default=None)
+
+
+class RequestTimer:
+    __slots__ = ('route', 'method', 'started', 'phases', 'status', 'profiler')
+
+    def __init__(self, route, method):
+        self.route = route
+        self.method = method
+        self.started = time.perf_counter()
+        self.phases = dict.fromkeys(PHASES[1:-1], 0.0)
+        self.status = None
+        self.profiler = None
+
+
+def begin(route, method):
+    timer = RequestTimer(route, method)
+    _current.set(timer)
+    return timer
+
+
+def current():
+    return _current.get()
+
+
+def end():
+    _current.set(None)
+
+
+def add(phase, seconds):
+    timer = _current.get()
+    if timer is not None:
+        timer.phases[phase] += seconds
+
+
+class timed:
+    # with timed('connect'): ...  (istek dışında çağrılırsa sadece süre ölçülmez)
+    __slots__ = ('phase', 'started')
+
+    def __init__(self, phase):
+        self.phase = phase
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        add(self.phase, time.perf_counter() - self.started)
+
+
+class Histogram:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        i = 0
+        while i < len(BUCKETS) and value > BUCKETS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metrics:
+    def __init__(self, slow_query_ms=200, slow_request_ms=1000, namespace='tablo'):
+        self.slow_query = slow_query_ms / 1000 if slow_query_ms else None
+        self.slow_request = slow_request_ms / 1000 if slow_request_ms else None
+        self.namespace = namespace
+        self._histograms = {}  # (route, method, phase) -> Histogram
+        self._requests = {}  # (route, method, status) -> sayı
+        self._slow = {'queries': 0, 'requests': 0}
+        self._lock = threading.Lock()
+
+    def finish(self, timer, status):
+        # İstek sonunda aşamalar histogramlara yazılır; ölçülen aşamalar total'dan düşülerek other bulunur
+        total = time.perf_counter() - timer.started
+        phases = dict(timer.phases, total=total)
+        phases['other'] = max(0.0, total - sum(timer.phases.values()))
+        with self._lock:
+            for phase, seconds in phases.items():
+                key = (timer.route, timer.method, phase)
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram()
+                histogram.observe(seconds)
+            key = (timer.route, timer.method, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+        if self.slow_request is not None and total >= self.slow_request:
+            with self._lock:
+                self._slow['requests'] += 1
+            logger.warning('Yavaş istek: %s %s %.1f ms (%s)', timer.method, timer.route, total * 1000,
+                           ', '.join(f'{p}={s * 1000:.1f}' for p, s in timer.phases.items()))
+        return phases
+
+    def query_done(self, cursor, query, seconds):
+        if self.slow_query is None or seconds < self.slow_query:
+            return
+        with self._lock:
+            self._slow['queries'] += 1
+        try:
+            text = query if isinstance(query, str) else query.as_string(cursor)
+        except Exception:
+            text = repr(query)
+        timer = _current.get()
+        logger.warning('Yavaş sorgu (%.1f ms, %s): %s', seconds * 1000,
+                       f'{timer.method} {timer.route}' if timer else 'istek dışı', text[:500])
+
+    def render(self, gauges=None):
+        # Prometheus metin biçimi (text/plain; version=0.0.4)
+        ns = self.namespace
+        lines = [
+            f'# HELP {ns}_request_phase_seconds İstek aşamalarının süresi (route, method, phase)',
+            f'# TYPE {ns}_request_phase_seconds histogram',
+        ]
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            requests = sorted(self._requests.items(), key=lambda item: tuple(map(str, item[0])))
+            slow = dict(self._slow)
+        for (route, method, phase), histogram in histograms:
+            labels = f'route="{_label(route)}",method="{method}",phase="{phase}"'
+            cumulative = 0
+            for bound, count in zip(BUCKETS, histogram.counts):
+                cumulative += count
+                lines.append(f'{ns}_request_phase_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{ns}_request_phase_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f'{ns}_request_phase_seconds_sum{{{labels}}} {histogram.sum:.6f}')
+            lines.append(f'{ns}_request_phase_seconds_count{{{labels}}} {histogram.count}')
+        lines += [f'# HELP {ns}_requests_total Tamamlanan istekler', f'# TYPE {ns}_requests_total counter']
+        for (route, method, status), count in requests:
+            lines.append(f'{ns}_requests_total{{route="{_label(route)}",method="{method}",status="{status}"}} {count}')
+        lines += [f'# TYPE {ns}_slow_queries_total counter', f'{ns}_slow_queries_total {slow["queries"]}',
+                  f'# TYPE {ns}_slow_requests_total counter', f'{ns}_slow_requests_total {slow["requests"]}']
+        for name, value in (gauges or {}).items():
+            lines += [f'# TYPE {ns}_{name} gauge', f'{ns}_{name} {value}']
+        return '\n'.join(lines) + '\n'
+
+
+# --- psycopg2 cursor ölçümü ---
+
+_registry = None  # Yavaş sorguların bildirildiği Metrics
+
+
+def install(registry):
+    global _registry
+    _registry = registry
+
+
+class _TimedCursorMixin:
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            elapsed = time.perf_counter() - started
+            add('execute', elapsed)
+            if _registry is not None:
+                _registry.query_done(self, query, elapsed)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            elapsed = time.perf_counter() - started
+            add('execute', elapsed)
+            if _registry is not None:
+                _registry.query_done(self, query, elapsed)
+
+    def fetchone(self):
+        with timed('fetch'):
+            return super().fetchone()
+
+    def fetchmany(self, size=None):
+        with timed('fetch'):
+            return super().fetchmany(size) if size is not None else super().fetchmany()
+
+    def fetchall(self):
+        with timed('fetch'):
+            return super().fetchall()
+
+
+_timed_classes = {}
+
+
+def timed_cursor_class(factory):
+    cls = _timed_classes.get(factory)
+    if cls is None:
+        cls = _timed_classes[factory] = type('Timed' + factory.__name__, (_TimedCursorMixin, factory), {})
+    return cls
+
+
+class InstrumentedConnection(StatementConnection):
+    # conn.cursor(...) ve conn.cursor(cursor_factory=RealDictCursor) ölçülen alt sınıfı döndürür
+    def cursor(self, *args, **kwargs):
+        factory = kwargs.get('cursor_factory') or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs['cursor_factory'] = timed_cursor_class(factory)
+        return super().cursor(*args, **kwargs)
+
+
+# --- Örnekleyen profiler ---
+
+class SamplingProfiler:
+    # Hedef iş parçacığının yığını her `interval` saniyede bir okunur; aynı yığınlar sayılır
+    def __init__(self, thread_id=None, interval=0.005):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.samples = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self.started = None
+        self.duration = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({code.co_filename.rsplit("/", 1)[-1]}:{frame.f_lineno})')
+                frame = frame.f_back
+            key = ';'.join(reversed(stack))
+            self.samples[key] = self.samples.get(key, 0) + 1
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started
+        return self
+
+    def folded(self):
+        # "çerçeve;çerçeve;... sayı" satırları
+        return '\n'.join(f'{stack} {count}' for stack, count in
+                         sorted(self.samples.items(), key=lambda item: -item[1])) + '\n'
+
+
+class ProfileStore:
+    # Son `keep` profil; id ile okunur
+    def __init__(self, keep=20):
+        self.keep = keep
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, route, method, profiler):
+        profile_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._profiles[profile_id] = {
+                'id': profile_id, 'route': route, 'method': method,
+                'duration_ms': round(profiler.duration * 1000, 2),
+                'samples': sum(profiler.samples.values()), 'folded': profiler.folded(),
+            }
+            while len(self._profiles) > self.keep:
+                self._profiles.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id):
+        return self._profiles.get(profile_id)
+
+    def list(self):
+        with self._lock:
+            return [{k: v for k, v in p.items() if k != 'folded'} for p in reversed(self._profiles.values())]
@@ -0,0 +1,97 @@
+# roles.permissions / admin_or_not için derlenmiş yetki değerlendirici.
+# Her rolün izin JSON'u bir kez tek bir tamsayı bit kümesine derlenir: her (tablo, işlem)
+# çiftinin sabit bir biti vardır, kontrol bir sözlük okuması ve bir AND işlemidir.
+#   roles.permissions: {"all": "read", "users": "rw", "roles": ["read"]}
+#   ('all' / '*' = tablo özelinde kayıt yoksa geçerli izin; yazma izni okumayı da kapsar)
+# Derlenmiş roller role_id ile önbellekte tutulur; PUT/DELETE /roles/<id> kaydı siler,
+# diğer worker'lar için kayıtlar `ttl` saniye sonra yeniden okunur.
+import json
+import threading
+import time
+
+ACTIONS = ('read', 'write')
+
+# roles.permissions değerleri -> işlemler
+_ACTION_ALIASES = {
+    'read': ('read',), 'r': ('read',), 'okuma': ('read',),
+    'write': ACTIONS, 'w': ACTIONS, 'rw': ACTIONS, 'yazma': ACTIONS,
+    'all': ACTIONS, '*': ACTIONS, 'true': ACTIONS, True: ACTIONS,
+}
+
+
+def parse_permissions(permissions):
+    # roles.permissions (JSON metni veya dict) -> {tablo veya '*': {işlemler}}
+    if isinstance(permissions, str):
+        try:
+            permissions = json.loads(permissions)
+        except ValueError:
+            permissions = {'all': permissions}
+    if not isinstance(permissions, dict):
+        return {}
+    parsed = {}
+    for key, value in permissions.items():
+        table = '*' if key in ('all', '*') else key
+        actions = set()
+        for item in value if isinstance(value, list) else [value]:
+            item = item.strip().lower() if isinstance(item, str) else item
+            actions.update(_ACTION_ALIASES.get(item, ()))
+        if actions:
+            parsed[table] = actions
+    return parsed
+
+
+class PermissionEngine:
+    def __init__(self, tables, ttl=60.0):
+        self.ttl = ttl
+        # (tablo, işlem) -> bit; bilinmeyen tablo/işlem için 0 (hiçbir rol izin vermez)
+        self._bits = {}
+        for i, table in enumerate(sorted(tables)):
+            for j, action in enumerate(ACTIONS):
+                self._bits[(table, action)] = 1 << (i * len(ACTIONS) + j)
+        self._all = sum(self._bits.values())
+        self._roles = {}  # role_id -> (bitiş zamanı, bit kümesi)
+        self._lock = threading.Lock()
+        self._metrics = {'hits': 0, 'misses': 0, 'compiled': 0, 'invalidations': 0}
+
+    def compile(self, permissions, admin=False):
+        if admin:
+            return self._all
+        parsed = parse_permissions(permissions)
+        default = parsed.pop('*', ())
+        mask = 0
+        for (table, action), bit in self._bits.items():
+            if action in parsed.get(table, default):
+                mask |= bit
+        return mask
+
+    def lookup(self, role_id):
+        # Önbellekteki bit kümesi; yoksa/süresi dolduysa None (çağıran rolü okuyup store eder)
+        entry = self._roles.get(role_id)
+        if entry is None or entry[0] <= time.monotonic():
+            self._metrics['misses'] += 1
+            return None
+        self._metrics['hits'] += 1
+        return entry[1]
+
+    def store(self, role_id, role):
+        # role: roles satırı (permissions, admin_or_not) veya None (rol yok -> izin yok)
+        role = role or {}
+        mask = self.compile(role.get('permissions'), bool(role.get('admin_or_not')))
+        with self._lock:
+            self._roles[role_id] = (time.monotonic() + self.ttl, mask)
+            self._metrics['compiled'] += 1
+        return mask
+
+    def check(self, mask, table, action):
+        return bool(mask & self._bits.get((table, action), 0))
+
+    def invalidate(self, role_id=None):
+        with self._lock:
+            if role_id is None:
+                self._roles.clear()
+            else:
+                self._roles.pop(role_id, None)
+            self._metrics['invalidations'] += 1
+
+    def stats(self):
+        return dict(self._metrics, roles=len(self._roles))
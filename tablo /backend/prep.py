@@ -0,0 +1,288 @@
+# Veri hazırlama fonksiyonları. data_prepare_modules.data_prep_code alanına bu sözlükteki
+# bir ad yazılırsa kod yerine kayıtlı fonksiyon çalıştırılır (bkz. prep_executor.py).
+#
+# Pipeline: vektörel adımların (df -> df) sırayla uygulandığı, girdiyi parça parça işleyen
+# ve sonucu Arrow / bölümlenmiş Parquet olarak yazan hazırlık hattı.
+#   pipe = Pipeline([product('total', 'price', 'quantity'), downcast])
+#   pipe.to_parquet('satislar.csv', 'cikti/', partition_cols=['year'])
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Arrow/Parquet çıktısı için gerekli
+    pa = None
+    pq = None
+
+DEFAULT_CHUNK_ROWS = 500_000
+
+
+# --- adımlar ---
+
+def product(target, *columns):
+    # target = columns[0] * columns[1] * ...
+    def step(df):
+        result = df[columns[0]].to_numpy()
+        for column in columns[1:]:
+            result = result * df[column].to_numpy()
+        return df.assign(**{target: result})
+    step.__name__ = f'product({target}={"*".join(columns)})'
+    return step
+
+
+def derive(target, func):
+    # target = func(df); func vektörel çalışmalı (satır satır değil)
+    def step(df):
+        return df.assign(**{target: func(df)})
+    step.__name__ = f'derive({target})'
+    return step
+
+
+def select(*columns):
+    def step(df):
+        return df[list(columns)]
+    step.__name__ = f'select({",".join(columns)})'
+    return step
+
+
+def where(func):
+    # func(df) bir bool maske döndürür
+    def step(df):
+        return df[func(df)]
+    step.__name__ = 'where'
+    return step
+
+
+def downcast(df, category_ratio=0.5):
+    # Sayısal kolonları sığdıkları en küçük tipe, az tekrarsız değeri olan metinleri category'ye çevirir
+    out = {}
+    for column in df.columns:
+        series = df[column]
+        kind = series.dtype.kind
+        if kind in 'iu':
+            out[column] = pd.to_numeric(series, downcast='unsigned' if series.min() >= 0 else 'integer')
+        elif kind == 'f':
+            downcasted = pd.to_numeric(series, downcast='float')
+            # Değerler float32'de birebir korunmuyorsa float64 kalır
+            exact = np.array_equal(downcasted.to_numpy(dtype=series.dtype), series.to_numpy(), equal_nan=True)
+            out[column] = downcasted if exact else series
+        elif kind == 'O' and len(series) and series.nunique(dropna=False) / len(series) <= category_ratio:
+            out[column] = series.astype('category')
+        else:
+            out[column] = series
+    return pd.DataFrame(out, index=df.index)
+
+
+# --- girdi ---
+
+def iter_chunks(source, chunk_rows=DEFAULT_CHUNK_ROWS):
+    # DataFrame, DataFrame üreteci, CSV veya Parquet yolu kabul eder
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunk_rows):
+            yield source.iloc[start:start + chunk_rows]
+        return
+    if isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+        if path.endswith('.parquet') or os.path.isdir(path):
+            if pq is None:
+                raise ImportError('Parquet okumak için pyarrow gerekli')
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+                yield batch.to_pandas()
+            return
+        yield from pd.read_csv(path, chunksize=chunk_rows)
+        return
+    yield from source
+
+
+def fingerprint(source):
+    # Girdi değişmediği sürece aynı kalan özet; dosyalar için boyut + değişiklik zamanı
+    if isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+        stat = os.stat(path)
+        return f'{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}'
+    if isinstance(source, pd.DataFrame):
+        return hashlib.sha256(pd.util.hash_pandas_object(source, index=False).to_numpy().tobytes()).hexdigest()
+    return None
+
+
+# --- çıktı ---
+
+def widen(schema, other):
+    # İki parçanın şemasını ikisinin değerlerini de kayıpsız taşıyan tiplerle birleştirir
+    # (ör. uint8 + uint16 -> uint16, int8 + uint8 -> int16, float32 + float64 -> float64).
+    # Bir parçada category olup diğerinde olmayan kolon düz değer tipine açılır.
+    def plain(s, o):
+        fields = []
+        for field in s:
+            index = o.get_field_index(field.name)
+            if (pa.types.is_dictionary(field.type) and index != -1
+                    and not pa.types.is_dictionary(o.field(index).type)):
+                field = field.with_type(field.type.value_type)
+            fields.append(field)
+        return pa.schema(fields)
+    # pandas metadata'sı ilk parçanın tiplerini anlatır; genişleyen şemada yanıltıcı olur
+    return pa.unify_schemas([plain(schema, other), plain(other, schema)],
+                            promote_options='permissive').remove_metadata()
+
+
+def cast_batch(batch, schema):
+    return pa.Table.from_batches([batch]).cast(schema).combine_chunks().to_batches()[0]
+
+
+def write_widening(batches, path, counter, **options):
+    # Parçaları tek Parquet dosyasına yazar ve son şemayı döndürür (parça yoksa None, dosya yazılmaz).
+    # downcast her parçayı kendi değer aralığına göre küçülttüğü için sonraki bir parça yazılan
+    # tipe sığmayabilir; o zaman şema genişletilir ve yazılmış satırlar yeni şemayla yeniden
+    # yazılır. Bir kolon en fazla birkaç kez genişleyebildiği için yeniden yazma sayısı sınırlıdır.
+    batches = iter(batches)
+    first = next(batches, None)
+    if first is None:
+        return None
+    schema = first.schema
+    writer = pq.ParquetWriter(path, schema, **options)
+    try:
+        for batch in itertools.chain([first], batches):
+            if batch.schema != schema:
+                try:
+                    batch = cast_batch(batch, schema)
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                    schema = widen(schema, batch.schema)
+                    writer.close()
+                    writer = None
+                    previous = f'{path}.prev'
+                    os.replace(path, previous)
+                    writer = pq.ParquetWriter(path, schema, **options)
+                    with pq.ParquetFile(previous) as written:
+                        for old in written.iter_batches():
+                            writer.write_batch(cast_batch(old, schema))
+                    os.remove(previous)
+                    batch = cast_batch(batch, schema)
+            writer.write_batch(batch)
+            counter['rows'] += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return schema
+
+
+# --- hat ---
+
+class Pipeline:
+    def __init__(self, steps=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+        self.steps = list(steps or [])
+        self.chunk_rows = chunk_rows
+
+    def then(self, step):
+        return Pipeline(self.steps + [step], self.chunk_rows)
+
+    def __call__(self, df):
+        for step in self.steps:
+            df = step(df)
+        return df
+
+    @property
+    def signature(self):
+        return '|'.join(getattr(step, '__name__', repr(step)) for step in self.steps)
+
+    def iter_frames(self, source):
+        for chunk in iter_chunks(source, self.chunk_rows):
+            yield self(chunk)
+
+    def iter_batches(self, source):
+        # Arrow RecordBatch'leri; sayısal ve null içermeyen kolonlar kopyalanmadan aktarılır
+        if pa is None:
+            raise ImportError('Arrow çıktısı için pyarrow gerekli')
+        for frame in self.iter_frames(source):
+            yield from pa.Table.from_pandas(frame, preserve_index=False).to_batches()
+
+    def to_arrow(self, source):
+        batches = list(self.iter_batches(source))
+        if not batches:
+            return pa.table({})
+        return pa.Table.from_batches(batches)
+
+    def to_parquet(self, source, path, partition_cols=None, source_key=None, force=False):
+        # Girdi özeti ve hat imzası manifest'tekiyle aynıysa yazılmış çıktı yeniden kullanılır
+        if pq is None:
+            raise ImportError('Parquet çıktısı için pyarrow gerekli')
+        # Özeti çıkarılamayan girdilerde (ör. üreteç) source_key verilmezse önbellek kullanılmaz
+        source_key = source_key or fingerprint(source)
+        key = source_key and hashlib.sha256(
+            json.dumps([source_key, self.signature, partition_cols or []]).encode()).hexdigest()
+        manifest_path = os.path.join(path, '_manifest.json')
+        if not force and key and os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            if manifest.get('key') == key:
+                manifest['cached'] = True
+                return manifest
+
+        started = time.monotonic()
+        tmp = f'{path}.tmp-{os.getpid()}'
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        counter = {'rows': 0}
+        try:
+            if partition_cols:
+                # Parçalar önce tek dosyada birleştirilir (şema genişleyince yeniden yazılabilsin
+                # diye), sonra bölümlenir; write_dataset yarıda kesilirse yazdıkları kullanılamaz
+                staged = f'{tmp}.staged.parquet'
+                try:
+                    schema = write_widening(self.iter_batches(source), staged, counter, compression='none')
+                    if schema is not None:
+                        # pyarrow.dataset içe aktarılınca iş parçacığı havuzları açılır (~1 GB sanal bellek);
+                        # bellek sınırlı prep işçilerinde yüklenmesin diye sadece burada
+                        import pyarrow.dataset as ds
+                        # Tüm parçalar tek yazıcıdan geçer; bölüm başına parça sayısı kadar küçük dosya oluşmaz
+                        ds.write_dataset(
+                            pa.RecordBatchReader.from_batches(schema, pq.ParquetFile(staged).iter_batches()),
+                            tmp, format='parquet', partitioning=partition_cols, partitioning_flavor='hive',
+                            basename_template='part-{i}.parquet', existing_data_behavior='overwrite_or_ignore',
+                        )
+                finally:
+                    if os.path.exists(staged):
+                        os.remove(staged)
+            else:
+                write_widening(self.iter_batches(source), os.path.join(tmp, 'part-0.parquet'), counter)
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        rows = counter['rows']
+        manifest = {
+            'key': key,
+            'rows': rows,
+            'partition_cols': partition_cols or [],
+            'seconds': round(time.monotonic() - started, 3),
+        }
+        with open(os.path.join(tmp, '_manifest.json'), 'w') as f:
+            json.dump(manifest, f)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+        manifest['cached'] = False
+        return manifest
+
+
+PREPARE = Pipeline([product('total', 'price', 'quantity')])
+
+
+def prepare(df):
+    # Eski prepare(df) ile aynı sonuç; girdi DataFrame'i yerinde değiştirmez
+    return PREPARE(df)
+
+
+PREP_FUNCTIONS = {
+    'prepare': prepare,
+}
+
+
+def register_prep(name, func):
+    PREP_FUNCTIONS[name] = func
+    return func
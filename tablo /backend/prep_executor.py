@@ -0,0 +1,309 @@
+# data_prepare_modules kayıtlarını çalıştıran motor:
+#   1. Modülün query'si bağlı database_info kaynağında çalıştırılır.
+#   2. Sonuç sunucu tarafı cursor ile DataFrame parçaları halinde okunur.
+#   3. Her parça, kaynak sınırları konmuş bir süreç havuzunda data_prep_code alanında adı
+#      verilen prep.PREP_FUNCTIONS fonksiyonuyla işlenir.
+#   4. Çıktılar query + kod özetine göre anahtarlanan önbellek klasörüne yazılır.
+#      Kaynak sorgusunun ham sonucu da (verilmişse) query_cache'te saklanır; kod değişse bile
+#      kaynak tekrar sorgulanmaz.
+# Ana süreç aynı anda sadece birkaç parçayı bellekte tutar; tüm sonuç tek süreçte toplanmaz.
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+import psycopg2
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import connectors
+import prep
+from query_cache import result_key
+
+
+class PrepError(Exception):
+    pass
+
+
+# --- kaynak okuma ---
+
+def iter_query_chunks(conn, query, chunk_rows):
+    # Havuzdan gelen bağlantılar PooledConnection ile sarılı
+    raw = getattr(conn, 'raw', conn)
+    if isinstance(raw, psycopg2.extensions.connection):
+        cur = conn.cursor(name='prep_extract')
+        cur.itersize = chunk_rows
+    else:
+        cur = conn.cursor()
+    cur.execute(query)
+    columns = None
+    while True:
+        rows = cur.fetchmany(chunk_rows)
+        if columns is None:
+            columns = [d[0] for d in cur.description] if cur.description else []
+        if not rows:
+            break
+        yield pd.DataFrame.from_records(rows, columns=columns)
+    cur.close()
+
+
+# --- işçi süreç ---
+
+# data_prep_code sadece prep.PREP_FUNCTIONS'taki bir fonksiyon adı olabilir. Kullanıcıdan gelen
+# Python kodu çalıştırılmaz: yerleşiklerin kısıtlanması yalıtım sağlamaz (izinli bir modül
+# üzerinden os'a ulaşılabilir). Yeni bir hazırlık adımı sunucu kodunda prep.register_prep ile eklenir.
+
+def registered_function(code):
+    name = (code or '').strip()
+    if name not in prep.PREP_FUNCTIONS:
+        raise PrepError(f"data_prep_code kayıtlı bir fonksiyon adı olmalı ({', '.join(sorted(prep.PREP_FUNCTIONS))})")
+    return prep.PREP_FUNCTIONS[name]
+
+
+def _worker_init(memory_mb, cpu_seconds):
+    # Her işçi süreç için bellek (heap + anonim bellek) ve CPU sınırı
+    if resource is None:
+        return
+    if memory_mb:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_DATA, (limit, limit))
+    if cpu_seconds:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds))
+
+
+def _result(future):
+    # İşçi sürecin hatası (ör. prepare'in beklediği kolon yok) istemciye mesajıyla döner.
+    # BrokenProcessPool olduğu gibi geçer; havuz run_module'de yenilenir
+    try:
+        return future.result()
+    except (PrepError, BrokenProcessPool):
+        raise
+    except Exception as e:
+        raise PrepError(f'Veri hazırlama başarısız: {type(e).__name__}: {e}') from e
+
+
+def _run_chunk(code, df, out_path):
+    func = registered_function(code)
+    result = func(df)
+    if result is None:
+        result = df
+    if not isinstance(result, pd.DataFrame):
+        raise PrepError('prepare(df) bir DataFrame döndürmeli')
+    write_frame(result, out_path)
+    return out_path, len(result)
+
+
+# --- önbellek ---
+
+def write_frame(df, path):
+    if path.endswith('.parquet'):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_pickle(path)
+
+
+def output_format():
+    try:
+        import pyarrow  # noqa: F401
+        return 'parquet'
+    except ImportError:
+        return 'pkl'
+
+
+def cache_key(source_id, query, code):
+    raw = json.dumps([source_id, (query or '').strip(), (code or '').strip()])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def read_output(path):
+    parts = sorted(p for p in os.listdir(path) if p.startswith('part-'))
+    for part in parts:
+        full = os.path.join(path, part)
+        yield pd.read_parquet(full) if part.endswith('.parquet') else pd.read_pickle(full)
+
+
+class PrepExecutor:
+    def __init__(self, cache_dir, workers=None, chunk_rows=50000, memory_mb=1024, cpu_seconds=600,
+                 task_timeout=600, connect=connectors.connect, result_cache=None):
+        self.cache_dir = cache_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_rows = chunk_rows
+        self.memory_mb = memory_mb
+        self.cpu_seconds = cpu_seconds
+        self.task_timeout = task_timeout
+        # connect(source) -> bağlantı; close() ile kapatılır (havuzdan geldiyse havuza döner)
+        self.connect = connect
+        # query_cache.QueryResultCache; verilirse kaynak sorgusunun sonucu da önbelleğe alınır
+        self.result_cache = result_cache
+        self._pool = None
+
+    def _executor(self):
+        if self._pool is None:
+            # fork yerine forkserver: işçiler çok iş parçacıklı web sürecinin belleğini
+            # (ve kilitlerini) devralmaz, bellek sınırı temiz bir süreç üzerinde uygulanır
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(method),
+                initializer=_worker_init,
+                initargs=(self.memory_mb, self.cpu_seconds),
+            )
+        return self._pool
+
+    def _reset_pool(self):
+        # Zaman aşımına uğrayan işçi öldürülemediği için havuz tamamen yenilenir
+        if self._pool is not None:
+            for proc in list(getattr(self._pool, '_processes', {}).values()):
+                proc.terminate()
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _is_fresh(self, manifest, ttl):
+        if ttl is None:
+            return True
+        return ttl > 0 and time.time() - manifest['created_at'] <= ttl
+
+    def run_module(self, module, source, force=False):
+        query = module.get('query')
+        code = module.get('data_prep_code') or ''
+        if not query:
+            raise PrepError('Modülün query alanı boş')
+        if not code.strip():
+            raise PrepError('Modülün data_prep_code alanı boş')
+        registered_function(code)
+        source_id = source.get('database_id')
+        ttl = self.result_cache.ttl_for(module) if self.result_cache else None
+        key = cache_key(source_id, query, code)
+        target = os.path.join(self.cache_dir, key)
+        manifest_path = os.path.join(target, 'manifest.json')
+        if not force and os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            # Çıktı, kaynak sonucu ile aynı süre geçerlidir
+            if self._is_fresh(manifest, ttl):
+                manifest['cached'] = True
+                return manifest
+
+        started = time.monotonic()
+        tmp = target + f'.tmp-{os.getpid()}-{int(time.time() * 1000)}'
+        os.makedirs(tmp, exist_ok=True)
+        ext = output_format()
+        executor = self._executor()
+        # Bellekte en fazla 2 x işçi sayısı kadar parça bulunur
+        max_in_flight = self.workers * 2
+        in_flight = set()
+        parts = []
+        rows_in = 0
+        conn = None
+        writer = None
+        result_hit = None
+        try:
+            if self.result_cache is not None:
+                rkey = result_key(source_id, query)
+                result_hit = None if force else self.result_cache.lookup(rkey, ttl)
+            if result_hit:
+                chunks = self.result_cache.iter_chunks(rkey, self.chunk_rows)
+            else:
+                conn = self.connect(source)
+                chunks = iter_query_chunks(conn, query, self.chunk_rows)
+                if self.result_cache is not None and ttl > 0:
+                    writer = self.result_cache.writer(rkey, source_id, module.get('module_id'), ttl)
+            try:
+                for index, chunk in enumerate(chunks):
+                    rows_in += len(chunk)
+                    if writer is not None:
+                        writer.write(chunk)
+                    out_path = os.path.join(tmp, f'part-{index:05d}.{ext}')
+                    in_flight.add(executor.submit(_run_chunk, code, chunk, out_path))
+                    if len(in_flight) >= max_in_flight:
+                        done, in_flight = wait(in_flight, timeout=self.task_timeout, return_when=FIRST_COMPLETED)
+                        if not done:
+                            raise FutureTimeout()
+                        parts += [_result(f) for f in done]
+            finally:
+                if conn is not None:
+                    conn.close()
+            # Kaynak tamamen okundu; prep kodu hata verse bile sonuç tekrar kullanılabilir
+            if writer is not None:
+                writer.commit()
+                writer = None
+            done, not_done = wait(in_flight, timeout=self.task_timeout)
+            if not_done:
+                raise FutureTimeout()
+            parts += [_result(f) for f in done]
+        except FutureTimeout:
+            self._reset_pool()
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise PrepError('Veri hazırlama zaman aşımına uğradı')
+        except BrokenProcessPool:
+            # İşçi bellek/CPU sınırı yüzünden öldürüldü; bozuk havuz sonraki çalıştırmalara kalmaz
+            self._reset_pool()
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise PrepError('Veri hazırlama işçisi sonlandı (bellek veya CPU sınırı aşılmış olabilir)')
+        except Exception:
+            for future in in_flight:
+                future.cancel()
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        finally:
+            if writer is not None:
+                writer.abort()
+
+        manifest = {
+            'cache_key': key,
+            'module_id': module.get('module_id'),
+            'database_id': source_id,
+            'path': target,
+            'format': ext,
+            'parts': len(parts),
+            'rows_in': rows_in,
+            'rows_out': sum(n for _, n in parts),
+            'seconds': round(time.monotonic() - started, 3),
+            'created_at': time.time(),
+            'result_cached': bool(result_hit),
+        }
+        with open(os.path.join(tmp, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f)
+        # Yarım kalmış çıktı hiçbir zaman önbellekte görünmesin diye klasör en sonda taşınır
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp, target)
+        manifest['cached'] = False
+        return manifest
+
+    def invalidate(self, module_id=None, database_id=None):
+        # Modül güncellenince/silinince (module_id) veya kaynağı değişince (database_id) sorgu
+        # sonuçları ve çıktılar silinir; ikisi de verilmezse tümü
+        if self.result_cache is None:
+            removed = 0
+        elif module_id is None and database_id is None:
+            removed = self.result_cache.clear()
+        else:
+            removed = self.result_cache.invalidate(module_id=module_id, database_id=database_id)
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                manifest_path = os.path.join(self.cache_dir, name, 'manifest.json')
+                try:
+                    with open(manifest_path) as f:
+                        manifest = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                if ((module_id is None and database_id is None)
+                        or (module_id is not None and manifest.get('module_id') == module_id)
+                        # database_id'si yazılmamış eski çıktılar da hangi kaynaktan geldiği bilinmediği için silinir
+                        or (database_id is not None and manifest.get('database_id', database_id) == database_id)):
+                    shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+                    removed += 1
+        return removed
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
@@ -0,0 +1,244 @@
+# data_prepare_modules.query sonuçlarının disk önbelleği.
+# Anahtar: kaynak database_id + normalize edilmiş SQL + parametreler. Sonuç Parquet olarak
+# (pyarrow yoksa pickle parçalar) saklanır; toplam boyut sınırı aşılınca en eski kullanılan silinir.
+#   writer = cache.writer(key, database_id, module_id)
+#   for df in chunks: writer.write(df)
+#   writer.commit()
+#   ... cache.lookup(key, ttl) -> meta / None,  cache.iter_chunks(key)
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+META_FILE = 'meta.json'
+
+# Tırnak içi metinler, yorumlar ve boşluklar
+_TOKEN_RE = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|--[^\n]*|/\*.*?\*/|\s+)""", re.S)
+
+
+def normalize_sql(query):
+    # Yorumları atar, tırnak dışındaki boşlukları teke indirir, sondaki ; işaretlerini siler
+    out = []
+    for token in _TOKEN_RE.split(query or ''):
+        if not token:
+            continue
+        if token.isspace() or token.startswith('--') or token.startswith('/*'):
+            if out and out[-1] != ' ':
+                out.append(' ')
+        else:
+            out.append(token)
+    return ''.join(out).strip().rstrip(';').strip()
+
+
+def result_key(database_id, query, params=None):
+    raw = json.dumps([database_id, normalize_sql(query), params], default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class ResultWriter:
+    # Sonucu parça parça geçici klasöre yazar; commit() ile önbellekte görünür hale gelir.
+    # Yazma hatası çalıştırmayı bozmaz, sadece sonuç önbelleğe alınmaz.
+
+    def __init__(self, cache, key, database_id, module_id, ttl):
+        self.cache = cache
+        self.key = key
+        self.meta = {'key': key, 'database_id': database_id, 'module_ids': [module_id] if module_id else [],
+                     'ttl': ttl, 'rows': 0, 'parts': 0}
+        self.tmp = os.path.join(cache.directory, f'{key}.tmp-{os.getpid()}-{threading.get_ident()}')
+        shutil.rmtree(self.tmp, ignore_errors=True)
+        os.makedirs(self.tmp)
+        self.failed = False
+        self._writer = None
+        self._schema = None
+
+    def write(self, df):
+        if self.failed:
+            return
+        try:
+            if pq is not None:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                if self._writer is None:
+                    self._schema = table.schema
+                    self._writer = pq.ParquetWriter(os.path.join(self.tmp, 'result.parquet'), self._schema)
+                elif table.schema != self._schema:
+                    table = table.cast(self._schema)
+                self._writer.write_table(table)
+            else:
+                df.to_pickle(os.path.join(self.tmp, f'part-{self.meta["parts"]:05d}.pkl'))
+            self.meta['rows'] += len(df)
+            self.meta['parts'] += 1
+        except Exception:
+            self.abort()
+
+    def commit(self):
+        if self.failed:
+            return None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self.meta['created_at'] = time.time()
+        self.meta['bytes'] = sum(os.path.getsize(os.path.join(self.tmp, f)) for f in os.listdir(self.tmp))
+        with open(os.path.join(self.tmp, META_FILE), 'w') as f:
+            json.dump(self.meta, f)
+        self.cache._add(self.key, self.tmp, self.meta)
+        return self.meta
+
+    def abort(self):
+        self.failed = True
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            except Exception:
+                pass
+            self._writer = None
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+class QueryResultCache:
+    def __init__(self, directory, max_bytes=1024 * 1024 * 1024, default_ttl=3600):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._index = OrderedDict()  # key -> meta, en eski kullanılan başta
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._metrics = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'stores': 0, 'invalidated': 0}
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def _read_meta(self, key):
+        try:
+            with open(os.path.join(self._path(key), META_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _load_index(self):
+        # Yeniden başlatmada diskteki kayıtlar son kullanım (meta dosyası mtime) sırasıyla yüklenir
+        found = []
+        for name in os.listdir(self.directory):
+            path = self._path(name)
+            if '.tmp-' in name:
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+            meta = self._read_meta(name)
+            if meta is None:
+                continue
+            found.append((os.path.getmtime(os.path.join(path, META_FILE)), name, meta))
+        for _, name, meta in sorted(found):
+            self._index[name] = meta
+            self._bytes += meta.get('bytes', 0)
+
+    def ttl_for(self, module):
+        # Modülde query_cache_ttl yoksa varsayılan; 0 veya negatif = önbellek kapalı
+        ttl = (module or {}).get('query_cache_ttl')
+        return self.default_ttl if ttl is None else ttl
+
+    def lookup(self, key, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            meta = self._index.get(key)
+            if meta is None:
+                # Başka bir süreç yazmış olabilir
+                meta = self._read_meta(key)
+                if meta is not None:
+                    self._index[key] = meta
+                    self._bytes += meta.get('bytes', 0)
+            if meta is None or ttl <= 0:
+                self._metrics['misses'] += 1
+                return None
+            if time.time() - meta['created_at'] > ttl:
+                self._metrics['expired'] += 1
+                self._metrics['misses'] += 1
+                self._remove(key)
+                return None
+            self._index.move_to_end(key)
+            self._metrics['hits'] += 1
+        try:
+            os.utime(os.path.join(self._path(key), META_FILE))
+        except OSError:
+            pass
+        return meta
+
+    def iter_chunks(self, key, chunk_rows=50000):
+        path = self._path(key)
+        result = os.path.join(path, 'result.parquet')
+        if os.path.exists(result):
+            for batch in pq.ParquetFile(result).iter_batches(batch_size=chunk_rows):
+                yield batch.to_pandas()
+            return
+        for part in sorted(p for p in os.listdir(path) if p.startswith('part-')):
+            yield pd.read_pickle(os.path.join(path, part))
+
+    def writer(self, key, database_id, module_id=None, ttl=None):
+        return ResultWriter(self, key, database_id, module_id, ttl)
+
+    def _add(self, key, tmp, meta):
+        with self._lock:
+            old = self._index.get(key)
+            if old is not None:
+                for module_id in old.get('module_ids', []):
+                    if module_id not in meta['module_ids']:
+                        meta['module_ids'].append(module_id)
+                self._remove(key)
+            target = self._path(key)
+            shutil.rmtree(target, ignore_errors=True)
+            os.replace(tmp, target)
+            with open(os.path.join(target, META_FILE), 'w') as f:
+                json.dump(meta, f)
+            self._index[key] = meta
+            self._bytes += meta['bytes']
+            self._metrics['stores'] += 1
+            while self._bytes > self.max_bytes and len(self._index) > 1:
+                oldest = next(iter(self._index))
+                self._remove(oldest)
+                self._metrics['evictions'] += 1
+
+    def _remove(self, key):
+        meta = self._index.pop(key, None)
+        if meta is not None:
+            self._bytes -= meta.get('bytes', 0)
+        shutil.rmtree(self._path(key), ignore_errors=True)
+
+    def invalidate(self, module_id=None, database_id=None, key=None):
+        # Modül güncellenince/silinince o modülün sakladığı sonuçlar silinir
+        with self._lock:
+            keys = [
+                k for k, meta in self._index.items()
+                if k == key
+                or (module_id is not None and module_id in meta.get('module_ids', []))
+                or (database_id is not None and meta.get('database_id') == database_id)
+            ]
+            for k in keys:
+                self._remove(k)
+            self._metrics['invalidated'] += len(keys)
+        return len(keys)
+
+    def clear(self):
+        # database_info toplu yüklenince hangi kaynakların değiştiği bilinmez; tüm sonuçlar silinir
+        with self._lock:
+            keys = list(self._index)
+            for k in keys:
+                self._remove(k)
+            self._metrics['invalidated'] += len(keys)
+        return len(keys)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._metrics, entries=len(self._index), bytes=self._bytes, max_bytes=self.max_bytes)
@@ -0,0 +1,482 @@
+# auto_prompt.trigger_time zamanlamalarını çalıştıran zamanlayıcı.
+# Ayrı bir süreç olarak çalışır: python scheduler.py
+#
+# trigger_time = {"times": "09:00, 14:30" | "every 15m", "start_time": "...", "end_time": "..."}
+# Aktif (mcrisactive) kayıtlar bir kez yüklenir ve bir sonraki çalışma zamanlarına göre
+# heap'te tutulur. app.py auto_prompt yazdıkça 'auto_prompt_changed' kanalına bildirim
+# gönderir; zamanlayıcı sadece değişen kaydı yeniden okur. CHANGE_FEED açıksa bunun yerine
+# değişiklik akışı (changes.py) dinlenir; uygulama dışından yapılan yazmalar da görülür ve
+# bağlantı kopunca tam yeniden yükleme yerine kalınan seq'ten devam edilir.
+import heapq
+import itertools
+import json
+import logging
+import re
+import select
+import threading
+import time
+import traceback
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, time as dtime
+
+import psycopg2
+import psycopg2.extras
+
+import config
+
+log = logging.getLogger('scheduler')
+
+NOTIFY_CHANNEL = 'auto_prompt_changed'
+
+PROMPT_COLUMNS = 'prompt_id, asistan_id, question, trigger_time, option_code, mcrisactive, receiver_emails'
+
+_INTERVAL_RE = re.compile(r'^(?:every\s+)?(\d+)\s*(s|sn|m|dk|h|sa|d|g)$', re.IGNORECASE)
+_UNIT_SECONDS = {'s': 1, 'sn': 1, 'm': 60, 'dk': 60, 'h': 3600, 'sa': 3600, 'd': 86400, 'g': 86400}
+
+
+class TriggerError(ValueError):
+    pass
+
+
+def _local(value):
+    # Zamanlayıcı saati (datetime.now) saat dilimsizdir; dilimli değerler yerel saate çevrilir
+    if value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
+
+
+def _parse_datetime(value, end=False):
+    if value in (None, ''):
+        return None
+    if isinstance(value, datetime):
+        return _local(value)
+    value = str(value).strip()
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise TriggerError(f'Geçersiz tarih: {value}')
+    # Sadece tarih verilmişse end_time o günün sonunu kapsar
+    if end and len(value) <= 10:
+        parsed += timedelta(days=1) - timedelta(microseconds=1)
+    return _local(parsed)
+
+
+def _parse_time(value):
+    if not isinstance(value, str):
+        raise TriggerError(f'Geçersiz saat: {value!r}')
+    try:
+        parsed = dtime.fromisoformat(value.strip())
+    except ValueError:
+        raise TriggerError(f'Geçersiz saat: {value}')
+    if parsed.tzinfo is not None:
+        # '09:00+03:00': bugünün tarihiyle yerel saate çevrilir
+        parsed = _local(datetime.combine(datetime.now().date(), parsed)).time()
+    return parsed
+
+
+class Trigger:
+    def __init__(self, daily_times=None, interval=None, start=None, end=None):
+        self.daily_times = sorted(daily_times or [])
+        self.interval = interval
+        self.start = start
+        self.end = end
+
+    @classmethod
+    def parse(cls, trigger_time):
+        if isinstance(trigger_time, str):
+            try:
+                trigger_time = json.loads(trigger_time)
+            except ValueError:
+                raise TriggerError('trigger_time JSON değil')
+        if not isinstance(trigger_time, dict):
+            raise TriggerError('trigger_time bir nesne olmalı')
+        times = trigger_time.get('times')
+        start = _parse_datetime(trigger_time.get('start_time'))
+        end = _parse_datetime(trigger_time.get('end_time'), end=True)
+        if isinstance(times, str):
+            match = _INTERVAL_RE.match(times.strip())
+            if match:
+                seconds = int(match.group(1)) * _UNIT_SECONDS[match.group(2).lower()]
+                if seconds <= 0:
+                    raise TriggerError('Aralık 0 olamaz')
+                return cls(interval=seconds, start=start, end=end)
+            times = [t for t in times.split(',') if t.strip()]
+        elif times is not None and not isinstance(times, list):
+            raise TriggerError('times bir metin veya liste olmalı')
+        if not times:
+            raise TriggerError('times boş')
+        return cls(daily_times=[_parse_time(t) for t in times], start=start, end=end)
+
+    def next_after(self, now):
+        # now'dan sonraki ilk çalışma zamanı; yoksa None
+        base = now
+        if self.start and base < self.start:
+            base = self.start - timedelta(microseconds=1)
+        if self.interval:
+            anchor = self.start or base.replace(hour=0, minute=0, second=0, microsecond=0)
+            steps = int((base - anchor).total_seconds() // self.interval) + 1
+            candidate = anchor + timedelta(seconds=steps * self.interval)
+        else:
+            candidate = None
+            day = base.date()
+            for offset in (0, 1):
+                for t in self.daily_times:
+                    at = datetime.combine(day + timedelta(days=offset), t)
+                    if at > base:
+                        candidate = at
+                        break
+                if candidate:
+                    break
+        if candidate is None or (self.end and candidate > self.end):
+            return None
+        return candidate
+
+
+class RunHistory:
+    # Son çalışmalar bellekte tutulur; pool verilirse auto_prompt_runs tablosuna da yazılır
+
+    def __init__(self, pool=None, keep=1000):
+        self.pool = pool
+        self.recent = deque(maxlen=keep)
+        self.counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, run):
+        with self._lock:
+            self.recent.append(run)
+            self.counts[run['status']] += 1
+        if self.pool is None:
+            return
+        try:
+            with self.pool.connection() as conn:
+                cur = conn.cursor()
+                cur.execute(
+                    'INSERT INTO llm_platform.auto_prompt_runs '
+                    '(prompt_id, scheduled_for, started_at, finished_at, status, error) '
+                    'VALUES (%s, %s, %s, %s, %s, %s)',
+                    (run['prompt_id'], run['scheduled_for'], run.get('started_at'), run.get('finished_at'),
+                     run['status'], run.get('error'))
+                )
+                conn.commit()
+                cur.close()
+        except Exception:
+            log.exception('Çalışma geçmişi yazılamadı')
+
+
+class Dispatcher:
+    # Sınırlı iş parçacığı havuzu; her asistan için aynı anda en fazla per_assistant iş çalışır,
+    # fazlası o asistanın kuyruğunda bekler. Toplam bekleyen iş max_pending'i aşarsa atlanır.
+
+    def __init__(self, runner, history, workers=8, per_assistant=2, max_pending=10000):
+        self.runner = runner
+        self.history = history
+        self.per_assistant = per_assistant
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='auto-prompt')
+        self._lock = threading.Lock()
+        self._running = defaultdict(int)
+        self._queued = defaultdict(deque)
+        self._pending = 0
+
+    def submit(self, prompt, scheduled_for):
+        key = prompt.get('asistan_id')
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.history.record({'prompt_id': prompt['prompt_id'], 'scheduled_for': scheduled_for,
+                                     'status': 'dropped', 'error': 'Kuyruk dolu'})
+                return False
+            self._pending += 1
+            if self._running[key] >= self.per_assistant:
+                self._queued[key].append((prompt, scheduled_for))
+                return True
+            self._running[key] += 1
+        self._executor.submit(self._run, key, prompt, scheduled_for)
+        return True
+
+    def _run(self, key, prompt, scheduled_for):
+        run = {'prompt_id': prompt['prompt_id'], 'scheduled_for': scheduled_for, 'started_at': datetime.now()}
+        try:
+            self.runner(prompt)
+            run['status'] = 'success'
+        except Exception as e:
+            run['status'] = 'error'
+            run['error'] = f'{e}\n{traceback.format_exc(limit=5)}'
+        run['finished_at'] = datetime.now()
+        self.history.record(run)
+        with self._lock:
+            self._pending -= 1
+            if self._queued[key]:
+                nxt = self._queued[key].popleft()
+            else:
+                nxt = None
+                self._running[key] -= 1
+                if not self._running[key]:
+                    del self._running[key]
+                    self._queued.pop(key, None)
+        if nxt:
+            self._executor.submit(self._run, key, *nxt)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': self._pending,
+                'running': sum(self._running.values()),
+                'queued': sum(len(q) for q in self._queued.values()),
+            }
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+class Scheduler:
+    def __init__(self, pool, dispatcher, clock=datetime.now, feed=None):
+        self.pool = pool
+        self.dispatcher = dispatcher
+        self.clock = clock
+        self.feed = feed  # changes.ChangeFeed; verilirse LISTEN döngüsü yerine kullanılır
+        self._heap = []  # (çalışma zamanı, nesil, prompt_id)
+        self._entries = {}  # prompt_id -> (nesil, kayıt, trigger)
+        self._generation = itertools.count()
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = []
+        self.fired = 0
+        self.max_lag = 0.0
+
+    # --- zamanlama tablosu ---
+
+    def upsert(self, prompt):
+        prompt_id = prompt['prompt_id']
+        if not prompt.get('mcrisactive'):
+            self.remove(prompt_id)
+            return
+        try:
+            trigger = Trigger.parse(prompt.get('trigger_time'))
+        except TriggerError as e:
+            log.warning('prompt %s atlandı: %s', prompt_id, e)
+            self.remove(prompt_id)
+            return
+        next_fire = trigger.next_after(self.clock())
+        with self._cond:
+            if next_fire is None:
+                self._entries.pop(prompt_id, None)
+                return
+            gen = next(self._generation)
+            self._entries[prompt_id] = (gen, prompt, trigger)
+            heapq.heappush(self._heap, (next_fire, gen, prompt_id))
+            # Yeni kayıt en öne geldiyse bekleyen döngüyü uyandır
+            if self._heap[0][1] == gen:
+                self._cond.notify()
+
+    def remove(self, prompt_id):
+        # Heap'teki eski girdi nesli eşleşmediği için çalıştığında atlanır
+        with self._cond:
+            self._entries.pop(prompt_id, None)
+
+    def load(self):
+        with self.pool.connection() as conn:
+            cur = conn.cursor(name='scheduler_load', cursor_factory=psycopg2.extras.RealDictCursor)
+            cur.itersize = 5000
+            cur.execute(f'SELECT {PROMPT_COLUMNS} FROM llm_platform.auto_prompt WHERE mcrisactive')
+            count = 0
+            for row in cur:
+                self._upsert_row(dict(row))
+                count += 1
+            cur.close()
+        log.info('%s aktif prompt yüklendi, %s zamanlandı', count, len(self._entries))
+
+    def reload(self, prompt_id):
+        with self.pool.connection() as conn:
+            cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cur.execute(f'SELECT {PROMPT_COLUMNS} FROM llm_platform.auto_prompt WHERE prompt_id = %s', (prompt_id,))
+            row = cur.fetchone()
+            cur.close()
+        if row:
+            self._upsert_row(dict(row))
+        else:
+            self.remove(prompt_id)
+
+    def _upsert_row(self, prompt):
+        # Tek bir bozuk kayıt yüklemeyi (ve bağlantı kopunca yeniden yüklemeyi) durdurmaz
+        try:
+            self.upsert(prompt)
+        except Exception:
+            log.exception('prompt %s zamanlanamadı, atlandı', prompt.get('prompt_id'))
+            self.remove(prompt.get('prompt_id'))
+
+    def handle_notification(self, payload):
+        # payload: '<prompt_id>' veya '*' (toplu değişiklik)
+        if payload == '*':
+            with self._cond:
+                self._entries.clear()
+                self._heap = []
+            self.load()
+            return
+        try:
+            self.reload(int(payload))
+        except ValueError:
+            log.warning('Bilinmeyen bildirim: %s', payload)
+
+    def apply_changes(self, events):
+        # ChangeFeed aboneliği: aynı partide birden çok değişen kayıt bir kez okunur; TRUNCATE tam yükleme
+        prompt_ids = []
+        for event in events:
+            if event['table'] != 'auto_prompt':
+                continue
+            if event['id'] is None:
+                self.handle_notification('*')
+                return
+            if event['id'] not in prompt_ids:
+                prompt_ids.append(event['id'])
+        for prompt_id in prompt_ids:
+            self.reload(prompt_id)
+
+    # --- döngüler ---
+
+    def _due(self):
+        # Zamanı gelen girdileri döndürür; yoksa bir sonrakine kalan saniyeyi
+        now = self.clock()
+        due = []
+        while self._heap:
+            fire_at, gen, prompt_id = self._heap[0]
+            entry = self._entries.get(prompt_id)
+            if entry is None or entry[0] != gen:
+                heapq.heappop(self._heap)
+                continue
+            if fire_at > now:
+                return due, (fire_at - now).total_seconds()
+            heapq.heappop(self._heap)
+            _, prompt, trigger = entry
+            due.append((fire_at, prompt))
+            next_fire = trigger.next_after(max(fire_at, now))
+            if next_fire is None:
+                del self._entries[prompt_id]
+            else:
+                new_gen = next(self._generation)
+                self._entries[prompt_id] = (new_gen, prompt, trigger)
+                heapq.heappush(self._heap, (next_fire, new_gen, prompt_id))
+        return due, None
+
+    def _timer_loop(self):
+        while not self._stop.is_set():
+            with self._cond:
+                due, wait = self._due()
+                if not due:
+                    self._cond.wait(wait if wait is not None else 60)
+                    continue
+            now = self.clock()
+            for fire_at, prompt in due:
+                lag = (now - fire_at).total_seconds()
+                if lag > self.max_lag:
+                    self.max_lag = lag
+                self.fired += 1
+                self.dispatcher.submit(prompt, fire_at)
+
+    def _listen_loop(self):
+        while not self._stop.is_set():
+            try:
+                conn = psycopg2.connect(**config.DB_CONFIG)
+                conn.autocommit = True
+                cur = conn.cursor()
+                cur.execute(f'LISTEN {NOTIFY_CHANNEL}')
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self.handle_notification(conn.notifies.pop(0).payload)
+            except Exception:
+                log.exception('LISTEN bağlantısı koptu, yeniden bağlanılıyor')
+                if self._stop.wait(5):
+                    break
+                # Kopukluk sırasında kaçan değişiklikler için tam yeniden yükleme
+                try:
+                    self.handle_notification('*')
+                except Exception:
+                    log.exception('Yeniden yükleme başarısız')
+
+    def start(self, listen=True):
+        if listen and self.feed is not None:
+            # Akış yüklemeden önce başlar; yükleme sırasında yapılan değişiklikler kaçmaz
+            self.feed.subscribe(self.apply_changes)
+            self.feed.start()
+            self.feed.wait(-1, 10)
+            listen = False
+        self.load()
+        targets = [self._timer_loop] + ([self._listen_loop] if listen else [])
+        for target in targets:
+            thread = threading.Thread(target=target, daemon=True, name=target.__name__)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        if self.feed is not None:
+            self.feed.stop()
+        self.dispatcher.shutdown()
+
+    def stats(self):
+        with self._cond:
+            scheduled = len(self._entries)
+            next_fire = self._heap[0][0] if self._heap else None
+        stats = {'scheduled': scheduled, 'next_fire': next_fire, 'fired': self.fired, 'max_lag': self.max_lag}
+        stats.update(self.dispatcher.stats())
+        stats['runs'] = dict(self.dispatcher.history.counts)
+        return stats
+
+
+def echo_runner(prompt):
+    # Varsayılan çalıştırıcı: LLM entegrasyonu yerine kaydı loglar ve soruyu sonuç olarak döner
+    log.info('prompt %s çalıştı: %s', prompt['prompt_id'], prompt.get('question'))
+    return prompt.get('question')
+
+
+def main():
+    from db_pool import ConnectionPool
+    logging.basicConfig(level=logging.INFO)
+    pool = ConnectionPool(1, config.SCHEDULER_WORKERS + 2, timeout=config.DB_POOL_TIMEOUT, **config.DB_CONFIG)
+    runner = echo_runner
+    mail_queue = None
+    if config.SMTP_HOST:
+        from mailer import SMTPPool, DeliveryQueue, delivering_runner
+        smtp_pool = SMTPPool(
+            config.SMTP_HOST, config.SMTP_PORT, size=config.SMTP_POOL_SIZE, user=config.SMTP_USER,
+            password=config.SMTP_PASSWORD, starttls=config.SMTP_STARTTLS
+        )
+        mail_queue = DeliveryQueue(smtp_pool, config.SMTP_FROM, window=config.MAIL_BATCH_WINDOW,
+                                   max_batch=config.MAIL_BATCH_MAX).start()
+        runner = delivering_runner(runner, mail_queue)
+    dispatcher = Dispatcher(
+        runner,
+        RunHistory(pool),
+        workers=config.SCHEDULER_WORKERS,
+        per_assistant=config.SCHEDULER_PER_ASSISTANT,
+        max_pending=config.SCHEDULER_MAX_PENDING,
+    )
+    feed = None
+    if config.CHANGE_FEED:
+        from changes import ChangeFeed
+        feed = ChangeFeed(lambda: psycopg2.connect(**config.DB_CONFIG), config.CHANGE_FEED_BUFFER,
+                          gap_timeout=config.CHANGE_FEED_GAP_TIMEOUT, retention=config.CHANGE_LOG_RETENTION)
+    scheduler = Scheduler(pool, dispatcher, feed=feed)
+    scheduler.start()
+    try:
+        while True:
+            time.sleep(60)
+            log.info('durum: %s', scheduler.stats())
+            if mail_queue:
+                log.info('e-posta: %s', mail_queue.stats())
+    except KeyboardInterrupt:
+        scheduler.stop()
+        if mail_queue:
+            mail_queue.stop()
+        pool.closeall()
+
+
+if __name__ == '__main__':
+    main()
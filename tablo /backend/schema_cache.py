@@ -0,0 +1,218 @@
+# database_info kaynaklarının şema özetleri (tablolar, kolonlar, tipler, tahmini satır sayıları).
+# İlk okumada katalog tamamen okunur; sonraki yenilemelerde sadece tablo başına değişiklik
+# işaretleri (Postgres: pg_class/pg_attribute xmin, SQLite: sqlite_master.sql) karşılaştırılır ve
+# yalnızca değişen tabloların kolonları tekrar okunur. Özetler bellekte ve diskte (JSON) tutulur;
+# db_schema / csv_db_schema alanları ve LLM prompt'ları render() çıktısını kullanır.
+import hashlib
+import json
+import os
+import threading
+import time
+
+import connectors
+
+# --- Postgres ---
+
+PG_MARKERS = '''
+SELECT c.oid, n.nspname, c.relname, c.relkind, c.reltuples::bigint AS row_estimate,
+       c.xmin::text || ':' || coalesce((SELECT max(a.xmin::text::bigint) FROM pg_attribute a
+                                        WHERE a.attrelid = c.oid), 0)::text AS marker
+FROM pg_class c
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE c.relkind IN ('r', 'p', 'v', 'm', 'f')
+  AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+  AND n.nspname NOT LIKE 'pg_toast%'
+'''
+
+PG_COLUMNS = '''
+SELECT a.attrelid, a.attname, format_type(a.atttypid, a.atttypmod), NOT a.attnotnull
+FROM pg_attribute a
+WHERE a.attrelid = ANY(%s::oid[]) AND a.attnum > 0 AND NOT a.attisdropped
+ORDER BY a.attrelid, a.attnum
+'''
+
+PG_KINDS = {'r': 'table', 'p': 'table', 'v': 'view', 'm': 'materialized_view', 'f': 'foreign_table'}
+
+
+def _pg_markers(conn):
+    cur = conn.cursor()
+    cur.execute(PG_MARKERS)
+    markers = {}
+    for oid, schema, name, kind, rows, marker in cur.fetchall():
+        markers[f'{schema}.{name}'] = {'ref': oid, 'kind': PG_KINDS.get(kind, kind),
+                                       'rows': rows if rows is not None and rows >= 0 else None,
+                                       'marker': marker}
+    cur.close()
+    return markers
+
+
+def _pg_columns(conn, refs):
+    cur = conn.cursor()
+    cur.execute(PG_COLUMNS, (list(refs),))
+    columns = {}
+    for oid, name, type_name, nullable in cur.fetchall():
+        columns.setdefault(oid, []).append([name, type_name, nullable])
+    cur.close()
+    return columns
+
+
+# --- SQLite ---
+
+def _sqlite_markers(conn):
+    cur = conn.cursor()
+    cur.execute("SELECT name, type, sql FROM sqlite_master WHERE type IN ('table', 'view') "
+                "AND name NOT LIKE 'sqlite_%'")
+    tables = cur.fetchall()
+    # ANALYZE çalıştırılmışsa satır tahmini sqlite_stat1'de bulunur; yoksa None (count(*) yapılmaz)
+    estimates = {}
+    cur.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+    if cur.fetchone():
+        cur.execute('SELECT tbl, stat FROM sqlite_stat1')
+        for tbl, stat in cur.fetchall():
+            if stat:
+                estimates[tbl] = int(stat.split()[0])
+    cur.close()
+    return {
+        name: {'ref': name, 'kind': kind, 'rows': estimates.get(name),
+               'marker': hashlib.md5((sql or '').encode()).hexdigest()}
+        for name, kind, sql in tables
+    }
+
+
+def _sqlite_columns(conn, refs):
+    cur = conn.cursor()
+    columns = {}
+    for name in refs:
+        cur.execute(f'PRAGMA table_info("{name.replace(chr(34), chr(34) * 2)}")')
+        columns[name] = [[col[1], col[2] or '', not col[3]] for col in cur.fetchall()]
+    cur.close()
+    return columns
+
+
+# Sürücü adı (connectors.DRIVERS) -> (değişiklik işaretleri, kolonlar)
+INTROSPECTORS = {
+    'postgres': (_pg_markers, _pg_columns),
+    'sqlite': (_sqlite_markers, _sqlite_columns),
+}
+
+
+def render(snapshot, max_tables=200):
+    # Prompt'a ve db_schema alanına konan kısa metin: tablo(kolon tip, ...) ~satır
+    lines = []
+    for name, table in sorted(snapshot['tables'].items())[:max_tables]:
+        columns = ', '.join(f'{c[0]} {c[1]}' for c in table['columns'])
+        rows = f' ~{table["rows"]} satır' if table.get('rows') is not None else ''
+        kind = '' if table['kind'] == 'table' else f' [{table["kind"]}]'
+        lines.append(f'{name}({columns}){kind}{rows}')
+    return '\n'.join(lines)
+
+
+class SchemaCache:
+    def __init__(self, connectors_manager, directory=None, max_age=300):
+        self.connectors = connectors_manager
+        self.directory = directory
+        self.max_age = max_age  # bu kadar saniyeden eski özet istenince işaretler kontrol edilir
+        self._snapshots = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._metrics = {'hits': 0, 'full_reads': 0, 'incremental_refreshes': 0, 'tables_reread': 0}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, database_id):
+        return os.path.join(self.directory, f'{database_id}.json')
+
+    def _load(self, database_id):
+        snapshot = self._snapshots.get(database_id)
+        if snapshot is None and self.directory:
+            try:
+                with open(self._path(database_id)) as f:
+                    snapshot = json.load(f)
+                self._snapshots[database_id] = snapshot
+            except (OSError, ValueError):
+                pass
+        return snapshot
+
+    def _save(self, database_id, snapshot):
+        self._snapshots[database_id] = snapshot
+        if self.directory:
+            tmp = self._path(database_id) + f'.tmp-{os.getpid()}'
+            with open(tmp, 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp, self._path(database_id))
+
+    def _lock_for(self, database_id):
+        with self._lock:
+            return self._locks.setdefault(database_id, threading.Lock())
+
+    def get(self, database_id, info=None, refresh=False):
+        # Özet max_age'den yeniyse doğrudan döner; değilse (veya refresh) artımlı yenilenir
+        snapshot = self._load(database_id)
+        if snapshot is not None and not refresh and time.time() - snapshot['checked_at'] < self.max_age:
+            self._metrics['hits'] += 1
+            return snapshot
+        with self._lock_for(database_id):
+            snapshot = self._load(database_id)
+            if snapshot is not None and not refresh and time.time() - snapshot['checked_at'] < self.max_age:
+                self._metrics['hits'] += 1
+                return snapshot
+            snapshot = self._refresh(database_id, info, snapshot)
+            self._save(database_id, snapshot)
+            return snapshot
+
+    def _refresh(self, database_id, info, previous):
+        pool = self.connectors.pool(database_id, info)
+        driver = self.connectors.driver_for(database_id)
+        if driver.name not in INTROSPECTORS:
+            raise connectors.ConnectorError(f'{driver.name} için şema okuma desteklenmiyor')
+        read_markers, read_columns = INTROSPECTORS[driver.name]
+        if previous is not None and previous.get('driver') != driver.name:
+            previous = None
+        old_tables = previous['tables'] if previous else {}
+        with pool.connection() as conn:
+            markers = read_markers(conn)
+            changed = {name for name, m in markers.items()
+                       if name not in old_tables or old_tables[name]['marker'] != m['marker']}
+            columns = read_columns(conn, [markers[name]['ref'] for name in changed]) if changed else {}
+        tables = {}
+        for name, m in markers.items():
+            if name in changed:
+                table_columns = columns.get(m['ref'], [])
+            else:
+                table_columns = old_tables[name]['columns']
+            # ref (Postgres oid) sadece kolon okumak için; özette tutulmaz
+            tables[name] = {'kind': m['kind'], 'rows': m['rows'], 'marker': m['marker'], 'columns': table_columns}
+        structural = bool(changed) or set(old_tables) != set(tables)
+        if previous is None:
+            self._metrics['full_reads'] += 1
+        else:
+            self._metrics['incremental_refreshes'] += 1
+        self._metrics['tables_reread'] += len(changed)
+        now = time.time()
+        version = (previous['version'] if previous else 0) + (1 if structural else 0)
+        return {
+            'database_id': database_id,
+            'driver': driver.name,
+            'version': version,
+            'changed_at': now if structural else previous['changed_at'],
+            'checked_at': now,
+            'tables': tables,
+        }
+
+    def invalidate(self, database_id=None):
+        # database_info değişince bir sonraki istek kataloğu baştan okur
+        with self._lock:
+            if database_id is None:
+                self._snapshots.clear()
+                files = [os.path.join(self.directory, f) for f in os.listdir(self.directory)] if self.directory else []
+            else:
+                self._snapshots.pop(database_id, None)
+                files = [self._path(database_id)] if self.directory else []
+            for path in files:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def stats(self):
+        return dict(self._metrics, snapshots=len(self._snapshots))
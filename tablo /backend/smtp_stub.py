@@ -0,0 +1,103 @@
+# Yerel geliştirme ve deneme için minimal SMTP sunucusu; gelen mesajları bellekte tutar.
+#   server = LocalSMTPServer(); server.start(); ... server.messages; server.stop()
+# Komut satırından: python smtp_stub.py 1025
+import socketserver
+import sys
+import threading
+from email import message_from_bytes, policy
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def _reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        server = self.server
+        self._reply('220 localhost tablo-smtp-stub')
+        sender, recipients = None, []
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode('utf-8', 'replace').rstrip('\r\n')
+            command = line[:4].upper()
+            if command in ('HELO', 'EHLO'):
+                if command == 'EHLO':
+                    self._reply('250-localhost')
+                    self._reply('250 8BITMIME')
+                else:
+                    self._reply('250 localhost')
+            elif command == 'MAIL':
+                sender, recipients = line.split(':', 1)[1].strip().strip('<>'), []
+                self._reply('250 OK')
+            elif command == 'RCPT':
+                address = line.split(':', 1)[1].strip().strip('<>')
+                if address in server.reject:
+                    self._reply('550 No such user')
+                else:
+                    recipients.append(address)
+                    self._reply('250 OK')
+            elif command == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if chunk in (b'.\r\n', b'.\n', b''):
+                        break
+                    if chunk.startswith(b'..'):
+                        chunk = chunk[1:]
+                    data.append(chunk)
+                if server.fail_next:
+                    server.fail_next -= 1
+                    self._reply('451 Try again later')
+                    continue
+                with server.lock:
+                    server.messages.append({
+                        'from': sender,
+                        'to': recipients,
+                        'message': message_from_bytes(b''.join(data), policy=policy.default),
+                    })
+                self._reply('250 OK')
+            elif command == 'RSET':
+                sender, recipients = None, []
+                self._reply('250 OK')
+            elif command == 'NOOP':
+                self._reply('250 OK')
+            elif command == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('502 Command not implemented')
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0):
+        super().__init__((host, port), _Handler)
+        self.messages = []
+        self.lock = threading.Lock()
+        self.reject = set()
+        # >0 ise sonraki DATA komutları geçici hata (451) döner; yeniden deneme testi için
+        self.fail_next = 0
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == '__main__':
+    server = LocalSMTPServer(port=int(sys.argv[1]) if len(sys.argv) > 1 else 1025)
+    print(f'SMTP stub dinliyor: 127.0.0.1:{server.port}')
+    server.serve_forever()
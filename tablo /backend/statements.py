@@ -0,0 +1,146 @@
+# Sık çalışan sabit CRUD sorguları için sunucu tarafı hazır sorgu (PREPARE/EXECUTE) kaydı.
+# Sorgular bir kez kaydedilir; her havuz bağlantısında ilk kullanımda PREPARE edilir, sonraki
+# isteklerde sadece EXECUTE gönderilir (PostgreSQL ayrıştırma ve planlamayı tekrar yapmaz).
+#   STATEMENTS.add('users.delete', 'DELETE FROM llm_platform.users WHERE id = %s')
+#   STATEMENTS.execute(cur, 'users.delete', (user_id,))
+# İsteğe bağlı kolonlu INSERT/UPDATE'lerin tüm varyantları önceden oluşturulur:
+#   STATEMENTS.insert('users.insert', 'llm_platform.users', [...], optional=['create_date'])
+#   STATEMENTS.execute(cur, 'users.insert', values, optional={'create_date': ...})
+# Hazır sorgular oturuma bağlıdır; bağlantı StatementConnection değilse (ör. pgbouncer
+# transaction modu için kapatıldıysa) sorgu metni her seferinde normal şekilde gönderilir.
+import hashlib
+import itertools
+import re
+
+import psycopg2
+import psycopg2.errors
+import psycopg2.extensions
+from psycopg2 import sql
+
+_PLACEHOLDER_RE = re.compile(r'%(%|s)')
+
+
+class StatementConnection(psycopg2.extensions.connection):
+    # Bu bağlantıda PREPARE edilmiş sorgu adları
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared_statements = set()
+
+
+def to_positional(text):
+    # psycopg2 %s yer tutucularını PREPARE'in beklediği $1, $2, ... biçimine çevirir;
+    # PREPARE parametresiz gönderildiği için %% da tek % olur
+    counter = itertools.count(1)
+    return _PLACEHOLDER_RE.sub(lambda m: '%' if m.group(1) == '%' else f'${next(counter)}', text)
+
+
+class Statement:
+    def __init__(self, name, query):
+        self.name = name
+        # Sunucuda kullanılan ad; 63 karakter sınırı ve geçersiz karakterler yüzünden özetlenir
+        self.server_name = 'st_' + re.sub(r'\W', '_', name)[:40] + '_' + hashlib.md5(name.encode()).hexdigest()[:8]
+        self.query = query  # str veya psycopg2.sql.Composable
+        self._text = None
+
+    def text(self, conn):
+        if self._text is None:
+            self._text = self.query if isinstance(self.query, str) else self.query.as_string(conn)
+        return self._text
+
+    def prepare_sql(self, conn):
+        return f'PREPARE {self.server_name} AS {to_positional(self.text(conn))}'
+
+    def execute_sql(self, nparams):
+        if not nparams:
+            return f'EXECUTE {self.server_name}'
+        return f'EXECUTE {self.server_name}({", ".join(["%s"] * nparams)})'
+
+
+class StatementRegistry:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._statements = {}
+        self._families = {}  # ad -> (isteğe bağlı kolonlar, WHERE parametre sayısı, {varyant: Statement})
+        self._metrics = {'prepares': 0, 'executes': 0, 'unprepared': 0, 'lost': 0}
+
+    def add(self, name, query):
+        statement = Statement(name, query)
+        self._statements[name] = statement
+        return statement
+
+    def insert(self, name, table, columns, optional=(), returning=None):
+        # optional kolonların her alt kümesi için ayrı INSERT (2^n varyant); çağıran sadece
+        # verilen kolonları gönderir, sorgu metni istek sırasında oluşturulmaz
+        def build(extra):
+            names = list(columns) + list(extra)
+            query = sql.SQL('INSERT INTO {} ({}) VALUES ({})').format(
+                sql.SQL(table),
+                sql.SQL(', ').join(map(sql.Identifier, names)),
+                sql.SQL(', ').join(sql.Placeholder() * len(names)),
+            )
+            if returning:
+                query += sql.SQL(' RETURNING {}').format(sql.Identifier(returning))
+            return query
+        return self._family(name, optional, build, 0)
+
+    def update(self, name, table, columns, pk, optional=()):
+        def build(extra):
+            query = sql.SQL('UPDATE {} SET {} WHERE {} = %s').format(
+                sql.SQL(table),
+                sql.SQL(', ').join(sql.SQL('{} = %s').format(sql.Identifier(c)) for c in list(columns) + list(extra)),
+                sql.Identifier(pk),
+            )
+            return query
+        return self._family(name, optional, build, 1)
+
+    def _family(self, name, optional, build, trailing):
+        variants = {}
+        for n in range(len(optional) + 1):
+            for extra in itertools.combinations(optional, n):
+                key = frozenset(extra)
+                suffix = '+'.join(extra)
+                variants[key] = Statement(f'{name}:{suffix}' if suffix else name, build(extra))
+        self._families[name] = (tuple(optional), trailing, variants)
+        return variants
+
+    def resolve(self, name, params, optional=None):
+        # (Statement, parametreler); optional kolonların değerleri SET/VALUES listesinin sonuna,
+        # kayıt sırasındaki sırayla eklenir (UPDATE'lerde WHERE parametresinden önce)
+        if name in self._statements:
+            return self._statements[name], list(params)
+        order, trailing, variants = self._families[name]
+        optional = optional or {}
+        unknown = set(optional) - set(order)
+        if unknown:
+            raise KeyError(f'{name} için tanımsız kolon: {", ".join(sorted(unknown))}')
+        extra = [c for c in order if c in optional]
+        params = list(params)
+        split = len(params) - trailing
+        return variants[frozenset(extra)], params[:split] + [optional[c] for c in extra] + params[split:]
+
+    def execute(self, cur, name, params=(), optional=None):
+        statement, params = self.resolve(name, params, optional)
+        conn = cur.connection
+        prepared = getattr(conn, 'prepared_statements', None)
+        if not self.enabled or prepared is None:
+            self._metrics['unprepared'] += 1
+            cur.execute(statement.text(conn), params)
+            return cur
+        if statement.server_name not in prepared:
+            cur.execute(statement.prepare_sql(conn))
+            # PREPARE transaction'a bağlı değil; rollback sonrasında da oturumda kalır
+            prepared.add(statement.server_name)
+            self._metrics['prepares'] += 1
+        try:
+            cur.execute(statement.execute_sql(len(params)), params)
+        except psycopg2.errors.InvalidSqlStatementName:
+            # Oturumda DISCARD/DEALLOCATE çalışmış; bir sonraki istekte yeniden hazırlanır
+            prepared.clear()
+            self._metrics['lost'] += 1
+            raise
+        self._metrics['executes'] += 1
+        return cur
+
+    def stats(self):
+        return dict(self._metrics, enabled=self.enabled,
+                    statements=len(self._statements) + sum(len(v) for _, _, v in self._families.values()))
@@ -0,0 +1,91 @@
+import itertools
+
+import psycopg2.extras
+
+# Sunucu tarafı cursor'dan her seferinde çekilecek satır sayısı
+EXPORT_ITERSIZE = 2000
+# Bir HTTP parçasında (chunk) gönderilecek en fazla satır
+CHUNK_ROWS = 500
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+
+_cursor_ids = itertools.count(1)
+
+
+def iter_rows(pool, query, params, itersize=EXPORT_ITERSIZE):
+    # Named (server-side) cursor: satırlar itersize'lık partiler halinde gelir,
+    # tablo ne kadar büyük olursa olsun bellekte tek parti tutulur.
+    conn = pool.get()
+    try:
+        cur = conn.cursor(name=f'export_{next(_cursor_ids)}',
+                          cursor_factory=psycopg2.extras.RealDictCursor)
+        cur.itersize = itersize
+        cur.execute(query, params)
+        for row in cur:
+            yield row
+        cur.close()
+    finally:
+        # Export sadece okuma yapar; açık transaction havuza dönerken geri alınır
+        conn.close()
+
+
+def _chunks(rows, size=CHUNK_ROWS):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ndjson_stream(rows, dumps):
+    for batch in _chunks(rows):
+        yield ''.join(dumps(row) + '\n' for row in batch)
+
+
+def json_array_stream(rows, dumps):
+    yield '['
+    first = True
+    for batch in _chunks(rows):
+        body = ','.join(dumps(row) for row in batch)
+        yield body if first else ',' + body
+        first = False
+    yield ']\n'
+
+
+def export_stream(fmt, rows, dumps):
+    if fmt == 'ndjson':
+        return ndjson_stream(rows, dumps)
+    return json_array_stream(rows, dumps)
+
+
+async def aiter_batches(pool, query, params, size=CHUNK_ROWS):
+    # asyncpg karşılığı (asgi_app.py): cursor salt okunur transaction içinde açılır,
+    # satırlar size'lık partiler halinde çekilir
+    async with pool.acquire() as conn:
+        async with conn.transaction(readonly=True):
+            cursor = await conn.cursor(query, *params)
+            while True:
+                batch = await cursor.fetch(size)
+                if not batch:
+                    break
+                yield [dict(row) for row in batch]
+
+
+async def aexport_stream(fmt, batches, dumps):
+    if fmt == 'ndjson':
+        async for batch in batches:
+            yield ''.join(dumps(row) + '\n' for row in batch)
+        return
+    yield '['
+    first = True
+    async for batch in batches:
+        body = ','.join(dumps(row) for row in batch)
+        yield body if first else ',' + body
+        first = False
+    yield ']\n'
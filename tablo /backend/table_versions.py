@@ -0,0 +1,65 @@
+# Tablo değişiklik sayaçlarından koşullu GET doğrulayıcıları (schema.sql: table_versions ve
+# bump_table_version tetikleyicisi). Bir cevabın ETag'i okuduğu tabloların sayaçlarından ve
+# isteğin kendisinden (yol + sorgu metni + cevap biçimi) hesaplanır; Last-Modified tabloların en
+# son değişme zamanıdır. Böylece If-None-Match / If-Modified-Since ile gelen istek, veri sorgusu
+# çalışmadan tek küçük sorguyla 304 alır.
+# Sayaçlar veri sorgusundan ÖNCE okunmalıdır: arada yapılan bir yazma en fazla gereksiz bir
+# yeniden indirmeye yol açar, tersi istemcide eski veriyi yeni sürüm gibi bırakırdı.
+# table_versions tablosu yoksa (şema güncellenmemiş) uyarı loglanır ve özellik kapanır.
+import hashlib
+import logging
+from collections import namedtuple
+
+import psycopg2.errors
+
+logger = logging.getLogger(__name__)
+
+VERSIONS_SQL = 'SELECT table_name, version, changed_at FROM llm_platform.table_versions WHERE table_name = ANY(%s)'
+
+Validator = namedtuple('Validator', 'etag last_modified')
+
+
+class TableVersions:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._metrics = {'checks': 0, 'not_modified': 0}
+
+    def read(self, cur, tables, execute=None):
+        # {tablo: (sayaç, değişme zamanı)}; execute(cur, params) VERSIONS_SQL'i hazır sorgu olarak çalıştırabilir
+        if execute is not None:
+            execute(cur, (list(tables),))
+        else:
+            cur.execute(VERSIONS_SQL, (list(tables),))
+        return {name: (version, changed_at) for name, version, changed_at in cur.fetchall()}
+
+    def validator(self, conn, tables, key, execute=None):
+        # key: cevabı tablolar dışında belirleyen her şey (yol, sorgu metni, JSON ayarları)
+        if not self.enabled:
+            return None
+        tables = sorted(set(tables))
+        cur = conn.cursor()
+        try:
+            versions = self.read(cur, tables, execute)
+        except psycopg2.errors.UndefinedTable:
+            conn.rollback()
+            self.enabled = False
+            logger.warning('llm_platform.table_versions yok; sayaç tabanlı ETag/Last-Modified kapatıldı')
+            return None
+        finally:
+            cur.close()
+        # Okuma transaction'ı açık kalmasın; bağlantı veri sorgusunda tekrar kullanılabilir
+        conn.rollback()
+        self._metrics['checks'] += 1
+        stamp = '|'.join(f'{name}:{versions[name][0] if name in versions else 0}' for name in tables)
+        digest = hashlib.md5(f'{stamp}|{key}'.encode()).hexdigest()
+        # Hiç satırı olmayan tablo varsa değişme zamanı bilinmez; sadece ETag kullanılır
+        last_modified = None
+        if all(name in versions for name in tables):
+            last_modified = max(versions[name][1] for name in tables)
+        return Validator(digest, last_modified)
+
+    def record_not_modified(self):
+        self._metrics['not_modified'] += 1
+
+    def stats(self):
+        return dict(self._metrics, enabled=self.enabled)
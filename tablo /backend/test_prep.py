@@ -0,0 +1,47 @@
+# prep.Pipeline.to_parquet: parçalar ayrı ayrı küçültülse de çıktı tek ve yeterli şemayla yazılır.
+#   python -m pytest test_prep.py
+import os
+
+import pandas as pd
+import pytest
+
+import prep
+
+pq = pytest.importorskip('pyarrow.parquet')
+ds = pytest.importorskip('pyarrow.dataset')
+
+
+def growing_chunks():
+    # İlk parça uint8/float32/category'ye sığar; sonrakiler daha geniş tip ister
+    yield pd.DataFrame({'id': [1, 2], 'k': ['a', 'a'], 'v': [1.5, 2.0], 'q': [1, 2]})
+    yield pd.DataFrame({'id': [300, 70000], 'k': ['a', 'b'], 'v': [0.1, 2.0], 'q': [-5, 2]})
+    yield pd.DataFrame({'id': [3, 4], 'k': ['c', 'd'], 'v': [1.0, 1.0], 'q': [1, 1]})
+
+
+def expected():
+    return pd.concat(list(growing_chunks()), ignore_index=True).sort_values('id', ignore_index=True)
+
+
+def test_to_parquet_widens_schema_for_later_chunks(tmp_path):
+    manifest = prep.Pipeline([prep.downcast]).to_parquet(growing_chunks(), tmp_path / 'out', source_key='growing')
+    table = pq.read_table(tmp_path / 'out')
+    assert manifest['rows'] == 6
+    assert table.schema.field('id').type.bit_width >= 32
+    result = table.to_pandas().sort_values('id', ignore_index=True)
+    assert result['id'].tolist() == expected()['id'].tolist()
+    assert result['q'].tolist() == expected()['q'].tolist()
+    assert result['v'].tolist() == expected()['v'].tolist()
+    assert result['k'].astype(str).tolist() == expected()['k'].tolist()
+
+
+def test_partitioned_to_parquet_widens_schema(tmp_path):
+    out = tmp_path / 'out'
+    manifest = prep.Pipeline([prep.downcast]).to_parquet(growing_chunks(), out, partition_cols=['k'],
+                                                         source_key='growing')
+    assert manifest['rows'] == 6
+    assert sorted(os.listdir(out)) == ['_manifest.json', 'k=a', 'k=b', 'k=c', 'k=d']
+    result = ds.dataset(out, partitioning='hive').to_table().to_pandas().sort_values('id', ignore_index=True)
+    assert result['id'].tolist() == expected()['id'].tolist()
+    assert result['k'].astype(str).tolist() == expected()['k'].tolist()
+    # Ara dosya çıktının yanında kalmaz
+    assert os.listdir(tmp_path) == ['out']
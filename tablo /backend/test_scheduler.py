@@ -0,0 +1,65 @@
+# scheduler.Trigger: trigger_time ayrıştırma ve bir sonraki çalışma zamanı.
+#   python -m pytest test_scheduler.py
+from datetime import datetime, timedelta, time as dtime, timezone
+
+import pytest
+
+from scheduler import Trigger, TriggerError
+
+NOW = datetime(2026, 3, 10, 12, 0)
+
+
+def test_daily_times_pick_next_today_then_tomorrow():
+    trigger = Trigger.parse({'times': '09:00, 14:30'})
+    assert trigger.next_after(NOW) == datetime(2026, 3, 10, 14, 30)
+    assert trigger.next_after(datetime(2026, 3, 10, 15, 0)) == datetime(2026, 3, 11, 9, 0)
+
+
+def test_times_list_and_json_string():
+    assert Trigger.parse('{"times": ["14:30", "09:00"]}').daily_times == [dtime(9, 0), dtime(14, 30)]
+
+
+def test_interval_anchored_to_start():
+    trigger = Trigger.parse({'times': 'every 15m', 'start_time': '2026-03-10T11:50:00'})
+    assert trigger.interval == 900
+    assert trigger.next_after(NOW) == datetime(2026, 3, 10, 12, 5)
+    assert trigger.next_after(datetime(2026, 3, 10, 8, 0)) == datetime(2026, 3, 10, 11, 50)
+
+
+def test_end_date_covers_whole_day():
+    trigger = Trigger.parse({'times': '23:00', 'end_time': '2026-03-10'})
+    assert trigger.next_after(NOW) == datetime(2026, 3, 10, 23, 0)
+    assert trigger.next_after(datetime(2026, 3, 10, 23, 30)) is None
+
+
+def test_timezone_aware_values_become_local_naive():
+    trigger = Trigger.parse({'times': '09:00+03:00', 'start_time': '2026-01-01T00:00:00+03:00',
+                             'end_time': '2027-01-01T00:00:00Z'})
+    assert trigger.start.tzinfo is None and trigger.end.tzinfo is None
+    assert trigger.daily_times[0].tzinfo is None
+    expected = datetime(2026, 1, 1, tzinfo=timezone(timedelta(hours=3))).astimezone().replace(tzinfo=None)
+    assert trigger.start == expected
+    # Saat dilimsiz şimdiki zamanla karşılaştırılabilir
+    assert trigger.next_after(NOW) is not None
+
+
+def test_aware_datetime_objects_are_normalized():
+    start = datetime(2026, 3, 10, 9, 0, tzinfo=timezone.utc)
+    trigger = Trigger.parse({'times': 'every 1h', 'start_time': start})
+    assert trigger.start == start.astimezone().replace(tzinfo=None)
+    assert trigger.next_after(NOW) is not None
+
+
+@pytest.mark.parametrize('trigger_time', [
+    'not json',
+    [],
+    {'times': ''},
+    {'times': 'every 0m'},
+    {'times': '25:00'},
+    {'times': [900, '09:00']},
+    {'times': 900},
+    {'times': '09:00', 'start_time': 'yarın'},
+])
+def test_invalid_trigger_time_raises_trigger_error(trigger_time):
+    with pytest.raises(TriggerError):
+        Trigger.parse(trigger_time)
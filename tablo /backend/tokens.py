@@ -0,0 +1,161 @@
+# İmzalı, durumsuz erişim (access) ve yenileme (refresh) token'ları.
+# Biçim JWT (HS256) ile uyumludur; doğrulama süreç içinde yapılır, veritabanına gidilmez.
+# Token'lar kullanıcı id'sini (sub) ve rol id'sini (role) taşır; izinler rolden
+# permissions.PermissionEngine ile değerlendirilir.
+# İptal listesi (RevocationList) bellekte tutulur; uygulama onu arka planda
+# llm_platform.revoked_tokens tablosundan tazeler.
+import base64
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+import uuid
+
+
+class TokenError(Exception):
+    pass
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+
+def _b64decode(data):
+    return base64.urlsafe_b64decode(data + b'=' * (-len(data) % 4))
+
+
+_HEADER = _b64encode(json.dumps({'alg': 'HS256', 'typ': 'JWT'}, separators=(',', ':')).encode())
+
+
+class RevocationList:
+    # jti -> bitiş zamanı ve kullanıcı -> not_before (bu zamandan önce verilmiş tüm token'ları geçersiz)
+
+    def __init__(self, refresh_interval=30.0):
+        self.refresh_interval = refresh_interval
+        self.loaded = False
+        self._jtis = {}
+        self._users = {}
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def needs_refresh(self):
+        # Aralık dolduysa sadece ilk çağırana True döner; yükleme çağıranın işidir
+        now = time.monotonic()
+        if now < self._next_refresh:
+            return False
+        with self._lock:
+            if now < self._next_refresh:
+                return False
+            self._next_refresh = now + self.refresh_interval
+            return True
+
+    def replace(self, jtis, users):
+        # jtis: {jti: bitiş (epoch)}, users: {user_id: not_before (epoch)}; yerel iptaller korunur
+        with self._lock:
+            now = time.time()
+            merged_jtis = {j: e for j, e in self._jtis.items() if e > now}
+            merged_jtis.update(jtis)
+            merged_users = dict(self._users)
+            for user_id, not_before in users.items():
+                merged_users[user_id] = max(not_before, merged_users.get(user_id, 0))
+            self._jtis, self._users = merged_jtis, merged_users
+            self.loaded = True
+
+    def revoke(self, jti, expires):
+        with self._lock:
+            self._jtis[jti] = expires
+
+    def revoke_user(self, user_id, not_before=None):
+        not_before = time.time() if not_before is None else not_before
+        with self._lock:
+            self._users[user_id] = max(not_before, self._users.get(user_id, 0))
+        return not_before
+
+    def is_revoked(self, claims):
+        if claims['jti'] in self._jtis:
+            return True
+        not_before = self._users.get(claims['sub'])
+        return not_before is not None and claims['iat'] < not_before
+
+    def stats(self):
+        return {'jtis': len(self._jtis), 'users': len(self._users), 'loaded': self.loaded}
+
+
+class TokenService:
+    def __init__(self, secret=None, access_ttl=900, refresh_ttl=7 * 86400, revocations=None, cache_size=10000):
+        # secret verilmezse süreç başına rastgele; birden fazla worker varsa TOKEN_SECRET ortak olmalı
+        secret = secret or os.urandom(32)
+        self._key = secret.encode() if isinstance(secret, str) else secret
+        self.access_ttl = access_ttl
+        self.refresh_ttl = refresh_ttl
+        self.revocations = revocations if revocations is not None else RevocationList()
+        self.cache_size = cache_size
+        # Doğrulanmış token -> claims; aynı token'ın her istekte imza ve JSON çözümü tekrarlanmaz
+        self._verified = {}
+        self._metrics = {'issued': 0, 'verified': 0, 'cache_hits': 0, 'rejected': 0}
+
+    def _sign(self, signing_input):
+        return _b64encode(hmac.new(self._key, signing_input, hashlib.sha256).digest())
+
+    def encode(self, claims):
+        payload = _b64encode(json.dumps(claims, separators=(',', ':')).encode())
+        signing_input = _HEADER + b'.' + payload
+        return (signing_input + b'.' + self._sign(signing_input)).decode('ascii')
+
+    def issue(self, user):
+        # user: users satırı (id, role_id)
+        now = time.time()
+        common = {'sub': user['id'], 'role': user.get('role_id'), 'iat': now}
+        access = dict(common, typ='access', jti=uuid.uuid4().hex, exp=now + self.access_ttl)
+        refresh = dict(common, typ='refresh', jti=uuid.uuid4().hex, exp=now + self.refresh_ttl)
+        self._metrics['issued'] += 1
+        return {
+            'access_token': self.encode(access),
+            'refresh_token': self.encode(refresh),
+            'token_type': 'Bearer',
+            'expires_in': self.access_ttl,
+        }
+
+    def _decode(self, token):
+        try:
+            signing_input, _, signature = token.encode('ascii').rpartition(b'.')
+            header, _, payload = signing_input.partition(b'.')
+        except (AttributeError, UnicodeEncodeError):
+            raise TokenError('Geçersiz token')
+        if header != _HEADER or not hmac.compare_digest(signature, self._sign(signing_input)):
+            raise TokenError('Geçersiz token imzası')
+        try:
+            return json.loads(_b64decode(payload))
+        except ValueError:
+            raise TokenError('Geçersiz token')
+
+    def verify(self, token, kind='access'):
+        claims = self._verified.get(token)
+        if claims is None:
+            try:
+                claims = self._decode(token)
+            except TokenError:
+                self._metrics['rejected'] += 1
+                raise
+            if len(self._verified) >= self.cache_size:
+                self._verified.clear()
+            self._verified[token] = claims
+            self._metrics['verified'] += 1
+        else:
+            self._metrics['cache_hits'] += 1
+        if claims.get('typ') != kind:
+            self._metrics['rejected'] += 1
+            raise TokenError('Yanlış token türü')
+        if claims['exp'] <= time.time():
+            self._verified.pop(token, None)
+            self._metrics['rejected'] += 1
+            raise TokenError('Token süresi dolmuş')
+        if self.revocations.is_revoked(claims):
+            self._metrics['rejected'] += 1
+            raise TokenError('Token iptal edilmiş')
+        return claims
+
+    def stats(self):
+        return dict(self._metrics, cached=len(self._verified), revocations=self.revocations.stats())
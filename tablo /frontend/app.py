@@ -19,41 +19,129 @@ if "show_table" not in st.session_state:
 
 # Custom CSS for alert boxes (KALDIRILDI)
 
-def get_users():
+# Listelerle birlikte sunucu tarafında birleştirilen ilişkili kayıtlar (ör. user['role'])
+EXPAND = {"users": "role"}
+
+# Listelerin birincil anahtarları; değişiklik olaylarındaki id bu alana karşılık gelir
+PRIMARY_KEYS = {"users": "id", "roles": "role_id", "assistants": "asistan_id", "database_info": "database_id",
+                "auto_prompt": "prompt_id", "data_prepare_modules": "module_id"}
+# Bir tabloda bundan fazla kayıt değiştiyse kayıtlar tek tek okunmaz, tablo yeniden çekilir
+MAX_DELTA_ROWS = 20
+
+def fetch_tables(tables):
+    # Eksik tabloları tek /lookup isteğiyle çeker. Sonuç oturum boyunca saklanır; değişiklikler
+    # sync_changes ile kayıt kayıt uygulanır (akış kapalıysa yazma sonrası tümü silinir)
+    cache = st.session_state.setdefault("lookup_cache", {})
+    missing = [t for t in tables if t not in cache]
+    if missing:
+        params = {"tables": ",".join(missing)}
+        params.update({f"{t}.expand": EXPAND[t] for t in missing if t in EXPAND})
+        # Son cevap ETag'iyle saklanır; tablolar değişmediyse backend gövdesiz 304 döner.
+        # (requests gzip/br/zstd cevaplarını kendisi açar)
+        versions = st.session_state.setdefault("lookup_versions", {})
+        key = tuple(sorted(params.items()))
+        headers = {"If-None-Match": versions[key][0]} if key in versions else {}
+        try:
+            resp = requests.get(f"{BACKEND_URL}/lookup", params=params, headers=headers)
+            if resp.status_code == 304:
+                cache.update(versions[key][1])
+            elif resp.status_code == 200:
+                data = resp.json()
+                cache.update(data)
+                if resp.headers.get("ETag"):
+                    versions[key] = (resp.headers["ETag"], data)
+        except Exception:
+            pass
+    return {t: cache.get(t, []) for t in tables}
+
+def get_table(name):
+    return fetch_tables([name])[name]
+
+def invalidate_lookups():
+    st.session_state.pop("lookup_cache", None)
+
+def sync_changes(wait=0):
+    # Backend'in değişiklik akışından (/changes) son görülen seq'ten sonraki olaylar alınıp saklanan
+    # listelere uygulanır: silinen kayıt çıkarılır, eklenen/değişen kayıt id ile okunur. Başka
+    # kullanıcıların değişiklikleri de böylece görünür. Akış kapalıysa False döner
+    seq = st.session_state.get("change_seq")
+    params = {"stream": 0, "wait": wait}
+    if seq is not None:
+        params["after"] = seq
     try:
-        resp = requests.get(f"{BACKEND_URL}/users")
-        if resp.status_code == 200:
-            return resp.json()
-        return []
+        resp = requests.get(f"{BACKEND_URL}/changes", params=params, timeout=wait + 5)
+        if resp.status_code != 200:
+            return False
+        body = resp.json()
     except Exception:
-        return []
+        return False
+    st.session_state["change_seq"] = body["seq"]
+    cache = st.session_state.get("lookup_cache")
+    if seq is None or not cache:
+        return True
+    if body["reset"]:
+        invalidate_lookups()
+        return True
+    changed = {}
+    for event in body["events"]:
+        changed.setdefault(event["table"], {})[event["id"]] = event["op"]
+    for table, ops in changed.items():
+        if table not in cache:
+            continue
+        # TRUNCATE (id yok) veya çok sayıda değişiklik: tablo bir sonraki kullanımda yeniden çekilir
+        if None in ops or len(ops) > MAX_DELTA_ROWS:
+            cache.pop(table)
+            continue
+        pk = PRIMARY_KEYS[table]
+        rows = [r for r in cache[table] if r.get(pk) not in ops]
+        try:
+            for record_id, op in ops.items():
+                if op == "D":
+                    continue
+                params = {"expand": EXPAND[table]} if table in EXPAND else None
+                r = requests.get(f"{BACKEND_URL}/{table}/{record_id}", params=params)
+                if r.status_code == 200:
+                    rows.append(r.json())
+                elif r.status_code != 404:
+                    raise ValueError(r.status_code)
+        except Exception:
+            cache.pop(table)
+            continue
+        rows.sort(key=lambda r: r.get(pk) or 0)
+        cache[table] = rows
+    return True
+
+def api_request(method, url, **kwargs):
+    resp = requests.request(method, url, **kwargs)
+    if resp.status_code == 200:
+        # Kendi yazmamızın olayı kısa bir long-poll ile beklenir; akış yoksa listeler silinir
+        if st.session_state.get("change_seq") is None or not sync_changes(wait=1):
+            invalidate_lookups()
+    return resp
+
+def get_users():
+    return get_table("users")
 
 def get_roles():
-    try:
-        resp = requests.get(f"{BACKEND_URL}/roles")
-        if resp.status_code == 200:
-            return resp.json()
-        return []
-    except Exception:
-        return []
+    return get_table("roles")
 
 def get_assistants():
-    try:
-        resp = requests.get(f"{BACKEND_URL}/assistants")
-        if resp.status_code == 200:
-            return resp.json()
-        return []
-    except Exception:
-        return []
+    return get_table("assistants")
 
 def get_database_info():
+    return get_table("database_info")
+
+def get_schema_text(database_id):
+    # Backend'in önbellekteki şema özeti; katalog her seferinde okunmaz
+    if not database_id:
+        return ""
     try:
-        resp = requests.get(f"{BACKEND_URL}/database_info")
+        resp = requests.get(f"{BACKEND_URL}/database_info/{database_id}/schema", params={"format": "text"})
         if resp.status_code == 200:
-            return resp.json()
-        return []
+            return resp.text
+        return ""
     except Exception:
-        return []
+        return ""
 
 def is_valid_email(email):
     return re.match(r"[^@]+@[^@]+\.[^@]+", email) is not None
@@ -145,6 +233,18 @@ fields = config["fields"]
 
 st.header(f"{table_name} Tablosu")
 
+# Sayfadaki listeler, formlar ve seçim kutuları için gereken tablolar tek istekte çekilir
+PAGE_TABLES = {
+    "Users": ["users", "roles"],
+    "Roles": ["roles"],
+    "Database Info": ["database_info", "users"],
+    "Data Prepare Modules": ["data_prepare_modules", "users", "assistants", "database_info"],
+    "Assistants": ["assistants", "users"],
+    "Auto Prompt": ["auto_prompt", "assistants"],
+}
+sync_changes()
+fetch_tables(PAGE_TABLES.get(table_name, [endpoint]))
+
 if table_name == "Users":
     roles = get_roles()
     role_name_to_id = {r['role_name']: r['role_id'] for r in roles}
@@ -156,12 +256,11 @@ if st.button("Verileri Listele"):
 
 if st.session_state["show_table"]:
     try:
-        resp = requests.get(f"{BACKEND_URL}/{endpoint}")
-        data = resp.json()
+        data = get_table(endpoint)
         if isinstance(data, list) and data:
             if table_name == "Users":
                 for user in data:
-                    user['role_name'] = next((r['role_name'] for r in roles if r['role_id'] == user['role_id']), "")
+                    user['role_name'] = (user.get('role') or {}).get('role_name', "")
                 df = pd.DataFrame(data)
                 show_cols = ['id', 'role_name', 'name', 'surname', 'e_mail', 'institution_working']
                 show_cols = [c for c in show_cols if c in df.columns]
@@ -239,7 +338,7 @@ with st.expander("Yeni Kayıt Ekle"):
             else:
                 try:
                     add_data["permissions"] = json.loads(permissions) if permissions else {}
-                    resp = requests.post(f"{BACKEND_URL}/roles", json=add_data)
+                    resp = api_request("post", f"{BACKEND_URL}/roles", json=add_data)
                     if resp.status_code == 200:
                         st.session_state["success_message"] = "Kayıt eklendi!"
                         st.session_state["role_form_key"] += 1  # Formu sıfırla
@@ -324,7 +423,7 @@ with st.expander("Yeni Kayıt Ekle"):
                     "file_path": file_path,
                     "trigger_time": trigger_time
                 }
-                resp = requests.post(f"{BACKEND_URL}/assistants", json=add_data)
+                resp = api_request("post", f"{BACKEND_URL}/assistants", json=add_data)
                 if resp.status_code == 200:
                     st.session_state["success_message"] = "Kayıt eklendi!"
                     st.session_state["assistant_form_key"] = st.session_state.get('assistant_form_key', 0) + 1
@@ -357,7 +456,7 @@ with st.expander("Yeni Kayıt Ekle"):
     elif table_name == "Auto Prompt":
         # Assistants tablosundan başlıkları çek
         try:
-            assistants = requests.get(f"{BACKEND_URL}/assistants").json()
+            assistants = get_assistants()
             assistant_titles = [a['title'] for a in assistants] if assistants else []
         except Exception:
             assistant_titles = []
@@ -410,7 +509,7 @@ with st.expander("Yeni Kayıt Ekle"):
                         "mcrisactive": mcrisactive,
                         "receiver_emails": receiver_emails
                     }
-                    resp = requests.post(f"{BACKEND_URL}/auto_prompt", json=add_data)
+                    resp = api_request("post", f"{BACKEND_URL}/auto_prompt", json=add_data)
                     if resp.status_code == 200:
                         st.session_state["success_message"] = "Kayıt eklendi!"
                         st.session_state["auto_prompt_form_key"] = st.session_state.get('auto_prompt_form_key', 0) + 1
@@ -456,10 +555,10 @@ with st.expander("Yeni Kayıt Ekle"):
         csv_database_id = form.text_input("csv_database_id")
         query_name = form.text_area("query_name", max_chars=255)
         working_platform = form.text_area("working_platform", max_chars=100)
-        db_schema = form.text_area("db_schema")
+        db_schema = form.text_area("db_schema", help="Boş bırakılırsa seçilen veritabanının şemasıyla doldurulur.")
         documents_id = form.text_area("documents_id")
-        csv_db_schema = form.text_area("csv_db_schema")
-        data_prep_code = form.text_area("data_prep_code", height=200, max_chars=1000, help="Buraya Python kodunuzu yazabilirsiniz.")
+        csv_db_schema = form.text_area("csv_db_schema", help="Boş bırakılırsa csv_database_id kaynağının şemasıyla doldurulur.")
+        data_prep_code = form.text_area("data_prep_code", height=200, max_chars=1000, help="Kayıtlı bir veri hazırlama fonksiyonunun adı (ör. prepare).")
         # Karakter sayacı kaldırıldı
         submitted = form.form_submit_button("Ekle")
         if submitted:
@@ -467,12 +566,17 @@ with st.expander("Yeni Kayıt Ekle"):
                 form.error("Lütfen alanları doğru ve limitlere uygun doldurun.")
             else:
                 try:
+                    selected_database_id = database_options[database_id] if database_options else database_id
+                    if not db_schema:
+                        db_schema = get_schema_text(selected_database_id)
+                    if not csv_db_schema:
+                        csv_db_schema = get_schema_text(csv_database_id)
                     add_data = {
                         "module_id": module_id,
                         "query": query,
                         "user_id": user_options[user_id] if user_options else user_id,
                         "asistan_id": assistant_options[asistan_id] if assistant_options else asistan_id,
-                        "database_id": database_options[database_id] if database_options else database_id,
+                        "database_id": selected_database_id,
                         "csv_database_id": csv_database_id,
                         "query_name": query_name,
                         "working_platform": working_platform,
@@ -481,7 +585,7 @@ with st.expander("Yeni Kayıt Ekle"):
                         "csv_db_schema": csv_db_schema,
                         "data_prep_code": data_prep_code
                     }
-                    resp = requests.post(f"{BACKEND_URL}/data_prepare_modules", json=add_data)
+                    resp = api_request("post", f"{BACKEND_URL}/data_prepare_modules", json=add_data)
                     if resp.status_code == 200:
                         st.session_state["success_message"] = "Kayıt eklendi!"
                         st.session_state["dpm_form_key"] = st.session_state.get('dpm_form_key', 0) + 1
@@ -527,7 +631,7 @@ with st.expander("Yeni Kayıt Ekle"):
                     "database_name": database_name,
                     "user_id": user_options[user_id] if user_options else user_id
                 }
-                resp = requests.post(f"{BACKEND_URL}/database_info", json=add_data)
+                resp = api_request("post", f"{BACKEND_URL}/database_info", json=add_data)
                 if resp.status_code == 200:
                     st.session_state["success_message"] = "Kayıt eklendi!"
                     st.session_state["dbinfo_form_key"] = st.session_state.get('dbinfo_form_key', 0) + 1
@@ -589,7 +693,7 @@ with st.expander("Yeni Kayıt Ekle"):
                     st.error("Lütfen geçerli bir e-posta adresi girin (ör: kisi@site.com)")
                 else:
                     try:
-                        resp = requests.post(f"{BACKEND_URL}/{endpoint}", json=add_data)
+                        resp = api_request("post", f"{BACKEND_URL}/{endpoint}", json=add_data)
                         if resp.status_code == 200:
                             st.session_state["success_message"] = "Kişi eklendi!"
                             st.rerun()
@@ -613,7 +717,7 @@ with st.expander("Yeni Kayıt Ekle"):
                         st.error(str(e))
             else:
                 try:
-                    resp = requests.post(f"{BACKEND_URL}/{endpoint}", json=add_data)
+                    resp = api_request("post", f"{BACKEND_URL}/{endpoint}", json=add_data)
                     if resp.status_code == 200:
                         st.session_state["success_message"] = "Kayıt eklendi!"
                         st.rerun()
@@ -642,7 +746,7 @@ with st.expander("Kayıt Sil"):
         users = get_users()
         if users:
             for user in users:
-                user['role_name'] = next((r['role_name'] for r in roles if r['role_id'] == user['role_id']), "")
+                user['role_name'] = (user.get('role') or {}).get('role_name', "")
             user_options = {f"{u['id']} - {u['name']} {u['surname']} ({u['e_mail']}) [{u['role_name']}]": u['id'] for u in users}
             selected = st.selectbox("Silinecek Kişi", list(user_options.keys()), key="delete_user_select")
             delete_id = user_options[selected]
@@ -681,7 +785,7 @@ with st.expander("Kayıt Sil"):
             st.success("Silinecek asistan yok.")
             delete_id = None
     elif table_name == "Auto Prompt":
-        auto_prompts = requests.get(f"{BACKEND_URL}/auto_prompt").json()
+        auto_prompts = get_table("auto_prompt")
         if auto_prompts:
             auto_prompt_options = {f"{ap['prompt_id']} - {ap['question']}": ap['prompt_id'] for ap in auto_prompts}
             selected = st.selectbox("Silinecek Auto Prompt", list(auto_prompt_options.keys()), key="delete_auto_prompt_select")
@@ -690,7 +794,7 @@ with st.expander("Kayıt Sil"):
             st.success("Silinecek auto prompt yok.")
             delete_id = None
     elif table_name == "Data Prepare Modules":
-        dpm_modules = requests.get(f"{BACKEND_URL}/data_prepare_modules").json()
+        dpm_modules = get_table("data_prepare_modules")
         if dpm_modules:
             dpm_options = {f"{dpm['module_id']}": dpm['module_id'] for dpm in dpm_modules}
             selected = st.selectbox("Silinecek Data Prepare Module", list(dpm_options.keys()), key="delete_dpm_select")
@@ -699,7 +803,7 @@ with st.expander("Kayıt Sil"):
             st.success("Silinecek data prepare module yok.")
             delete_id = None
     elif table_name == "Database Info":
-        dbinfo_entries = requests.get(f"{BACKEND_URL}/database_info").json()
+        dbinfo_entries = get_database_info()
         if dbinfo_entries:
             dbinfo_options = {f"{dbinfo['database_id']} - {dbinfo['database_name']}": dbinfo['database_id'] for dbinfo in dbinfo_entries}
             selected = st.selectbox("Silinecek Database Info", list(dbinfo_options.keys()), key="delete_dbinfo_select")
@@ -712,7 +816,7 @@ with st.expander("Kayıt Sil"):
     if st.button("Sil"):
         if delete_id:
             try:
-                resp = requests.delete(f"{BACKEND_URL}/{endpoint}/{delete_id}")
+                resp = api_request("delete", f"{BACKEND_URL}/{endpoint}/{delete_id}")
                 if resp.status_code == 200:
                     if table_name == "Users":
                         st.success("Kişi silindi!")
@@ -741,7 +845,7 @@ with st.expander("Kayıt Güncelle"):
         users = get_users()
         if users:
             for user in users:
-                user['role_name'] = next((r['role_name'] for r in roles if r['role_id'] == user['role_id']), "")
+                user['role_name'] = (user.get('role') or {}).get('role_name', "")
             user_options = {f"{u['id']} - {u['name']} {u['surname']} ({u['e_mail']}) [{u['role_name']}]": u['id'] for u in users}
             selected = st.selectbox("Güncellenecek Kişi", list(user_options.keys()), key="update_user_select")
             update_id = user_options[selected]
@@ -824,7 +928,7 @@ with st.expander("Kayıt Güncelle"):
                         "times": update_data.get('trigger_time_times', '')
                     }
                 }
-                resp = requests.put(f"{BACKEND_URL}/assistants/{update_id}", json=update_payload)
+                resp = api_request("put", f"{BACKEND_URL}/assistants/{update_id}", json=update_payload)
                 if resp.status_code == 200:
                     st.success("Kayıt güncellendi!")
                     st.rerun()
@@ -833,7 +937,7 @@ with st.expander("Kayıt Güncelle"):
             except Exception as e:
                 st.error(f"Kayıt güncellenemedi: {e}")
     elif table_name == "Auto Prompt":
-        auto_prompts = requests.get(f"{BACKEND_URL}/auto_prompt").json()
+        auto_prompts = get_table("auto_prompt")
         if auto_prompts:
             auto_prompt_options = {f"{ap['prompt_id']} - {ap['question']}": ap['prompt_id'] for ap in auto_prompts}
             selected = st.selectbox("Güncellenecek Auto Prompt", list(auto_prompt_options.keys()), key="update_auto_prompt_select")
@@ -844,7 +948,7 @@ with st.expander("Kayıt Güncelle"):
             update_id = None
             auto_prompt_row = None
     elif table_name == "Data Prepare Modules":
-        dpm_modules = requests.get(f"{BACKEND_URL}/data_prepare_modules").json()
+        dpm_modules = get_table("data_prepare_modules")
         if dpm_modules:
             dpm_options = {f"{dpm['module_id']}": dpm['module_id'] for dpm in dpm_modules}
             selected = st.selectbox("Güncellenecek Data Prepare Module", list(dpm_options.keys()), key="update_dpm_select")
@@ -855,7 +959,7 @@ with st.expander("Kayıt Güncelle"):
             update_id = None
             dpm_row = None
     elif table_name == "Database Info":
-        dbinfo_entries = requests.get(f"{BACKEND_URL}/database_info").json()
+        dbinfo_entries = get_database_info()
         if dbinfo_entries:
             dbinfo_options = {f"{dbinfo['database_id']} - {dbinfo['database_name']}": dbinfo['database_id'] for dbinfo in dbinfo_entries}
             selected = st.selectbox("Güncellenecek Database Info", list(dbinfo_options.keys()), key="update_dbinfo_select")
@@ -893,7 +997,7 @@ with st.expander("Kayıt Güncelle"):
             continue  # Bu alanları atla (parameters ve trigger_time için özel kutucuklar var)
         if table_name == "Users" and fname == "role_id":
             if user_row:
-                default_role = next((r for r in roles if r['role_id'] == user_row['role_id']), None)
+                default_role = user_row.get('role')
                 if role_names:
                     default_role_name = default_role['role_name'] if default_role else role_names[0]
                 else:
@@ -972,7 +1076,7 @@ with st.expander("Kayıt Güncelle"):
             update_data['role_id'] = role_name_to_id.get(update_data.pop('role_name'), None)
         if update_id:
             try:
-                resp = requests.put(f"{BACKEND_URL}/{endpoint}/{update_id}", json=update_data)
+                resp = api_request("put", f"{BACKEND_URL}/{endpoint}/{update_id}", json=update_data)
                 if resp.status_code == 200:
                     st.success("Kayıt güncellendi!")
                     st.rerun()
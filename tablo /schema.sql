@@ -68,7 +68,165 @@ CREATE TABLE data_prepare_modules (
     documents_id INTEGER,
     csv_db_schema TEXT,
     csv_database_id INTEGER,
-    data_prep_code TEXT
+    data_prep_code TEXT,
+    query_cache_ttl INTEGER  -- sorgu sonucu önbellek süresi (saniye); NULL = varsayılan, 0 = kapalı
 );
 
 
+
+CREATE TABLE auto_prompt_runs (
+    run_id BIGSERIAL PRIMARY KEY,
+    prompt_id INTEGER REFERENCES auto_prompt(prompt_id) ON DELETE CASCADE,
+    scheduled_for TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    status VARCHAR(20),
+    error TEXT
+);
+
+CREATE INDEX auto_prompt_runs_prompt_idx ON auto_prompt_runs (prompt_id, scheduled_for);
+
+-- İptal edilen token'lar (tokens.py). jti doluysa tek token; boşsa user_id'nin not_before'dan
+-- önce verilmiş tüm token'ları. Zamanlar epoch saniyesi; expires_at geçen kayıtlar silinir.
+CREATE TABLE revoked_tokens (
+    id BIGSERIAL PRIMARY KEY,
+    jti VARCHAR(64),
+    user_id INTEGER,
+    not_before DOUBLE PRECISION,
+    expires_at DOUBLE PRECISION NOT NULL
+);
+
+CREATE INDEX revoked_tokens_expires_idx ON revoked_tokens (expires_at);
+
+-- Tablo değişiklik sayaçları (table_versions.py). Her INSERT/UPDATE/DELETE/TRUNCATE ifadesi
+-- tablonun sayacını artırır; liste cevaplarının ETag/Last-Modified'ı buradan hesaplanır.
+-- Satır değiştirmeyen ifadeler de sayacı artırır (sonucu sadece gereksiz bir yeniden indirmedir).
+-- Users'ta sadece last_login'i değiştiren UPDATE'ler (her giriş) sayacı artırmaz: girişler tek
+-- sayaç satırının kilidinde sıraya girmez ve /users ETag'i girişlerle değişmez.
+CREATE TABLE table_versions (
+    table_name VARCHAR(63) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    changed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+INSERT INTO table_versions (table_name)
+VALUES ('roles'), ('users'), ('assistants'), ('database_info'), ('auto_prompt'), ('data_prepare_modules');
+
+-- TG_ARGV: UPDATE'te yoksayılan kolonlar (geçiş tablolarıyla tanımlanan tetikleyicide); başka
+-- kolonu değişen satır yoksa sayaç artırılmaz
+CREATE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND TG_NARGS > 0 THEN
+        PERFORM 1 FROM (SELECT to_jsonb(n) - TG_ARGV FROM new_rows n
+                        EXCEPT ALL SELECT to_jsonb(o) - TG_ARGV FROM old_rows o) AS changed LIMIT 1;
+        IF NOT FOUND THEN
+            RETURN NULL;
+        END IF;
+    END IF;
+    INSERT INTO llm_platform.table_versions AS v (table_name, version, changed_at)
+    VALUES (TG_TABLE_NAME, 1, clock_timestamp())
+    ON CONFLICT (table_name) DO UPDATE SET version = v.version + 1, changed_at = clock_timestamp();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER roles_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Roles
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER users_version AFTER INSERT OR DELETE OR TRUNCATE ON Users
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER users_version_update AFTER UPDATE ON Users REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version('last_login');
+CREATE TRIGGER assistants_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON assistants
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER database_info_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON database_info
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER auto_prompt_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON auto_prompt
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+CREATE TRIGGER data_prepare_modules_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON data_prepare_modules
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+-- Değişiklik akışı (changes.py). Tablolardaki her satır değişikliği change_log'a (seq, tablo,
+-- işlem, birincil anahtar) olarak yazılır ve ifade sonunda 'table_changes' kanalına son seq ile
+-- tek bir NOTIFY gönderilir. Bildirim sadece uyandırır; olaylar tablodan seq sırasıyla okunur,
+-- bu yüzden kopan dinleyici veya istemci kaldığı seq'ten devam edebilir.
+CREATE TABLE change_log (
+    seq BIGSERIAL PRIMARY KEY,
+    table_name VARCHAR(63) NOT NULL,
+    op CHAR(1) NOT NULL,  -- I, U, D; T = TRUNCATE (tüm tablo, row_id boş)
+    row_id BIGINT,
+    changed_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()
+);
+
+CREATE INDEX change_log_changed_at_idx ON change_log (changed_at);
+
+-- TG_ARGV[0]: birincil anahtar kolonu. Geçiş tabloları sayesinde toplu yüklemede de ifade
+-- başına tek INSERT ... SELECT ve tek NOTIFY çalışır. UPDATE tetikleyicisine ek argüman olarak
+-- verilen kolonlar yoksayılır: sadece onları değişen satırlar (ör. girişteki users.last_login)
+-- loglanmaz, hiç satır loglanmazsa NOTIFY de gönderilmez
+CREATE FUNCTION log_row_changes() RETURNS trigger AS $$
+DECLARE
+    last_seq BIGINT;
+    ignored TEXT[];
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        INSERT INTO llm_platform.change_log (table_name, op) VALUES (TG_TABLE_NAME, 'T')
+        RETURNING seq INTO last_seq;
+    ELSIF TG_OP = 'DELETE' THEN
+        WITH logged AS (
+            INSERT INTO llm_platform.change_log (table_name, op, row_id)
+            SELECT TG_TABLE_NAME, 'D', (to_jsonb(o) ->> TG_ARGV[0])::bigint FROM old_rows o
+            RETURNING seq
+        )
+        SELECT max(seq) INTO last_seq FROM logged;
+    ELSIF TG_OP = 'UPDATE' AND TG_NARGS > 1 THEN
+        ignored := TG_ARGV[1:TG_NARGS - 1];
+        WITH logged AS (
+            INSERT INTO llm_platform.change_log (table_name, op, row_id)
+            SELECT TG_TABLE_NAME, 'U', (to_jsonb(n) ->> TG_ARGV[0])::bigint
+            FROM new_rows n
+            LEFT JOIN old_rows o ON (to_jsonb(o) ->> TG_ARGV[0]) = (to_jsonb(n) ->> TG_ARGV[0])
+            WHERE (to_jsonb(o) ->> TG_ARGV[0]) IS NULL OR (to_jsonb(n) - ignored) <> (to_jsonb(o) - ignored)
+            RETURNING seq
+        )
+        SELECT max(seq) INTO last_seq FROM logged;
+    ELSE
+        WITH logged AS (
+            INSERT INTO llm_platform.change_log (table_name, op, row_id)
+            SELECT TG_TABLE_NAME, left(TG_OP, 1), (to_jsonb(n) ->> TG_ARGV[0])::bigint FROM new_rows n
+            RETURNING seq
+        )
+        SELECT max(seq) INTO last_seq FROM logged;
+    END IF;
+    IF last_seq IS NOT NULL THEN
+        PERFORM pg_notify('table_changes', last_seq::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    t RECORD;
+BEGIN
+    -- ignored: UPDATE'te yoksayılan kolon (geçiş tablosu olarak eski satırlar da tutulur)
+    FOR t IN SELECT * FROM (VALUES ('roles', 'role_id', NULL), ('users', 'id', 'last_login'),
+                                   ('assistants', 'asistan_id', NULL), ('database_info', 'database_id', NULL),
+                                   ('auto_prompt', 'prompt_id', NULL),
+                                   ('data_prepare_modules', 'module_id', NULL)) AS v(name, pk, ignored)
+    LOOP
+        EXECUTE format('CREATE TRIGGER %I AFTER INSERT ON %I REFERENCING NEW TABLE AS new_rows '
+                       'FOR EACH STATEMENT EXECUTE FUNCTION log_row_changes(%L)', t.name || '_log_insert', t.name, t.pk);
+        IF t.ignored IS NULL THEN
+            EXECUTE format('CREATE TRIGGER %I AFTER UPDATE ON %I REFERENCING NEW TABLE AS new_rows '
+                           'FOR EACH STATEMENT EXECUTE FUNCTION log_row_changes(%L)', t.name || '_log_update', t.name, t.pk);
+        ELSE
+            EXECUTE format('CREATE TRIGGER %I AFTER UPDATE ON %I REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows '
+                           'FOR EACH STATEMENT EXECUTE FUNCTION log_row_changes(%L, %L)',
+                           t.name || '_log_update', t.name, t.pk, t.ignored);
+        END IF;
+        EXECUTE format('CREATE TRIGGER %I AFTER DELETE ON %I REFERENCING OLD TABLE AS old_rows '
+                       'FOR EACH STATEMENT EXECUTE FUNCTION log_row_changes(%L)', t.name || '_log_delete', t.name, t.pk);
+        EXECUTE format('CREATE TRIGGER %I AFTER TRUNCATE ON %I '
+                       'FOR EACH STATEMENT EXECUTE FUNCTION log_row_changes(%L)', t.name || '_log_truncate', t.name, t.pk);
+    END LOOP;
+END $$;